@@ -0,0 +1,47 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from crud_productividad import productividad_trabajadores
+
+router = APIRouter(prefix="/analitica", tags=["Analitica"])
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@router.get("/productividad", response_model=list[dict])
+def get_productividad(
+    granularidad: str = Query(default="semana"),
+    desde: date | None = Query(default=None),
+    hasta: date | None = Query(default=None),
+    finca_id: int | None = Query(default=None),
+    sector_id: int | None = Query(default=None),
+    trabajador_id: int | None = Query(default=None),
+    db: Session = Depends(get_db),
+):
+    """
+    Revisiones, árboles revisados y calificación promedio por trabajador y
+    período (dia / semana / mes). Solo lee agregados diarios precalculados:
+    los días con cambios los recalcula el worker en segundo plano
+    (LIMPIEZA_INTERVALO), así que un cambio recién hecho puede tardar en verse.
+    """
+    filas, err = productividad_trabajadores(
+        db,
+        granularidad=granularidad,
+        desde=desde,
+        hasta=hasta,
+        finca_id=finca_id,
+        sector_id=sector_id,
+        trabajador_id=trabajador_id,
+    )
+    if err:
+        raise HTTPException(status_code=400, detail=err)
+    return filas
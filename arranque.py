@@ -0,0 +1,91 @@
+# arranque.py
+import os
+import time
+import logging
+from contextlib import asynccontextmanager
+
+from anyio import to_thread
+
+from database import engine
+from imagenes import inicializar_decodificadores
+from crud_usuarios import pwd_context
+from metricas import ARRANQUE_SEGUNDOS
+from limpieza import iniciar_limpieza, detener_limpieza
+from eventos import detener_eventos
+from services.almacenamiento import validar_almacenes
+from particiones import crear_particiones_al_arrancar
+
+# ----------------------------
+# CONFIGURACIÓN
+# ----------------------------
+# WARMUP=1: antes de reportar "startup complete" abre conexiones del pool,
+# carga cv2/zxingcpp y el backend de bcrypt. Sin WARMUP todo se carga en el primer uso.
+WARMUP = os.getenv("WARMUP", "0") == "1"
+WARMUP_DB_CONEXIONES = int(os.getenv("WARMUP_DB_CONEXIONES", "5"))
+
+logger = logging.getLogger("colibri.arranque")
+
+_fases: dict[str, float] = {}
+
+
+def registrar_fase(fase: str, segundos: float) -> None:
+    _fases[fase] = round(segundos, 4)
+    ARRANQUE_SEGUNDOS.set(segundos, fase=fase)
+
+
+def reporte_arranque() -> dict[str, float]:
+    return dict(_fases)
+
+
+def calentar_db(n: int) -> None:
+    # Abre n conexiones a la vez para que queden en el pool (no una reutilizada n veces);
+    # más allá de pool_size se descartarían al devolverlas
+    if hasattr(engine.pool, "size"):
+        n = min(n, engine.pool.size())
+    conexiones = []
+    try:
+        for _ in range(max(n, 0)):
+            conexiones.append(engine.connect())
+    finally:
+        for c in conexiones:
+            c.close()
+
+
+def calentar_hash() -> None:
+    pwd_context().handler().get_backend()
+
+
+def _fase(nombre: str, fn, *args) -> None:
+    t0 = time.perf_counter()
+    try:
+        fn(*args)
+    except Exception as e:
+        logger.warning("Warm-up '%s' falló: %s", nombre, e)
+    registrar_fase(nombre, time.perf_counter() - t0)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    t0 = time.perf_counter()
+
+    # Un backend que no cubre su uso falla acá y no en el primer borrado
+    validar_almacenes()
+
+    if WARMUP:
+        await to_thread.run_sync(_fase, "warmup_db", calentar_db, WARMUP_DB_CONEXIONES)
+        await to_thread.run_sync(_fase, "warmup_imagenes", inicializar_decodificadores)
+        await to_thread.run_sync(_fase, "warmup_hash", calentar_hash)
+
+    # Tramos por delante de revision_unitaria / imagen / revision_imagen (migraciones/013)
+    await to_thread.run_sync(_fase, "particiones", crear_particiones_al_arrancar)
+
+    registrar_fase("startup", time.perf_counter() - t0)
+    print("Arranque:", ", ".join(f"{fase}={seg * 1000:.0f}ms" for fase, seg in reporte_arranque().items()))
+
+    # Borrado de archivos / blobs de revisiones eliminadas (migraciones/007)
+    iniciar_limpieza()
+    try:
+        yield
+    finally:
+        detener_eventos()
+        detener_limpieza()
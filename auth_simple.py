@@ -1,20 +1,30 @@
 import os
-from fastapi import Header, HTTPException, status, Request
+from fastapi import Header, HTTPException, status
+from starlette.requests import HTTPConnection
 
 API_KEY = os.getenv("API_KEY")
+ADMIN_API_KEY = os.getenv("ADMIN_API_KEY")  # opcional: habilita /admin/*
 
 if not API_KEY:
     raise RuntimeError("API_KEY no está definida en variables de Railway")
 
 
 def require_api_key(
-    request: Request,
+    request: HTTPConnection,
     x_api_key: str | None = Header(default=None, alias="X-Api-Key"),
 ):
     # ✅ Permitir preflight CORS
-    if request.method == "OPTIONS":
+    if request.scope.get("method") == "OPTIONS":
         return True
 
+    # EventSource y WebSocket del navegador no pueden mandar headers: solo
+    # para esos dos, y solo en /eventos, se acepta ?api_key= (queda en los logs)
+    if x_api_key is None and request.url.path.startswith("/eventos") and (
+        request.scope["type"] == "websocket"
+        or "text/event-stream" in request.headers.get("accept", "")
+    ):
+        x_api_key = request.query_params.get("api_key")
+
     if x_api_key != API_KEY:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -22,3 +32,25 @@ def require_api_key(
         )
 
     return True
+
+
+def es_admin_key_valida(x_admin_key: str | None) -> bool:
+    return bool(ADMIN_API_KEY) and x_admin_key == ADMIN_API_KEY
+
+
+def require_admin_key(
+    x_admin_key: str | None = Header(default=None, alias="X-Admin-Key"),
+):
+    if not ADMIN_API_KEY:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Endpoints de administración deshabilitados (ADMIN_API_KEY no definida)",
+        )
+
+    if not es_admin_key_valida(x_admin_key):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Admin Key inválida o faltante",
+        )
+
+    return True
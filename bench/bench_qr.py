@@ -0,0 +1,209 @@
+# bench/bench_qr.py
+"""
+Benchmark del pipeline QR (_decode_qr_from_bytes / leer_qr_zip).
+
+Mide por etapa (unzip, decode, upload a un Worker stub local), el flujo
+completo de leer_qr_zip, imágenes/segundo, RSS pico y tasa de detección.
+Guarda el resultado en bench/resultados/ y lo compara con la corrida anterior.
+
+Uso:
+    python bench/bench_qr.py                         # genera un ZIP sintético (40 con QR / 10 sin QR)
+    python bench/bench_qr.py --zip fotos.zip         # usa un ZIP existente (con manifest.json opcional)
+    python bench/bench_qr.py --comparar-con bench/resultados/qr_....json
+"""
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from starlette.datastructures import UploadFile  # noqa: E402
+
+import imagenes  # noqa: E402
+from services import almacenamiento  # noqa: E402
+from bench.generar_zip import generar_zip, leer_manifest  # noqa: E402
+from bench.resultados import guardar_resultado, cargar_resultado, ultimo_resultado, comparar, hay_regresion  # noqa: E402
+
+CLAVES_COMPARACION = {
+    "etapas.unzip.imagenes_por_seg": "mayor",
+    "etapas.decode.imagenes_por_seg": "mayor",
+    "etapas.upload.imagenes_por_seg": "mayor",
+    "leer_qr_zip.imagenes_por_seg": "mayor",
+    "deteccion.tasa": "mayor",
+    "rss_pico_mb": "menor",
+}
+
+
+# ----------------------------
+# WORKER STUB (reemplaza al Worker R2)
+# ----------------------------
+class _WorkerStub(BaseHTTPRequestHandler):
+    contador = 0
+    lock = threading.Lock()
+
+    def do_POST(self):
+        largo = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(largo)
+        with _WorkerStub.lock:
+            _WorkerStub.contador += 1
+            n = _WorkerStub.contador
+        body = json.dumps({"key": f"bench/{n}.jpg"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _levantar_worker_stub() -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _WorkerStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ----------------------------
+# MEDICIONES
+# ----------------------------
+def _rss_pico_mb() -> float:
+    # Linux: ru_maxrss en KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _etapa(n: int, segundos: float, bytes_total: int = 0) -> dict:
+    return {
+        "imagenes": n,
+        "segundos": round(segundos, 4),
+        "imagenes_por_seg": round(n / segundos, 3) if segundos else None,
+        "mb_por_seg": round(bytes_total / 1_000_000 / segundos, 3) if segundos and bytes_total else None,
+        "rss_pico_mb": round(_rss_pico_mb(), 1),
+    }
+
+
+def medir_etapas(zip_path: Path, manifest: dict) -> tuple[dict, dict]:
+    with zipfile.ZipFile(zip_path) as zf:
+        infos = [i for i in zf.infolist() if not i.is_dir() and imagenes._is_allowed(i.filename)]
+
+        t0 = time.perf_counter()
+        datos = [(i.filename, zf.read(i)) for i in infos]
+        t_unzip = time.perf_counter() - t0
+    bytes_total = sum(len(b) for _, b in datos)
+
+    aciertos = falsos_positivos = con_qr = 0
+    t0 = time.perf_counter()
+    for nombre, img_bytes in datos:
+        qrs = imagenes._decode_qr_from_bytes(img_bytes)
+        esperado = manifest.get(nombre)
+        if esperado:
+            con_qr += 1
+            aciertos += int(esperado in qrs)
+        elif qrs:
+            falsos_positivos += 1
+    t_decode = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for nombre, img_bytes in datos:
+        imagenes.upload_to_worker(nombre.replace("/", "_"), img_bytes, folder="bench")
+    t_upload = time.perf_counter() - t0
+
+    etapas = {
+        "unzip": _etapa(len(datos), t_unzip, bytes_total),
+        "decode": _etapa(len(datos), t_decode, bytes_total),
+        "upload": _etapa(len(datos), t_upload, bytes_total),
+    }
+    deteccion = {
+        "imagenes_con_qr": con_qr,
+        "detectadas": aciertos,
+        "tasa": round(aciertos / con_qr, 4) if con_qr else None,
+        "falsos_positivos": falsos_positivos,
+    }
+    return etapas, deteccion
+
+
+def medir_leer_qr_zip(zip_path: Path) -> dict:
+    with zip_path.open("rb") as f:
+        upload = UploadFile(file=f, filename=zip_path.name)
+        t0 = time.perf_counter()
+        res = asyncio.run(imagenes.leer_qr_zip(file=upload, revision_id=0))
+        segundos = time.perf_counter() - t0
+    r = _etapa(res["imagenes_leidas"], segundos, zip_path.stat().st_size)
+    r["imagenes_con_error"] = res["imagenes_con_error"]
+    return r
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline QR")
+    parser.add_argument("--zip", help="ZIP existente (si no, se genera uno sintético)")
+    parser.add_argument("--con-qr", type=int, default=40)
+    parser.add_argument("--sin-qr", type=int, default=10)
+    parser.add_argument("--mp-min", type=float, default=4.0)
+    parser.add_argument("--mp-max", type=float, default=12.0)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--comparar-con", help="JSON de una corrida previa (por defecto, la última)")
+    parser.add_argument("--umbral", type=float, default=0.10, help="Regresión tolerada (0.10 = 10%%)")
+    parser.add_argument("--no-guardar", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.zip:
+            zip_path = Path(args.zip)
+            try:
+                manifest = leer_manifest(zip_path)
+            except KeyError:
+                manifest = {}
+        else:
+            zip_path = Path(tmp) / "bench.zip"
+            print(f"Generando ZIP sintético ({args.con_qr} con QR, {args.sin_qr} sin QR)...")
+            manifest = generar_zip(zip_path, args.con_qr, args.sin_qr, args.mp_min, args.mp_max, args.semilla)
+
+        server = _levantar_worker_stub()
+        os.environ["WORKER_UPLOAD_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+        almacenamiento.ALMACEN_QR = "worker"
+        almacenamiento.obtener_almacen.cache_clear()
+        try:
+            etapas, deteccion = medir_etapas(zip_path, manifest)
+            flujo = medir_leer_qr_zip(zip_path)
+        finally:
+            server.shutdown()
+
+        resultado = {
+            "parametros": {
+                "zip": str(args.zip or "sintetico"),
+                "zip_mb": round(zip_path.stat().st_size / 1_000_000, 2),
+                "con_qr": args.con_qr, "sin_qr": args.sin_qr,
+                "mp_min": args.mp_min, "mp_max": args.mp_max, "semilla": args.semilla,
+            },
+            "etapas": etapas,
+            "leer_qr_zip": flujo,
+            "deteccion": deteccion,
+            "rss_pico_mb": round(_rss_pico_mb(), 1),
+        }
+
+    print(json.dumps(resultado, indent=2, ensure_ascii=False))
+
+    guardado = None
+    if not args.no_guardar:
+        guardado = guardar_resultado("qr", resultado)
+        print(f"Resultado guardado en {guardado}")
+
+    anterior = cargar_resultado(args.comparar_con) if args.comparar_con else ultimo_resultado("qr", excluir=guardado)
+    if anterior:
+        lineas = comparar(anterior, resultado, CLAVES_COMPARACION, args.umbral)
+        print("\n".join(lineas))
+        if hay_regresion(lineas):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
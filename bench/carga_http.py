@@ -0,0 +1,231 @@
+# bench/carga_http.py
+"""
+Generador de carga HTTP asíncrono para los endpoints CRUD.
+
+Lanza N clientes concurrentes (lazo cerrado) contra una instancia levantada
+(uvicorn main:app ...) con una mezcla realista de listados, detalles y altas
+sobre /fincas, /sectores, /revisiones y /trabajadores. Reporta throughput y
+percentiles de latencia por operación, guarda el resultado en bench/resultados/
+y lo compara con la corrida anterior (o con --comparar-con).
+
+Uso:
+    API_KEY=... python bench/carga_http.py --base-url http://127.0.0.1:8000 \\
+        --concurrencia 200 --duracion 60
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench.resultados import guardar_resultado, cargar_resultado, ultimo_resultado, comparar, hay_regresion  # noqa: E402
+
+# Pesos relativos de cada operación (lecturas dominan, como en la app de campo)
+MEZCLAS = {
+    "lectura": {
+        "listar_fincas": 10, "listar_sectores": 15, "listar_revisiones": 20,
+        "listar_revisiones_profundo": 5, "listar_trabajadores": 10,
+        "detalle_finca": 10, "detalle_sector": 10, "detalle_revision": 15, "detalle_trabajador": 5,
+    },
+    "mixta": {
+        "listar_fincas": 8, "listar_sectores": 12, "listar_revisiones": 18,
+        "listar_revisiones_profundo": 4, "listar_trabajadores": 8,
+        "detalle_finca": 8, "detalle_sector": 8, "detalle_revision": 14, "detalle_trabajador": 5,
+        "crear_revision": 10, "crear_trabajador": 5,
+    },
+}
+
+
+class Ids:
+    """IDs existentes descubiertos al inicio (para detalles y altas)."""
+
+    def __init__(self):
+        self.fincas: list[int] = []
+        self.sectores: list[int] = []
+        self.revisiones: list[int] = []
+        self.trabajadores: list[int] = []
+        self.tipos_revision: list[str] = []
+
+
+async def descubrir(client: httpx.AsyncClient) -> Ids:
+    ids = Ids()
+    ids.fincas = [f["id"] for f in (await client.get("/fincas", params={"limit": 200})).json()]
+    ids.sectores = [s["id"] for s in (await client.get("/sectores", params={"limit": 1000})).json()]
+    ids.revisiones = [r["id"] for r in (await client.get("/revisiones", params={"limit": 1000})).json()]
+    ids.trabajadores = [t["id"] for t in (await client.get("/trabajadores", params={"limit": 1000})).json()]
+    ids.tipos_revision = [i["value"] for i in (await client.get("/catalogos/tipos-revision")).json()["items"]]
+    if not ids.fincas or not ids.sectores:
+        raise SystemExit("No hay datos: sembrar primero con bench/seed_datos.py")
+    return ids
+
+
+def construir_request(op: str, ids: Ids, rng: random.Random, secuencia: int) -> tuple[str, str, dict]:
+    """Devuelve (método, path, kwargs para httpx)."""
+    if op == "listar_fincas":
+        return "GET", "/fincas", {"params": {"limit": 50}}
+    if op == "listar_sectores":
+        return "GET", "/sectores", {"params": {"finca_id": rng.choice(ids.fincas), "limit": 50}}
+    if op == "listar_revisiones":
+        return "GET", "/revisiones", {"params": {"sector_id": rng.choice(ids.sectores), "limit": 50}}
+    if op == "listar_revisiones_profundo":
+        return "GET", "/revisiones", {"params": {"skip": rng.randint(1_000, 50_000), "limit": 50}}
+    if op == "listar_trabajadores":
+        return "GET", "/trabajadores", {"params": {"skip": rng.randint(0, 200), "limit": 50}}
+    if op == "detalle_finca":
+        return "GET", f"/fincas/{rng.choice(ids.fincas)}", {}
+    if op == "detalle_sector":
+        return "GET", f"/sectores/{rng.choice(ids.sectores)}", {}
+    if op == "detalle_revision" and ids.revisiones:
+        return "GET", f"/revisiones/{rng.choice(ids.revisiones)}", {}
+    if op == "detalle_trabajador" and ids.trabajadores:
+        return "GET", f"/trabajadores/{rng.choice(ids.trabajadores)}", {}
+    if op == "crear_revision":
+        return "POST", "/revisiones", {"json": {
+            "sector_id": rng.choice(ids.sectores),
+            "fecha_revision": time.strftime("%Y-%m-%d"),
+            "tipo": rng.choice(ids.tipos_revision),
+            "observaciones": "carga sintética",
+        }}
+    if op == "crear_trabajador":
+        return "POST", "/trabajadores", {"json": {
+            "nombre": "Carga",
+            "apellido": f"Bench {secuencia}",
+            "dni": f"L{int(time.time()) % 10**7:07d}{secuencia:08d}",
+            "puesto": "bench",
+        }}
+    return "GET", "/fincas", {"params": {"limit": 50}}
+
+
+def percentil(valores: list[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    idx = min(len(ordenados) - 1, max(0, round(p / 100 * (len(ordenados) - 1))))
+    return ordenados[idx]
+
+
+def resumir(latencias: list[float], errores: int, segundos: float) -> dict:
+    ms = [x * 1000 for x in latencias]
+    return {
+        "requests": len(latencias),
+        "errores": errores,
+        "rps": round(len(latencias) / segundos, 2) if segundos else 0,
+        "p50_ms": round(percentil(ms, 50), 2),
+        "p90_ms": round(percentil(ms, 90), 2),
+        "p95_ms": round(percentil(ms, 95), 2),
+        "p99_ms": round(percentil(ms, 99), 2),
+        "max_ms": round(max(ms), 2) if ms else 0,
+    }
+
+
+async def correr(args) -> dict:
+    mezcla = MEZCLAS[args.mezcla]
+    ops, pesos = list(mezcla), list(mezcla.values())
+
+    limites = httpx.Limits(max_connections=args.concurrencia, max_keepalive_connections=args.concurrencia)
+    headers = {"X-Api-Key": args.api_key} if args.api_key else {}
+    async with httpx.AsyncClient(base_url=args.base_url, headers=headers, limits=limites, timeout=args.timeout) as client:
+        ids = await descubrir(client)
+
+        latencias: dict[str, list[float]] = {op: [] for op in ops}
+        errores: dict[str, int] = {op: 0 for op in ops}
+        secuencia = 0
+        medir = False
+
+        async def cliente(n: int, fin: float):
+            nonlocal secuencia
+            rng = random.Random(args.semilla * 100_003 + n)
+            while time.perf_counter() < fin:
+                op = rng.choices(ops, pesos)[0]
+                secuencia += 1
+                metodo, path, kwargs = construir_request(op, ids, rng, secuencia)
+                t0 = time.perf_counter()
+                try:
+                    r = await client.request(metodo, path, **kwargs)
+                    ok = r.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                dt = time.perf_counter() - t0
+                if medir:
+                    latencias[op].append(dt)
+                    if not ok:
+                        errores[op] += 1
+                if args.pausa_ms:
+                    await asyncio.sleep(rng.uniform(0, 2 * args.pausa_ms) / 1000)
+
+        if args.calentamiento:
+            fin = time.perf_counter() + args.calentamiento
+            await asyncio.gather(*(cliente(n, fin) for n in range(args.concurrencia)))
+
+        medir = True
+        inicio = time.perf_counter()
+        fin = inicio + args.duracion
+        await asyncio.gather(*(cliente(n, fin) for n in range(args.concurrencia)))
+        segundos = time.perf_counter() - inicio
+
+    todas = [x for v in latencias.values() for x in v]
+    return {
+        "parametros": {
+            "base_url": args.base_url, "mezcla": args.mezcla, "concurrencia": args.concurrencia,
+            "duracion": args.duracion, "calentamiento": args.calentamiento, "semilla": args.semilla,
+        },
+        "total": resumir(todas, sum(errores.values()), segundos),
+        "operaciones": {op: resumir(latencias[op], errores[op], segundos) for op in ops if latencias[op]},
+    }
+
+
+def claves_comparacion(resultado: dict) -> dict[str, str]:
+    claves = {"total.rps": "mayor", "total.p50_ms": "menor", "total.p95_ms": "menor", "total.p99_ms": "menor"}
+    for op in resultado["operaciones"]:
+        claves[f"operaciones.{op}.p95_ms"] = "menor"
+    return claves
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga HTTP de los endpoints CRUD")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--api-key", default=os.getenv("API_KEY"))
+    parser.add_argument("--mezcla", choices=sorted(MEZCLAS), default="mixta")
+    parser.add_argument("--concurrencia", type=int, default=100)
+    parser.add_argument("--duracion", type=float, default=30, help="Segundos medidos")
+    parser.add_argument("--calentamiento", type=float, default=5, help="Segundos sin medir al inicio")
+    parser.add_argument("--pausa-ms", type=float, default=0, help="Pausa media entre requests por cliente")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--comparar-con", help="JSON de una corrida previa (por defecto, la última)")
+    parser.add_argument("--umbral", type=float, default=0.10, help="Regresión tolerada (0.10 = 10%%)")
+    parser.add_argument("--no-guardar", action="store_true")
+    args = parser.parse_args()
+
+    resultado = asyncio.run(correr(args))
+
+    t = resultado["total"]
+    print(f"\n{'operación':<28}{'req':>8}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for op, r in [("TOTAL", t)] + sorted(resultado["operaciones"].items()):
+        print(f"{op:<28}{r['requests']:>8}{r['errores']:>6}{r['rps']:>9.1f}"
+              f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['max_ms']:>9.1f}")
+
+    guardado = None
+    if not args.no_guardar:
+        guardado = guardar_resultado("carga", resultado)
+        print(f"\nResultado guardado en {guardado}")
+    else:
+        print(json.dumps(resultado, indent=2))
+
+    anterior = cargar_resultado(args.comparar_con) if args.comparar_con else ultimo_resultado("carga", excluir=guardado)
+    if anterior:
+        lineas = comparar(anterior, resultado, claves_comparacion(resultado), args.umbral)
+        print("\n".join(lineas))
+        if hay_regresion(lineas):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
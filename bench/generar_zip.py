@@ -0,0 +1,125 @@
+# bench/generar_zip.py
+"""
+Generador de ZIPs sintéticos para el pipeline QR.
+
+Fotos de 4–12 MP con un QR (renderizado con zxingcpp) pegado, rotado,
+desenfocado y con ruido, más fotos sin código. El ZIP incluye un
+manifest.json con el texto esperado de cada imagen (None = sin QR), que
+leer_qr_zip omite por extensión.
+
+Uso:
+    python bench/generar_zip.py salida.zip --con-qr 40 --sin-qr 10
+"""
+import argparse
+import io
+import json
+import math
+import random
+import zipfile
+from pathlib import Path
+
+import cv2
+import numpy as np
+import zxingcpp
+
+
+def _fondo(rng: np.random.Generator, ancho: int, alto: int) -> np.ndarray:
+    # Textura suave (simula follaje/suelo) + ruido fino del sensor
+    base = rng.integers(40, 200, size=(max(2, alto // 64), max(2, ancho // 64), 3), dtype=np.uint8)
+    img = cv2.resize(base, (ancho, alto), interpolation=cv2.INTER_CUBIC)
+    ruido = rng.normal(0, 8, size=(alto, ancho, 1)).astype(np.int16)
+    return np.clip(img.astype(np.int16) + ruido, 0, 255).astype(np.uint8)
+
+
+def _qr(texto: str, lado: int, angulo: float) -> tuple[np.ndarray, np.ndarray]:
+    bmp = np.array(zxingcpp.write_barcode(zxingcpp.BarcodeFormat.QRCode, texto, lado, lado, quiet_zone=4))
+    qr = cv2.cvtColor(bmp, cv2.COLOR_GRAY2BGR)
+    h, w = qr.shape[:2]
+    m = cv2.getRotationMatrix2D((w / 2, h / 2), angulo, 1.0)
+    cos, sin = abs(m[0, 0]), abs(m[0, 1])
+    nw, nh = int(h * sin + w * cos), int(h * cos + w * sin)
+    m[0, 2] += nw / 2 - w / 2
+    m[1, 2] += nh / 2 - h / 2
+    rotado = cv2.warpAffine(qr, m, (nw, nh), flags=cv2.INTER_LINEAR, borderValue=(0, 0, 0))
+    mascara = cv2.warpAffine(np.full((h, w), 255, np.uint8), m, (nw, nh), flags=cv2.INTER_NEAREST)
+    return rotado, mascara
+
+
+def generar_foto(
+    rng: np.random.Generator,
+    megapixeles: float,
+    texto: str | None,
+    calidad: int = 90,
+) -> bytes:
+    ancho = int(math.sqrt(megapixeles * 1_000_000 * 4 / 3))
+    alto = int(ancho * 3 / 4)
+    img = _fondo(rng, ancho, alto)
+
+    if texto is not None:
+        lado = int(ancho * rng.uniform(0.08, 0.20))
+        qr, mascara = _qr(texto, lado, float(rng.uniform(-35, 35)))
+        qh, qw = qr.shape[:2]
+        y = int(rng.integers(0, max(1, alto - qh)))
+        x = int(rng.integers(0, max(1, ancho - qw)))
+        zona = img[y:y + qh, x:x + qw]
+        zona[mascara > 0] = qr[mascara > 0]
+
+    sigma = float(rng.uniform(0.0, 2.0))
+    if sigma > 0.3:
+        img = cv2.GaussianBlur(img, (0, 0), sigma)
+    ruido = rng.normal(0, rng.uniform(2, 10), size=img.shape).astype(np.int16)
+    img = np.clip(img.astype(np.int16) + ruido, 0, 255).astype(np.uint8)
+
+    ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, calidad])
+    if not ok:
+        raise RuntimeError("No se pudo codificar la imagen")
+    return buf.tobytes()
+
+
+def generar_zip(
+    destino: str | Path,
+    con_qr: int = 40,
+    sin_qr: int = 10,
+    mp_min: float = 4.0,
+    mp_max: float = 12.0,
+    semilla: int = 0,
+    calidad: int = 90,
+) -> dict[str, str | None]:
+    """
+    Escribe el ZIP en `destino` y devuelve el manifest {archivo: texto_qr | None}.
+    Las fotos van con compresión STORED, como las sube el teléfono.
+    """
+    rng = np.random.default_rng(semilla)
+    orden = [True] * con_qr + [False] * sin_qr
+    random.Random(semilla).shuffle(orden)
+
+    manifest: dict[str, str | None] = {}
+    with zipfile.ZipFile(destino, "w", compression=zipfile.ZIP_STORED) as zf:
+        for idx, tiene_qr in enumerate(orden, start=1):
+            nombre = f"DCIM/IMG_{idx:05d}.jpg"
+            texto = f"COLIBRI-P{idx:06d}" if tiene_qr else None
+            mp = float(rng.uniform(mp_min, mp_max))
+            zf.writestr(nombre, generar_foto(rng, mp, texto, calidad))
+            manifest[nombre] = texto
+        zf.writestr("manifest.json", json.dumps(manifest, indent=2))
+    return manifest
+
+
+def leer_manifest(zip_path: str | Path) -> dict[str, str | None]:
+    with zipfile.ZipFile(zip_path) as zf:
+        return json.load(io.BytesIO(zf.read("manifest.json")))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera un ZIP sintético de fotos con/sin QR")
+    parser.add_argument("destino")
+    parser.add_argument("--con-qr", type=int, default=40)
+    parser.add_argument("--sin-qr", type=int, default=10)
+    parser.add_argument("--mp-min", type=float, default=4.0)
+    parser.add_argument("--mp-max", type=float, default=12.0)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--calidad", type=int, default=90)
+    args = parser.parse_args()
+
+    m = generar_zip(args.destino, args.con_qr, args.sin_qr, args.mp_min, args.mp_max, args.semilla, args.calidad)
+    print(f"{args.destino}: {len(m)} imágenes ({sum(1 for v in m.values() if v)} con QR)")
@@ -0,0 +1,91 @@
+# bench/resultados.py
+"""
+Guardado y comparación de resultados de benchmarks.
+
+Cada corrida se guarda como JSON en bench/resultados/<nombre>_<fecha>_<commit>.json
+para poder comparar entre commits.
+"""
+import json
+import subprocess
+from datetime import datetime
+from pathlib import Path
+
+RESULTADOS_DIR = Path(__file__).resolve().parent / "resultados"
+
+
+def commit_actual() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, timeout=10,
+            cwd=Path(__file__).resolve().parent,
+        )
+        sha = out.stdout.strip()
+        if not sha:
+            return "desconocido"
+        sucio = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True, text=True, timeout=10,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+        return f"{sha}-sucio" if sucio else sha
+    except Exception:
+        return "desconocido"
+
+
+def guardar_resultado(nombre: str, datos: dict) -> Path:
+    RESULTADOS_DIR.mkdir(parents=True, exist_ok=True)
+    commit = commit_actual()
+    fecha = datetime.now().strftime("%Y%m%d-%H%M%S")
+    datos = {"benchmark": nombre, "commit": commit, "fecha": fecha, **datos}
+    path = RESULTADOS_DIR / f"{nombre}_{fecha}_{commit}.json"
+    path.write_text(json.dumps(datos, indent=2, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def cargar_resultado(path: str | Path) -> dict:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def ultimo_resultado(nombre: str, excluir: Path | None = None) -> dict | None:
+    if not RESULTADOS_DIR.exists():
+        return None
+    candidatos = sorted(RESULTADOS_DIR.glob(f"{nombre}_*.json"))
+    candidatos = [p for p in candidatos if excluir is None or p.resolve() != Path(excluir).resolve()]
+    if not candidatos:
+        return None
+    return cargar_resultado(candidatos[-1])
+
+
+def _valor(datos: dict, clave: str):
+    actual = datos
+    for parte in clave.split("."):
+        if not isinstance(actual, dict) or parte not in actual:
+            return None
+        actual = actual[parte]
+    return actual
+
+
+def comparar(anterior: dict, actual: dict, claves: dict[str, str], umbral: float = 0.10) -> list[str]:
+    """
+    claves: {"ruta.a.la.metrica": "mayor" | "menor"} indicando qué dirección es mejor.
+    Devuelve líneas de reporte; las regresiones mayores a `umbral` se marcan con "REGRESIÓN".
+    """
+    lineas = [f"Comparando contra {anterior.get('commit')} ({anterior.get('fecha')})"]
+    for clave, mejor in claves.items():
+        a = _valor(anterior, clave)
+        b = _valor(actual, clave)
+        if not isinstance(a, (int, float)) or not isinstance(b, (int, float)):
+            continue
+        if a == 0:
+            delta = 0.0 if b == 0 else float("inf")
+        else:
+            delta = (b - a) / abs(a)
+        empeora = delta < -umbral if mejor == "mayor" else delta > umbral
+        marca = "  REGRESIÓN" if empeora else ""
+        lineas.append(f"  {clave:<45} {a:>12.4g} -> {b:>12.4g} ({delta:+.1%}){marca}")
+    return lineas
+
+
+def hay_regresion(lineas: list[str]) -> bool:
+    return any(l.endswith("REGRESIÓN") for l in lineas)
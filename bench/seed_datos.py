@@ -0,0 +1,198 @@
+# bench/seed_datos.py
+"""
+Carga datos sintéticos en Postgres a escala configurable para pruebas de carga.
+
+Todo se genera del lado del servidor con generate_series (sin pasar filas por
+Python), así millones de planta / revision_unitaria cargan en segundos.
+Las fincas sembradas se llaman "bench-<n>" y los trabajadores tienen
+puesto = 'bench', de modo que --limpiar las borra (ON DELETE CASCADE) sin tocar
+datos reales.
+
+Uso:
+    DATABASE_URL=postgresql://... python bench/seed_datos.py --fincas 20 --sectores-por-finca 10 \\
+        --plantas-por-sector 5000 --revisiones-por-sector 24 --unidades-por-revision 500
+    DATABASE_URL=postgresql://... python bench/seed_datos.py --limpiar
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import text  # noqa: E402
+
+from database import engine, Base  # noqa: E402
+import models  # noqa: E402,F401  (registra las tablas en Base.metadata)
+
+PREFIJO = "bench-"
+MIGRACIONES = Path(__file__).resolve().parent.parent / "migraciones"
+
+PASOS = [
+    ("finca", """
+        INSERT INTO finca (nombre, ubicacion, tamano_hectareas)
+        SELECT :prefijo || g, 'Ubicación sintética ' || g, round((10 + random() * 190)::numeric, 2)
+        FROM generate_series(1, :fincas) g
+    """),
+    ("sector", """
+        INSERT INTO sector (finca_id, nombre, descripcion, area_hectareas)
+        SELECT f.id, 'Sector ' || s, 'Sector sintético', round((1 + random() * 20)::numeric, 2)
+        FROM finca f
+        CROSS JOIN generate_series(1, :sectores_por_finca) s
+        WHERE f.nombre LIKE :prefijo || '%'
+    """),
+    ("planta", """
+        INSERT INTO planta (sector_id, numero, estado, patron, yema, observaciones, fecha_plantacion,
+                            fila, columna, lat, lon)
+        SELECT
+            s.id,
+            g,
+            (enum_range(NULL::estado_planta))[1 + floor(random() * 5)::int],
+            (ARRAY['Zutano', 'Topa Topa', 'Mexicola', 'Duke 7'])[1 + floor(random() * 4)::int],
+            (ARRAY['Hass', 'Fuerte', 'Lamb Hass', 'Zutano'])[1 + floor(random() * 4)::int],
+            CASE WHEN random() < 0.2 THEN 'Observación sintética de planta ' || g END,
+            current_date - (floor(random() * 3650)::int),
+            -- 100 plantas por fila, marco de 4 x 6 m; un sector cada ~1 km
+            (g - 1) / 100,
+            mod(g - 1, 100),
+            -32.8 - s.id * 0.01 + ((g - 1) / 100) * 0.000036,
+            -71.2 + mod(g - 1, 100) * 0.000064
+        FROM sector s
+        JOIN finca f ON f.id = s.finca_id
+        CROSS JOIN generate_series(1, :plantas_por_sector) g
+        WHERE f.nombre LIKE :prefijo || '%'
+    """),
+    ("trabajador", """
+        INSERT INTO trabajador (nombre, apellido, dni, puesto, activo)
+        SELECT 'Trabajador', 'Bench ' || g, 'B' || lpad(g::text, 9, '0'), 'bench', random() < 0.9
+        FROM generate_series(1, :trabajadores) g
+        ON CONFLICT (dni) DO NOTHING
+    """),
+    # El alta de revisiones no crea particiones (migraciones/016): se crean antes
+    # las de todas las revisiones a sembrar
+    ("particiones", """
+        SELECT particiones_asegurar((
+            (SELECT count(*) FROM sector s JOIN finca f ON f.id = s.finca_id
+             WHERE f.nombre LIKE :prefijo || '%') * :revisiones_por_sector
+            / (SELECT tamano FROM particion_revisiones) + 2
+        )::int)
+    """),
+    ("revision", """
+        INSERT INTO revision (sector_id, fecha_revision, tipo, observaciones)
+        SELECT
+            s.id,
+            current_date - (g * 7),
+            (enum_range(NULL::tipo_revision))[1 + floor(random() * 8)::int],
+            CASE WHEN random() < 0.3 THEN 'Revisión sintética ' || g END
+        FROM sector s
+        JOIN finca f ON f.id = s.finca_id
+        CROSS JOIN generate_series(1, :revisiones_por_sector) g
+        WHERE f.nombre LIKE :prefijo || '%'
+    """),
+    ("revision_unitaria", """
+        INSERT INTO revision_unitaria (revision_id, arbol_numero, estado, planta_id, calificacion, observaciones)
+        SELECT
+            r.id,
+            p.numero,
+            (enum_range(NULL::estado_arbol))[1 + floor(random() * 4)::int],
+            p.id,
+            round((random() * 5)::numeric, 2),
+            CASE WHEN random() < 0.05 THEN 'Nota sintética' END
+        FROM revision r
+        JOIN sector s ON s.id = r.sector_id
+        JOIN finca f ON f.id = s.finca_id
+        JOIN planta p ON p.sector_id = r.sector_id AND p.numero <= :unidades_por_revision
+        WHERE f.nombre LIKE :prefijo || '%'
+    """),
+    ("revision_trabajador", """
+        INSERT INTO revision_trabajador (revision_id, trabajador_id)
+        SELECT DISTINCT r.id, t.id
+        FROM revision r
+        JOIN sector s ON s.id = r.sector_id
+        JOIN finca f ON f.id = s.finca_id
+        CROSS JOIN LATERAL (
+            SELECT id FROM trabajador
+            WHERE puesto = 'bench'
+            ORDER BY random() + r.id * 0
+            LIMIT :trabajadores_por_revision
+        ) t
+        WHERE f.nombre LIKE :prefijo || '%'
+        ON CONFLICT DO NOTHING
+    """),
+]
+
+LIMPIEZA = [
+    "DELETE FROM finca WHERE nombre LIKE :prefijo || '%'",
+    "DELETE FROM trabajador WHERE puesto = 'bench'",
+]
+
+
+def sembrar(params: dict) -> dict:
+    tiempos = {}
+    for tabla, sql in PASOS:
+        t0 = time.perf_counter()
+        with engine.begin() as conn:
+            filas = conn.execute(text(sql), params).rowcount
+        tiempos[tabla] = round(time.perf_counter() - t0, 2)
+        print(f"  {tabla:<22} {filas:>12,} filas  {tiempos[tabla]:>8.2f}s")
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+    return tiempos
+
+
+def crear_esquema_sql() -> None:
+    # Triggers, funciones y particiones (013) no salen de create_all
+    for archivo in sorted(MIGRACIONES.glob("*.sql")):
+        with engine.begin() as conn:
+            conn.exec_driver_sql(archivo.read_text(encoding="utf-8"))
+        print(f"  {archivo.name}")
+
+
+def limpiar(prefijo: str) -> None:
+    with engine.begin() as conn:
+        for sql in LIMPIEZA:
+            filas = conn.execute(text(sql), {"prefijo": prefijo}).rowcount
+            print(f"  {sql.split()[2]:<22} {filas:>12,} filas borradas (más cascadas)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Siembra datos sintéticos a escala en Postgres")
+    parser.add_argument("--fincas", type=int, default=10)
+    parser.add_argument("--sectores-por-finca", type=int, default=10)
+    parser.add_argument("--plantas-por-sector", type=int, default=2000)
+    parser.add_argument("--revisiones-por-sector", type=int, default=24)
+    parser.add_argument("--unidades-por-revision", type=int, default=500)
+    parser.add_argument("--trabajadores", type=int, default=300)
+    parser.add_argument("--trabajadores-por-revision", type=int, default=3)
+    parser.add_argument("--crear-esquema", action="store_true", help="Crea las tablas desde models.py y aplica migraciones/")
+    parser.add_argument("--limpiar", action="store_true", help="Borra los datos sembrados y sale")
+    args = parser.parse_args()
+
+    if args.crear_esquema:
+        Base.metadata.create_all(engine)
+        crear_esquema_sql()
+
+    if args.limpiar:
+        limpiar(PREFIJO)
+        sys.exit(0)
+
+    params = {
+        "prefijo": PREFIJO,
+        "fincas": args.fincas,
+        "sectores_por_finca": args.sectores_por_finca,
+        "plantas_por_sector": args.plantas_por_sector,
+        "revisiones_por_sector": args.revisiones_por_sector,
+        "unidades_por_revision": args.unidades_por_revision,
+        "trabajadores": args.trabajadores,
+        "trabajadores_por_revision": args.trabajadores_por_revision,
+    }
+    total_plantas = args.fincas * args.sectores_por_finca * args.plantas_por_sector
+    total_unidades = (
+        args.fincas * args.sectores_por_finca * args.revisiones_por_sector
+        * min(args.unidades_por_revision, args.plantas_por_sector)
+    )
+    print(f"Sembrando ~{total_plantas:,} plantas y ~{total_unidades:,} revisiones unitarias...")
+    t0 = time.perf_counter()
+    sembrar(params)
+    print(f"Listo en {time.perf_counter() - t0:.1f}s")
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from crud_busqueda import buscar_trabajadores, buscar_plantas, buscar_revisiones
+
+router = APIRouter(prefix="/buscar", tags=["Buscar"])
+
+ENTIDADES = ("trabajadores", "plantas", "revisiones")
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@router.get("", response_model=dict)
+def buscar(
+    q: str = Query(..., min_length=2, max_length=100),
+    entidad: str | None = Query(default=None),
+    sector_id: int | None = Query(default=None),
+    activo: bool | None = Query(default=None),
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """
+    Búsqueda difusa ordenada por relevancia: trabajadores (nombre, apellido,
+    DNI), plantas (patrón, yema, observaciones) y revisiones (observaciones).
+    Sin `entidad` busca en las tres; skip/limit paginan cada lista.
+    """
+    if entidad is not None and entidad not in ENTIDADES:
+        raise HTTPException(status_code=400, detail=f"entidad inválida. Debe ser una de: {list(ENTIDADES)}")
+
+    q = q.strip()
+    resultado = {"q": q, "skip": skip, "limit": limit}
+    if entidad in (None, "trabajadores"):
+        resultado["trabajadores"] = buscar_trabajadores(db, q, activo=activo, skip=skip, limit=limit)
+    if entidad in (None, "plantas"):
+        resultado["plantas"] = buscar_plantas(db, q, sector_id=sector_id, skip=skip, limit=limit)
+    if entidad in (None, "revisiones"):
+        resultado["revisiones"] = buscar_revisiones(db, q, sector_id=sector_id, skip=skip, limit=limit)
+    return resultado
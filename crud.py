@@ -1,14 +1,18 @@
+from functools import lru_cache
+
 from sqlalchemy.orm import Session
 from passlib.context import CryptContext
 
 from models import Usuario
 from schemas import UsuarioCreate
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+@lru_cache(maxsize=1)
+def pwd_context() -> CryptContext:
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def _hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
 
 
 def crear_usuario(db: Session, usuario: UsuarioCreate) -> Usuario:
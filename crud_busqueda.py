@@ -0,0 +1,101 @@
+# crud_busqueda.py
+import os
+
+from sqlalchemy import select, or_, func, cast, String, literal, literal_column, text
+from sqlalchemy.orm import Session
+
+from models import Trabajador, Planta, Revision
+
+# Las expresiones repiten exactamente las de migraciones/005_busqueda.sql:
+# si no coinciden, Postgres no usa los índices
+ESPANOL = literal_column("'spanish'")
+VACIO = literal_column("''")
+
+# Parecido mínimo por trigramas (pg_trgm.word_similarity_threshold, por defecto 0.6)
+BUSQUEDA_UMBRAL = float(os.getenv("BUSQUEDA_UMBRAL", "0.4"))
+
+_SIN_TILDES = str.maketrans("áéíóúüñàèìòù", "aeiouunaeiou")
+
+
+def _normalizar(q: str) -> str:
+    # Igual que colibri_texto_busqueda(); se hace acá para que la consulta y el
+    # patrón del LIKE lleguen como constantes y Postgres use el índice
+    return q.lower().translate(_SIN_TILDES)
+
+
+def _texto(*columnas):
+    return func.colibri_texto_busqueda(*columnas)
+
+
+def _tsvector(columna):
+    return func.to_tsvector(ESPANOL, func.coalesce(columna, VACIO))
+
+
+def _coincide_trgm(consulta: str, texto):
+    # Parecido por trigramas (tolera errores de tipeo) o contiene el texto tal cual (ej. parte del DNI)
+    patron = "%" + consulta.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return or_(literal(consulta).op("<%")(texto), texto.like(patron))
+
+
+def _ejecutar(db: Session, stmt) -> list[dict]:
+    # Umbral solo para esta transacción
+    db.execute(text("SELECT set_config('pg_trgm.word_similarity_threshold', :u, true)"), {"u": str(BUSQUEDA_UMBRAL)})
+    return [
+        {**r._mapping, "rank": round(float(r.rank), 4)}
+        for r in db.execute(stmt).all()
+    ]
+
+
+def buscar_trabajadores(db: Session, q: str, activo: bool | None = None, skip: int = 0, limit: int = 20) -> list[dict]:
+    texto = _texto(Trabajador.nombre, Trabajador.apellido, Trabajador.dni)
+    consulta = _normalizar(q)
+    rank = func.word_similarity(consulta, texto)
+
+    stmt = (
+        select(
+            Trabajador.id, Trabajador.nombre, Trabajador.apellido, Trabajador.dni,
+            Trabajador.puesto, Trabajador.activo, rank.label("rank"),
+        )
+        .where(_coincide_trgm(consulta, texto))
+    )
+    if activo is not None:
+        stmt = stmt.where(Trabajador.activo == activo)
+    return _ejecutar(db, stmt.order_by(rank.desc(), Trabajador.id).offset(skip).limit(limit))
+
+
+def buscar_plantas(db: Session, q: str, sector_id: int | None = None, skip: int = 0, limit: int = 20) -> list[dict]:
+    texto = _texto(Planta.patron, Planta.yema)
+    consulta = _normalizar(q)
+    tsv = _tsvector(Planta.observaciones)
+    tsq = func.websearch_to_tsquery(ESPANOL, q)
+    rank = func.greatest(func.word_similarity(consulta, texto), func.ts_rank_cd(tsv, tsq))
+
+    stmt = (
+        select(
+            Planta.id, Planta.sector_id, Planta.numero, Planta.patron, Planta.yema,
+            Planta.observaciones, cast(Planta.estado, String).label("estado"), rank.label("rank"),
+        )
+        .where(or_(_coincide_trgm(consulta, texto), tsv.op("@@")(tsq)))
+    )
+    if sector_id is not None:
+        stmt = stmt.where(Planta.sector_id == sector_id)
+    return _ejecutar(db, stmt.order_by(rank.desc(), Planta.id).offset(skip).limit(limit))
+
+
+def buscar_revisiones(db: Session, q: str, sector_id: int | None = None, skip: int = 0, limit: int = 20) -> list[dict]:
+    tsv = _tsvector(Revision.observaciones)
+    tsq = func.websearch_to_tsquery(ESPANOL, q)
+    rank = func.ts_rank_cd(tsv, tsq)
+    # ts_headline es caro: Postgres lo calcula solo para las filas de la página
+    fragmento = func.ts_headline(ESPANOL, Revision.observaciones, tsq, "MaxFragments=1, MaxWords=20, MinWords=5")
+
+    stmt = (
+        select(
+            Revision.id, Revision.sector_id, Revision.fecha_revision,
+            cast(Revision.tipo, String).label("tipo"), fragmento.label("fragmento"), rank.label("rank"),
+        )
+        .where(tsv.op("@@")(tsq))
+    )
+    if sector_id is not None:
+        stmt = stmt.where(Revision.sector_id == sector_id)
+    return _ejecutar(db, stmt.order_by(rank.desc(), Revision.id.desc()).offset(skip).limit(limit))
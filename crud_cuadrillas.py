@@ -0,0 +1,112 @@
+# crud_cuadrillas.py
+from sqlalchemy import select, delete, and_, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from models import Revision, Trabajador, revision_trabajador
+
+rt = revision_trabajador
+
+
+def _validar_ids(db: Session, revision_ids: list[int], trabajador_ids: list[int]):
+    """Un SELECT por tabla; devuelve el mensaje de error si falta alguno."""
+    revs = set(db.scalars(select(Revision.id).where(Revision.id.in_(revision_ids))))
+    faltan = sorted(set(revision_ids) - revs)
+    if faltan:
+        return f"Revisiones no existen: {faltan}"
+
+    if trabajador_ids:
+        trabs = set(db.scalars(select(Trabajador.id).where(Trabajador.id.in_(trabajador_ids))))
+        faltan = sorted(set(trabajador_ids) - trabs)
+        if faltan:
+            return f"Trabajadores no existen: {faltan}"
+    return None
+
+
+def _insertar(db: Session, revision_ids: list[int], trabajador_ids: list[int]) -> int:
+    if not trabajador_ids:
+        return 0
+    # Producto revisiones x trabajadores armado en la BD: un solo INSERT
+    pares = (
+        select(Revision.id, Trabajador.id)
+        .join(Trabajador, true())
+        .where(Revision.id.in_(revision_ids), Trabajador.id.in_(trabajador_ids))
+        .order_by(Revision.id, Trabajador.id)  # orden fijo: sin deadlocks entre asignaciones
+    )
+    stmt = pg_insert(rt).from_select(["revision_id", "trabajador_id"], pares).on_conflict_do_nothing()
+    return db.execute(stmt).rowcount
+
+
+def agregar_trabajadores(db: Session, revision_ids: list[int], trabajador_ids: list[int]):
+    err = _validar_ids(db, revision_ids, trabajador_ids)
+    if err:
+        db.rollback()
+        return None, err
+
+    agregados = _insertar(db, revision_ids, trabajador_ids)
+    db.commit()
+    return {"agregados": agregados, "quitados": 0}, None
+
+
+def quitar_trabajadores(db: Session, revision_ids: list[int], trabajador_ids: list[int]):
+    quitados = db.execute(
+        delete(rt).where(rt.c.revision_id.in_(revision_ids), rt.c.trabajador_id.in_(trabajador_ids))
+    ).rowcount
+    db.commit()
+    return {"agregados": 0, "quitados": quitados}, None
+
+
+def asignar_cuadrilla(db: Session, revision_ids: list[int], trabajador_ids: list[int]):
+    """Deja exactamente `trabajador_ids` en cada revisión (lista vacía = sin cuadrilla)."""
+    err = _validar_ids(db, revision_ids, trabajador_ids)
+    if err:
+        db.rollback()
+        return None, err
+
+    sobran = rt.c.revision_id.in_(revision_ids)
+    if trabajador_ids:
+        sobran = and_(sobran, rt.c.trabajador_id.notin_(trabajador_ids))
+    quitados = db.execute(delete(rt).where(sobran)).rowcount
+    agregados = _insertar(db, revision_ids, trabajador_ids)
+    db.commit()
+    return {"agregados": agregados, "quitados": quitados}, None
+
+
+def listar_cuadrillas(
+    db: Session,
+    revision_ids: list[int] | None = None,
+    sector_id: int | None = None,
+    skip: int = 0,
+    limit: int = 50,
+) -> list[dict]:
+    """
+    Cuadrilla de cada revisión en una sola consulta: las revisiones indicadas o,
+    si no se indican, la misma página que GET /revisiones (sector_id / skip / limit).
+    """
+    if revision_ids:
+        pagina = select(Revision.id).where(Revision.id.in_(revision_ids))
+    else:
+        pagina = select(Revision.id)
+        if sector_id is not None:
+            pagina = pagina.where(Revision.sector_id == sector_id)
+        pagina = pagina.order_by(Revision.id.desc()).offset(skip).limit(limit)
+    pagina = pagina.subquery()
+
+    filas = db.execute(
+        select(
+            pagina.c.id.label("revision_id"),
+            Trabajador.id, Trabajador.nombre, Trabajador.apellido, Trabajador.puesto,
+        )
+        .select_from(pagina)
+        .outerjoin(rt, rt.c.revision_id == pagina.c.id)
+        .outerjoin(Trabajador, Trabajador.id == rt.c.trabajador_id)
+        .order_by(pagina.c.id.desc(), Trabajador.apellido, Trabajador.nombre)
+    ).all()
+
+    cuadrillas: dict[int, list[dict]] = {}
+    for revision_id, trabajador_id, nombre, apellido, puesto in filas:
+        equipo = cuadrillas.setdefault(revision_id, [])
+        if trabajador_id is not None:
+            equipo.append({"id": trabajador_id, "nombre": nombre, "apellido": apellido, "puesto": puesto})
+
+    return [{"revision_id": rid, "trabajadores": equipo} for rid, equipo in cuadrillas.items()]
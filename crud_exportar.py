@@ -0,0 +1,105 @@
+# crud_exportar.py
+import os
+from datetime import date
+from typing import Iterator
+
+from sqlalchemy import select, cast, String, and_
+from sqlalchemy.orm import Session
+
+from models import Finca, Sector, Revision, RevisionUnitaria, Planta, TipoRevision
+from particiones import rango_revisiones
+
+# Filas por lote del cursor del servidor (memoria constante por export)
+EXPORT_LOTE = int(os.getenv("EXPORT_LOTE", "5000"))
+
+# (nombre de columna, expresión, tipo para Parquet)
+# Los enums se leen como texto: se exporta el valor tal cual está en la BD
+COLUMNAS_EXPORT = [
+    ("finca_id", Finca.id, "int64"),
+    ("finca_nombre", Finca.nombre, "string"),
+    ("sector_id", Sector.id, "int64"),
+    ("sector_nombre", Sector.nombre, "string"),
+    ("revision_id", Revision.id, "int64"),
+    ("fecha_revision", Revision.fecha_revision, "date32"),
+    ("tipo_revision", cast(Revision.tipo, String), "string"),
+    ("revision_observaciones", Revision.observaciones, "string"),
+    ("revision_comentario", Revision.comentario, "string"),
+    ("unidad_id", RevisionUnitaria.id, "int64"),
+    ("arbol_numero", RevisionUnitaria.arbol_numero, "int64"),
+    ("unidad_estado", cast(RevisionUnitaria.estado, String), "string"),
+    ("calificacion", RevisionUnitaria.calificacion, "float64"),
+    ("unidad_observaciones", RevisionUnitaria.observaciones, "string"),
+    ("planta_id", Planta.id, "int64"),
+    ("planta_numero", Planta.numero, "int64"),
+    ("planta_especie", Planta.especie, "string"),
+    ("planta_estado", cast(Planta.estado, String), "string"),
+    ("planta_patron", Planta.patron, "string"),
+    ("planta_yema", Planta.yema, "string"),
+]
+
+
+def resolver_tipo_revision(tipo: str | None):
+    """Acepta el valor del enum ("Revision mensual") o su nombre ("revision_mensual")."""
+    if tipo is None:
+        return None, None
+    for e in TipoRevision:
+        if tipo in (e.value, e.name):
+            return e, None
+    return None, f"tipo inválido. Debe ser uno de: {sorted(e.value for e in TipoRevision)}"
+
+
+def consulta_exportacion(
+    finca_id: int | None = None,
+    sector_id: int | None = None,
+    desde: date | None = None,
+    hasta: date | None = None,
+    tipo: TipoRevision | None = None,
+):
+    """
+    revision x revision_unitaria x planta (una fila por unidad; las revisiones
+    sin unidades salen con las columnas de unidad/planta vacías).
+    `tipo` debe venir ya resuelto con resolver_tipo_revision().
+    """
+    filtros = []
+    if finca_id is not None:
+        filtros.append(Sector.finca_id == finca_id)
+    if sector_id is not None:
+        filtros.append(Revision.sector_id == sector_id)
+    if desde is not None:
+        filtros.append(Revision.fecha_revision >= desde)
+    if hasta is not None:
+        filtros.append(Revision.fecha_revision <= hasta)
+    if tipo is not None:
+        # Se compara como texto contra valor y nombre: según cómo se creó el
+        # tipo tipo_revision en la BD, la etiqueta es una u otra
+        filtros.append(cast(Revision.tipo, String).in_([tipo.value, tipo.name]))
+
+    unidades = RevisionUnitaria.revision_id == Revision.id
+    if filtros:
+        # Solo las particiones de revision_unitaria del rango filtrado (migraciones/013)
+        revisiones = select(Revision.id).join(Sector, Sector.id == Revision.sector_id).where(*filtros)
+        unidades = and_(unidades, rango_revisiones(RevisionUnitaria.revision_id, revisiones))
+
+    stmt = (
+        select(*[expr.label(nombre) for nombre, expr, _ in COLUMNAS_EXPORT])
+        .select_from(Revision)
+        .join(Sector, Sector.id == Revision.sector_id)
+        .join(Finca, Finca.id == Sector.finca_id)
+        .outerjoin(RevisionUnitaria, unidades)
+        .outerjoin(Planta, Planta.id == RevisionUnitaria.planta_id)
+        .where(*filtros)
+    )
+    return stmt.order_by(Revision.id, RevisionUnitaria.id)
+
+
+def iterar_lotes(db: Session, stmt, lote: int = EXPORT_LOTE) -> Iterator[list[tuple]]:
+    """
+    Ejecuta con cursor del lado del servidor (stream_results) y entrega listas
+    de hasta `lote` filas: nunca se carga el resultado completo en memoria.
+    """
+    result = db.execute(stmt, execution_options={"stream_results": True, "yield_per": lote})
+    try:
+        for filas in result.partitions():
+            yield filas
+    finally:
+        result.close()
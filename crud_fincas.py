@@ -1,6 +1,9 @@
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
 from models import Finca
 from schemas import FincaCreate, FincaUpdate
+from respuestas import columnas
+from limpieza import despertar_limpieza
 
 
 def crear_finca(db: Session, data: FincaCreate) -> Finca:
@@ -15,8 +18,10 @@ def crear_finca(db: Session, data: FincaCreate) -> Finca:
     return finca
 
 
-def listar_fincas(db: Session, skip: int = 0, limit: int = 50):
-    return db.query(Finca).order_by(Finca.id.asc()).offset(skip).limit(limit).all()
+def listar_fincas(db: Session, skip: int = 0, limit: int = 50, campos: list[str] | None = None):
+    # Con campos: filas solo con esas columnas (GET /fincas?fields=...)
+    q = db.query(*columnas(Finca, campos)) if campos else db.query(Finca)
+    return q.order_by(Finca.id.asc()).offset(skip).limit(limit).all()
 
 
 def obtener_finca(db: Session, finca_id: int):
@@ -41,9 +46,12 @@ def actualizar_finca(db: Session, finca_id: int, data: FincaUpdate):
 
 
 def eliminar_finca(db: Session, finca_id: int) -> bool:
-    finca = obtener_finca(db, finca_id)
-    if not finca:
-        return False
-    db.delete(finca)
+    # Un solo DELETE: sectores, plantas, revisiones... caen por ON DELETE CASCADE
+    # sin cargarlos en la sesión. Archivos y blobs los limpia el worker (limpieza.py)
+    borradas = db.execute(
+        delete(Finca).where(Finca.id == finca_id).execution_options(synchronize_session=False)
+    ).rowcount
     db.commit()
-    return True
+    if borradas:
+        despertar_limpieza()
+    return borradas > 0
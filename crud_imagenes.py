@@ -1,14 +1,49 @@
 # crud_imagenes.py
+from pathlib import Path
+
+from sqlalchemy import select, delete, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
-from models import RevisionImagen
+
+from models import Revision, RevisionImagen, ImagenBlob
+from services import blob_store
+from services.zip_revision_local import MAX_FILES, nombre_ordenado
+from services.zip_streaming import EntradaZip
+
 
 def borrar_imagenes_por_revision(db: Session, revision_id: int) -> None:
     db.query(RevisionImagen).filter(RevisionImagen.revision_id == revision_id).delete()
     db.commit()
+    liberar_blobs_sin_referencias(db)
 
-def guardar_imagenes_revision(db: Session, revision_id: int, items: list[dict]) -> int:
-    db.query(RevisionImagen).filter(RevisionImagen.revision_id == revision_id).delete()
 
+def _registrar_blobs(db: Session, items: list[dict]) -> None:
+    # Filas de blob: se crean, o se bloquean con un DO UPDATE sin cambios,
+    # para que un liberar_blobs_sin_referencias() concurrente no las borre
+    blobs = {it["sha256"]: it for it in items if it.get("sha256")}
+    if not blobs:
+        return
+    stmt = pg_insert(ImagenBlob).values([
+        {"sha256": sha, "ruta": it["rel_path"], "tamano_bytes": it.get("bytes", 0), "crc32": it.get("crc32")}
+        for sha, it in sorted(blobs.items())  # orden fijo: sin deadlocks entre subidas
+    ])
+    rutas = dict(db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[ImagenBlob.sha256],
+            set_={
+                "ref_count": ImagenBlob.ref_count,
+                "crc32": func.coalesce(ImagenBlob.crc32, stmt.excluded.crc32),  # blobs previos a migraciones/004
+            },
+        ).returning(ImagenBlob.sha256, ImagenBlob.ruta)
+    ).all())
+
+    # El mismo contenido con otra extensión (.jpg / .jpeg) usa el archivo que ya existe
+    for it in items:
+        if it.get("sha256"):
+            it["rel_path"] = rutas[it["sha256"]]
+
+
+def _agregar_filas_y_archivos(db: Session, revision_id: int, items: list[dict]) -> None:
     for it in items:
         db.add(RevisionImagen(
             revision_id=revision_id,
@@ -16,9 +51,155 @@ def guardar_imagenes_revision(db: Session, revision_id: int, items: list[dict])
             nombre_archivo=it["stored_name"],
             ruta=it["rel_path"],
             orden=it["order_index"],
+            sha256=it.get("sha256"),
+            ruta_original=it.get("ruta_original"),
         ))
+    db.flush()
 
-    db.commit()
+    # Archivos: solo se escribe el contenido que todavía no estaba en el almacén
+    for it in items:
+        if it.get("tmp_path"):
+            blob_store.confirmar(it["tmp_path"], it["rel_path"])
+
+
+def guardar_imagenes_revision(db: Session, revision_id: int, items: list[dict]) -> int:
+    try:
+        _registrar_blobs(db, items)
+
+        # Reemplaza todas las filas de la revisión (el trigger ajusta ref_count: -1 previas, +1 nuevas)
+        db.query(RevisionImagen).filter(RevisionImagen.revision_id == revision_id).delete()
+        _agregar_filas_y_archivos(db, revision_id, items)
+
+        db.commit()
+    finally:
+        blob_store.descartar_temporales(items)
+
+    # Re-subida: blobs de la versión anterior que ya nadie usa
+    liberar_blobs_sin_referencias(db)
     return len(items)
 
 
+def agregar_imagenes_revision(
+    db: Session,
+    revision_id: int,
+    items: list[dict],
+    orden_inicio: int | None = None,
+    total: int | None = None,
+    reiniciar: bool = False,
+):
+    """
+    Vincula un lote de imágenes sin tocar el resto de la revisión.
+
+    - orden_inicio: orden de la primera imagen del lote; las que ya ocupaban esos
+      órdenes se reemplazan (reintentar un lote es idempotente). Si no se indica,
+      el lote va a continuación de la última imagen.
+    - total: cantidad final esperada, para que los nombres lógicos tengan los
+      mismos dígitos que en el flujo ZIP (001.jpg ... o 0001.jpg ...).
+    - reiniciar: borra antes las imágenes previas (primer lote de una re-subida).
+
+    Retorna (items, error).
+    """
+    try:
+        # Serializa los lotes de una misma revisión (cálculo del siguiente orden)
+        rev = db.query(Revision.id).filter(Revision.id == revision_id).with_for_update().first()
+        if not rev:
+            db.rollback()
+            return None, "Revisión no existe"
+
+        base = db.query(RevisionImagen).filter(RevisionImagen.revision_id == revision_id)
+        if reiniciar:
+            base.delete()
+
+        if orden_inicio is None:
+            ultimo = db.query(func.max(RevisionImagen.orden)).filter(RevisionImagen.revision_id == revision_id).scalar()
+            orden_inicio = (ultimo or 0) + 1
+        ordenes = list(range(orden_inicio, orden_inicio + len(items)))
+
+        otras = base.filter(RevisionImagen.orden.notin_(ordenes)).count()
+        if otras + len(items) > MAX_FILES:
+            db.rollback()
+            return None, f"Demasiadas imágenes para la revisión (max {MAX_FILES})"
+
+        total = max(total or 0, ordenes[-1], otras + len(items))
+        for orden, it in zip(ordenes, items):
+            it["order_index"] = orden
+            it["stored_name"] = nombre_ordenado(orden, Path(it["rel_path"]).suffix, total)
+
+        _registrar_blobs(db, items)
+        base.filter(RevisionImagen.orden.in_(ordenes)).delete(synchronize_session=False)
+        _agregar_filas_y_archivos(db, revision_id, items)
+
+        db.commit()
+    finally:
+        blob_store.descartar_temporales(items)
+
+    liberar_blobs_sin_referencias(db)
+    return items, None
+
+
+def liberar_blobs_sin_referencias(db: Session, limite: int = 1000) -> int:
+    """
+    Borra los blobs con ref_count <= 0 (fila + archivo). El archivo se borra antes
+    del commit, con la fila todavía bloqueada: una subida concurrente del mismo
+    contenido espera y después vuelve a escribir el archivo.
+    """
+    candidatos = (
+        select(ImagenBlob.sha256)
+        .where(ImagenBlob.ref_count <= 0)
+        .limit(limite)
+        .with_for_update(skip_locked=True)
+    )
+    rutas = db.execute(
+        delete(ImagenBlob)
+        .where(ImagenBlob.sha256.in_(candidatos.scalar_subquery()), ImagenBlob.ref_count <= 0)
+        .returning(ImagenBlob.ruta)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+
+    for ruta in rutas:
+        blob_store.borrar(ruta)
+
+    db.commit()
+    return len(rutas)
+
+
+def entradas_zip_revision(db: Session, revision_id: int) -> list[EntradaZip]:
+    """
+    Nombre, ruta, tamaño y CRC-32 de cada imagen, en orden, para armar el ZIP de
+    descarga. Los blobs sin CRC (anteriores a migraciones/004) se leen una vez y
+    se completan; las filas sin blob (legado) se leen en cada descarga.
+    """
+    filas = (
+        db.query(RevisionImagen.nombre_archivo, RevisionImagen.ruta, RevisionImagen.sha256,
+                 ImagenBlob.tamano_bytes, ImagenBlob.crc32)
+        .outerjoin(ImagenBlob, ImagenBlob.sha256 == RevisionImagen.sha256)
+        .filter(RevisionImagen.revision_id == revision_id)
+        .order_by(RevisionImagen.orden.asc())
+        .all()
+    )
+
+    entradas = []
+    completados = {}
+    for nombre, ruta, sha256, tamano, crc32 in filas:
+        if crc32 is None:
+            crc32, tamano = blob_store.calcular_crc32(ruta)
+            if sha256:
+                completados[sha256] = crc32
+        entradas.append(EntradaZip(nombre=nombre, ruta=ruta, tamano=tamano, crc32=crc32))
+
+    for sha256, crc32 in sorted(completados.items()):
+        db.query(ImagenBlob).filter(ImagenBlob.sha256 == sha256, ImagenBlob.crc32.is_(None)).update(
+            {"crc32": crc32}, synchronize_session=False
+        )
+    if completados:
+        db.commit()
+    return entradas
+
+
+def listar_imagenes_revision(db: Session, revision_id: int) -> list[RevisionImagen]:
+    return (
+        db.query(RevisionImagen)
+        .filter(RevisionImagen.revision_id == revision_id)
+        .order_by(RevisionImagen.orden.asc())
+        .all()
+    )
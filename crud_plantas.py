@@ -0,0 +1,408 @@
+# crud_plantas.py
+import os
+import math
+import heapq
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import select, text, cast, String
+from sqlalchemy.orm import Session
+
+from models import Planta, Sector
+
+# ----------------------------
+# CONFIGURACIÓN
+# ----------------------------
+PLANTAS_INDICE_SECTORES = int(os.getenv("PLANTAS_INDICE_SECTORES", "200"))  # sectores en memoria (LRU)
+# Segundos entre consultas a sync_cambio: cambios hechos por otros procesos
+# pueden tardar hasta esto en verse
+PLANTAS_INDICE_REVALIDAR = float(os.getenv("PLANTAS_INDICE_REVALIDAR", "1"))
+PLANTAS_VISIBLES_LIMITE = 2000
+PLANTAS_POR_CELDA = 8
+
+# Proyección equirectangular local (metros): suficiente a escala de un sector
+_M_POR_GRADO_LAT = 110_574.0
+_M_POR_GRADO_LON = 111_320.0
+
+_COLUMNAS = (
+    Planta.id,
+    Planta.sector_id,
+    Planta.numero,
+    Planta.especie,
+    cast(Planta.estado, String).label("estado"),
+    Planta.fila,
+    Planta.columna,
+    Planta.lat,
+    Planta.lon,
+)
+
+
+# ----------------------------
+# GRILLA (índice espacial en memoria)
+# ----------------------------
+class Grilla:
+    """Celdas cuadradas de lado `celda`: (cx, cy) -> {id: (x, y)}."""
+
+    def __init__(self, celda: float):
+        self.celda = celda
+        self.celdas: dict[tuple[int, int], dict[int, tuple[float, float]]] = {}
+        self.posiciones: dict[int, tuple[float, float]] = {}
+        self.limites: list[int] | None = None  # [cx0, cy0, cx1, cy1] de las celdas ocupadas (no se achica)
+
+    def _clave(self, x: float, y: float) -> tuple[int, int]:
+        return math.floor(x / self.celda), math.floor(y / self.celda)
+
+    def poner(self, id_: int, x: float, y: float) -> None:
+        self.quitar(id_)
+        self.posiciones[id_] = (x, y)
+        cx, cy = self._clave(x, y)
+        self.celdas.setdefault((cx, cy), {})[id_] = (x, y)
+        if self.limites is None:
+            self.limites = [cx, cy, cx, cy]
+        else:
+            lim = self.limites
+            lim[:] = min(lim[0], cx), min(lim[1], cy), max(lim[2], cx), max(lim[3], cy)
+
+    def quitar(self, id_: int) -> None:
+        pos = self.posiciones.pop(id_, None)
+        if pos is None:
+            return
+        clave = self._clave(*pos)
+        celda = self.celdas[clave]
+        del celda[id_]
+        if not celda:
+            del self.celdas[clave]
+
+    def rango(self, x0: float, y0: float, x1: float, y1: float) -> list[int]:
+        cx0, cy0 = self._clave(x0, y0)
+        cx1, cy1 = self._clave(x1, y1)
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.celdas):
+            # Viewport más grande que lo ocupado: recorrer solo las celdas con plantas
+            claves = [k for k in self.celdas if cx0 <= k[0] <= cx1 and cy0 <= k[1] <= cy1]
+        else:
+            claves = [(i, j) for i in range(cx0, cx1 + 1) for j in range(cy0, cy1 + 1) if (i, j) in self.celdas]
+        return [
+            id_
+            for k in claves
+            for id_, (x, y) in self.celdas[k].items()
+            if x0 <= x <= x1 and y0 <= y <= y1
+        ]
+
+    def _distancia2(self, x: float, y: float, i0: int, j0: int, i1: int, j1: int) -> float:
+        """Distancia² mínima de (x, y) al rectángulo de celdas [i0..i1] x [j0..j1]."""
+        c = self.celda
+        dx = max(i0 * c - x, 0.0, x - (i1 + 1) * c)
+        dy = max(j0 * c - y, 0.0, y - (j1 + 1) * c)
+        return dx * dx + dy * dy
+
+    def cercanos(self, x: float, y: float, k: int) -> list[tuple[float, int]]:
+        """Los k más cercanos como (distancia, id), por anillos de celdas alrededor de (x, y)."""
+        if k <= 0 or not self.posiciones:
+            return []
+        cx, cy = self._clave(x, y)
+        mejores: list[tuple[float, int]] = []  # heap de (-d², id)
+        # Anillos recortados a las celdas ocupadas: desde afuera, los más chicos están vacíos
+        cx0, cy0, cx1, cy1 = self.limites
+        r = max(cx0 - cx, cx - cx1, cy0 - cy, cy - cy1, 0)
+        vistas = revisadas = 0
+        while vistas < len(self.celdas):
+            anillo = [
+                (i, j)
+                for j in {cy - r, cy + r} if cy0 <= j <= cy1
+                for i in range(max(cx - r, cx0), min(cx + r, cx1) + 1)
+            ] + [
+                (i, j)
+                for i in {cx - r, cx + r} if cx0 <= i <= cx1
+                for j in range(max(cy - r + 1, cy0), min(cy + r - 1, cy1) + 1)
+            ]
+            revisadas += len(anillo)
+            if revisadas > len(self.posiciones):
+                # Plantas muy dispersas: más barato revisar todas
+                return heapq.nsmallest(k, ((math.dist((x, y), p), i) for i, p in self.posiciones.items()))
+            for clave in anillo:
+                celda = self.celdas.get(clave)
+                if celda is None:
+                    continue
+                vistas += 1
+                if len(mejores) == k and self._distancia2(x, y, *clave, *clave) >= -mejores[0][0]:
+                    continue
+                for id_, (px, py) in celda.items():
+                    d2 = (px - x) ** 2 + (py - y) ** 2
+                    if len(mejores) < k:
+                        heapq.heappush(mejores, (-d2, id_))
+                    elif d2 < -mejores[0][0]:
+                        heapq.heapreplace(mejores, (-d2, id_))
+            if len(mejores) == k:
+                # Lo que queda sin ver: las franjas de celdas ocupadas fuera del cuadrado de radio r
+                franjas = (
+                    (cx0, cy + r + 1, cx1, cy1), (cx0, cy0, cx1, cy - r - 1),
+                    (cx + r + 1, cy0, cx1, cy1), (cx0, cy0, cx - r - 1, cy1),
+                )
+                cota = min(
+                    (self._distancia2(x, y, *f) for f in franjas if f[0] <= f[2] and f[1] <= f[3]),
+                    default=math.inf,
+                )
+                if cota >= -mejores[0][0]:
+                    break
+            r += 1
+        return sorted((math.sqrt(-d2), id_) for d2, id_ in mejores)
+
+
+class IndiceSector:
+    """Plantas de un sector: grilla por fila/columna y grilla por GPS (en metros)."""
+
+    def __init__(self, filas):
+        self.plantas: dict[int, dict] = {}
+        self.plano = Grilla(math.sqrt(PLANTAS_POR_CELDA))  # una planta por fila/columna
+
+        geo = [(f.lat, f.lon) for f in filas if f.lat is not None]
+        self.lat0 = sum(lat for lat, _ in geo) / len(geo) if geo else None
+        self.geo = Grilla(self._celda_geo(geo))
+        for f in filas:
+            self.poner(dict(f._mapping))
+
+    def _celda_geo(self, geo) -> float:
+        if len(geo) < 2:
+            return 10.0
+        xs, ys = zip(*(self._metros(lat, lon) for lat, lon in geo))
+        area = max(max(xs) - min(xs), 1.0) * max(max(ys) - min(ys), 1.0)
+        return max(math.sqrt(area * PLANTAS_POR_CELDA / len(geo)), 1.0)
+
+    def _metros(self, lat: float, lon: float) -> tuple[float, float]:
+        return lon * _M_POR_GRADO_LON * math.cos(math.radians(self.lat0)), lat * _M_POR_GRADO_LAT
+
+    def poner(self, planta: dict) -> None:
+        id_ = planta["id"]
+        self.quitar(id_)
+        self.plantas[id_] = planta
+        if planta["fila"] is not None:
+            self.plano.poner(id_, planta["columna"], planta["fila"])
+        if planta["lat"] is not None:
+            if self.lat0 is None:
+                self.lat0 = planta["lat"]
+            self.geo.poner(id_, *self._metros(planta["lat"], planta["lon"]))
+
+    def quitar(self, id_: int) -> None:
+        if self.plantas.pop(id_, None) is not None:
+            self.plano.quitar(id_)
+            self.geo.quitar(id_)
+
+
+# ----------------------------
+# CACHÉ POR PROCESO (al día vía sync_cambio, migraciones/009)
+# ----------------------------
+# Solo cubre el estado en memoria (lecturas y cambios de los índices), nunca
+# una consulta a la BD: la carga lenta de un sector no frena a los demás
+_lock = threading.Lock()
+_sectores: "OrderedDict[int, IndiceSector]" = OrderedDict()
+_ubicacion: dict[int, int] = {}  # planta_id -> sector_id, de las plantas en memoria
+_xmin: int | None = None  # token como el de /sync: cambios con txid >= _xmin pueden faltar
+_revisado = 0.0
+
+
+def _olvidar_sector(sector_id: int) -> None:
+    indice = _sectores.pop(sector_id, None)
+    if indice is not None:
+        for id_ in indice.plantas:
+            _ubicacion.pop(id_, None)
+
+
+def _leer_cambios(db: Session, xmin_previo: int, sectores: list[int]) -> tuple[list[int], list[dict]]:
+    """Plantas con cambios desde xmin_previo y el estado actual de las que siguen en `sectores`."""
+    ids = db.scalars(
+        text("SELECT fila_id FROM sync_cambio WHERE tabla = 'planta' AND txid >= (:x)::text::xid8"),
+        {"x": xmin_previo},
+    ).all()
+    if not ids:
+        return [], []
+    filas = db.execute(select(*_COLUMNAS).where(Planta.id.in_(ids), Planta.sector_id.in_(sectores))).all()
+    return ids, [dict(f._mapping) for f in filas]
+
+
+def _aplicar_cambios(ids: list[int], filas: list[dict]) -> None:
+    # Con _lock tomado
+    for id_ in ids:
+        sector_id = _ubicacion.pop(id_, None)
+        if sector_id in _sectores:
+            _sectores[sector_id].quitar(id_)
+    for f in filas:
+        # Un sector olvidado entre la lectura y acá ya no se actualiza
+        if f["sector_id"] in _sectores:
+            _sectores[f["sector_id"]].poner(f)
+            _ubicacion[f["id"]] = f["sector_id"]
+
+
+def _leer_sector(db: Session, sector_id: int) -> IndiceSector | None:
+    if db.get(Sector, sector_id) is None:
+        return None
+    return IndiceSector(db.execute(select(*_COLUMNAS).where(Planta.sector_id == sector_id)).all())
+
+
+def _guardar_sector(sector_id: int, indice: IndiceSector) -> None:
+    # Con _lock tomado
+    _olvidar_sector(sector_id)
+    _sectores[sector_id] = indice
+    for id_ in indice.plantas:
+        _ubicacion[id_] = sector_id
+    while len(_sectores) > PLANTAS_INDICE_SECTORES:
+        _olvidar_sector(next(iter(_sectores)))
+
+
+def indice_sector(db: Session, sector_id: int) -> IndiceSector | None:
+    """
+    Índice del sector, al día con la BD (a lo sumo PLANTAS_INDICE_REVALIDAR
+    segundos de atraso). Solo se releen las plantas que cambiaron: la carga
+    completa ocurre la primera vez que se pide el sector o tras una poda de
+    tombstones que deja el token atrás. None si el sector no existe.
+
+    Las consultas corren sin _lock; el lock solo se toma para leer y para
+    aplicar el resultado en memoria. Los índices se leen también con _lock.
+    """
+    global _xmin, _revisado
+    with _lock:
+        ahora = time.monotonic()
+        indice = _sectores.get(sector_id)
+        if indice is not None and ahora - _revisado < PLANTAS_INDICE_REVALIDAR:
+            _sectores.move_to_end(sector_id)
+            return indice
+        xmin_previo, cargados = _xmin, list(_sectores)
+
+    # Un solo snapshot: el xmin y las filas leídas son coherentes entre sí
+    db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    try:
+        xmin = db.execute(text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")).scalar()
+        horizonte = db.execute(text("SELECT txid::text::bigint FROM sync_horizonte")).scalar() or 0
+        reiniciar = xmin_previo is None or xmin_previo <= horizonte
+        ids, filas = [], []
+        if not reiniciar and cargados:
+            ids, filas = _leer_cambios(db, xmin_previo, cargados)
+        cargar = reiniciar or indice is None
+        nuevo = _leer_sector(db, sector_id) if cargar else None
+    finally:
+        db.rollback()
+
+    with _lock:
+        if reiniciar:
+            _sectores.clear()
+            _ubicacion.clear()
+            _xmin, _revisado = xmin, ahora
+        elif _xmin == xmin_previo:
+            _aplicar_cambios(ids, filas)
+            _xmin, _revisado = xmin, ahora
+        # (si no, otro hilo ya aplicó los cambios desde xmin_previo)
+
+        if cargar:
+            if nuevo is None:
+                return None
+            _guardar_sector(sector_id, nuevo)
+            # El sector refleja este snapshot: si el token ya iba más adelante,
+            # se retrocede para que la próxima revisión relea lo del medio
+            _xmin = min(_xmin, xmin)
+            return nuevo
+        if sector_id in _sectores:
+            _sectores.move_to_end(sector_id)
+            return _sectores[sector_id]
+        return indice
+
+
+# ----------------------------
+# CONSULTAS
+# ----------------------------
+SECTOR_NO_EXISTE = "Sector no existe"
+
+
+def _validar_punto(lat, lon, fila, columna):
+    geo = lat is not None or lon is not None
+    plano = fila is not None or columna is not None
+    if geo == plano:
+        return None, "Indique lat/lon o fila/columna (uno de los dos)"
+    if geo and (lat is None or lon is None):
+        return None, "Faltan lat o lon"
+    if plano and (fila is None or columna is None):
+        return None, "Faltan fila o columna"
+    return ("geo" if geo else "plano"), None
+
+
+def plantas_visibles(
+    db: Session,
+    sector_id: int,
+    min_lat: float | None = None,
+    min_lon: float | None = None,
+    max_lat: float | None = None,
+    max_lon: float | None = None,
+    fila_desde: int | None = None,
+    fila_hasta: int | None = None,
+    columna_desde: int | None = None,
+    columna_hasta: int | None = None,
+    limite: int = PLANTAS_VISIBLES_LIMITE,
+):
+    """
+    Plantas dentro del viewport: un rectángulo GPS (min/max lat/lon) o un
+    rango de filas y columnas del plano. Devuelve (respuesta, err).
+    """
+    geo = (min_lat, min_lon, max_lat, max_lon)
+    plano = (fila_desde, fila_hasta, columna_desde, columna_hasta)
+    usa_geo = any(v is not None for v in geo)
+    usa_plano = any(v is not None for v in plano)
+    if usa_geo == usa_plano:
+        return None, "Indique min/max lat/lon o fila/columna desde/hasta (uno de los dos)"
+    if None in (geo if usa_geo else plano):
+        return None, "Viewport incompleto"
+
+    indice = indice_sector(db, sector_id)
+    if indice is None:
+        return None, SECTOR_NO_EXISTE
+
+    with _lock:
+        if usa_geo:
+            if indice.lat0 is None:
+                ids = []
+            else:
+                x0, y0 = indice._metros(min(min_lat, max_lat), min(min_lon, max_lon))
+                x1, y1 = indice._metros(max(min_lat, max_lat), max(min_lon, max_lon))
+                ids = indice.geo.rango(x0, y0, x1, y1)
+        else:
+            ids = indice.plano.rango(
+                min(columna_desde, columna_hasta), min(fila_desde, fila_hasta),
+                max(columna_desde, columna_hasta), max(fila_desde, fila_hasta),
+            )
+
+        ids.sort()
+        return {
+            "sector_id": sector_id,
+            "total": len(ids),
+            "truncado": len(ids) > limite,
+            "plantas": [indice.plantas[i] for i in ids[:limite]],
+        }, None
+
+
+def plantas_cercanas(
+    db: Session,
+    sector_id: int,
+    lat: float | None = None,
+    lon: float | None = None,
+    fila: int | None = None,
+    columna: int | None = None,
+    k: int = 5,
+):
+    """
+    Las k plantas más cercanas a un punto GPS (distancia en metros) o a una
+    posición del plano (distancia en plantas). Devuelve (filas, err).
+    """
+    modo, err = _validar_punto(lat, lon, fila, columna)
+    if err:
+        return None, err
+
+    indice = indice_sector(db, sector_id)
+    if indice is None:
+        return None, SECTOR_NO_EXISTE
+
+    with _lock:
+        if modo == "geo":
+            if indice.lat0 is None:
+                return [], None
+            cercanos = indice.geo.cercanos(*indice._metros(lat, lon), k)
+        else:
+            cercanos = indice.plano.cercanos(columna, fila, k)
+        return [{**indice.plantas[i], "distancia": round(d, 2)} for d, i in cercanos], None
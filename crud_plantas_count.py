@@ -1,8 +1,149 @@
-# crud_plantas_count.py
-from sqlalchemy.orm import Session
-
-# Ajusta el import si tu clase no se llama Planta
-from plantas import Planta  # si tu modelo está en plantas.py
-
-def contar_plantas_por_sector(db: Session, sector_id: int) -> int:
-    return db.query(Planta).filter(Planta.sector_id == sector_id).count()
+# crud_plantas_count.py
+"""
+Conteo de plantas por sector y estado. Lo mantienen triggers sobre planta
+(migraciones/012); acá solo se lee y, si hiciera falta (carga con triggers
+deshabilitados, restore parcial...), se repara recalculando en bloque.
+
+Uso:
+    python crud_plantas_count.py              # reporte de diferencias
+    python crud_plantas_count.py --aplicar    # corregirlas
+"""
+import argparse
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from auth_simple import require_admin_key
+from database import SessionLocal
+from models import Sector
+
+
+def contar_plantas_por_sector(db: Session, sector_id: int) -> int:
+    # Lectura O(1) del contador, sin COUNT(*) sobre planta
+    return db.scalar(select(Sector.plantas_cantidad).where(Sector.id == sector_id)) or 0
+
+
+def contar_plantas_por_estado(db: Session, sector_id: int) -> dict[str, int]:
+    return db.scalar(select(Sector.plantas_por_estado).where(Sector.id == sector_id)) or {}
+
+
+# ----------------------------
+# REPARACIÓN
+# ----------------------------
+_DIFERENCIAS = text("""
+    WITH reales AS (
+        SELECT sector_id, estado, count(*) AS n FROM planta
+        WHERE :todos OR sector_id = ANY(:ids)
+        GROUP BY sector_id, estado
+    ), guardados AS (
+        SELECT sector_id, estado, cantidad FROM planta_conteo
+        WHERE :todos OR sector_id = ANY(:ids)
+    )
+    SELECT coalesce(r.sector_id, g.sector_id) AS sector_id,
+           coalesce(r.estado, g.estado)::text AS estado,
+           coalesce(g.cantidad, 0) AS guardado,
+           coalesce(r.n, 0) AS real
+    FROM reales r
+    FULL JOIN guardados g ON g.sector_id = r.sector_id AND g.estado = r.estado
+    WHERE coalesce(g.cantidad, 0) <> coalesce(r.n, 0)
+    ORDER BY 1, 2
+""")
+
+_CORREGIR = text("""
+    INSERT INTO planta_conteo (sector_id, estado, cantidad)
+    VALUES (:sector_id, CAST(:estado AS estado_planta), :real)
+    ON CONFLICT (sector_id, estado) DO UPDATE SET cantidad = EXCLUDED.cantidad
+""")
+
+
+def recalcular_conteos(db: Session, sector_ids: list[int] | None = None, aplicar: bool = False) -> dict:
+    """
+    Compara planta_conteo con un COUNT(*) agrupado sobre planta (todos los
+    sectores o solo `sector_ids`). Con aplicar=True corrige las diferencias;
+    para eso bloquea las escrituras en planta (LOCK SHARE) hasta terminar,
+    así el recálculo no pisa una alta en curso.
+    """
+    if aplicar:
+        db.execute(text("LOCK TABLE planta IN SHARE MODE"))
+
+    diferencias = [
+        dict(f._mapping)
+        for f in db.execute(_DIFERENCIAS, {"todos": sector_ids is None, "ids": sector_ids or []})
+    ]
+    if aplicar and diferencias:
+        db.execute(_CORREGIR, diferencias)
+        # Sin trigger sobre planta_conteo: GET /sync tiene que reenviar sector y finca (migraciones/015)
+        db.execute(
+            text("SELECT planta_conteo_marcar_sync(:ids)"),
+            {"ids": sorted({d["sector_id"] for d in diferencias})},
+        )
+    if aplicar:
+        db.commit()
+    else:
+        db.rollback()
+
+    return {
+        "aplicado": aplicar,
+        "diferencias": len(diferencias),
+        "sectores": len({d["sector_id"] for d in diferencias}),
+        "detalle": diferencias[:100],
+    }
+
+
+# ----------------------------
+# ENDPOINTS ADMIN
+# ----------------------------
+router = APIRouter(
+    prefix="/admin/plantas",
+    tags=["Admin"],
+    dependencies=[Depends(require_admin_key)],
+)
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@router.get("/conteos")
+def reporte_conteos(
+    sector_id: list[int] | None = Query(default=None),
+    db: Session = Depends(get_db),
+):
+    """Dry-run: sectores / estados cuyo contador no coincide con las plantas."""
+    return recalcular_conteos(db, sector_id, aplicar=False)
+
+
+@router.post("/conteos")
+def reparar_conteos(
+    sector_id: list[int] | None = Query(default=None),
+    db: Session = Depends(get_db),
+):
+    return recalcular_conteos(db, sector_id, aplicar=True)
+
+
+# ----------------------------
+# CLI (cron)
+# ----------------------------
+def main():
+    ap = argparse.ArgumentParser(description="Reparación del conteo de plantas por sector")
+    ap.add_argument("--sector", type=int, action="append", help="por defecto, todos (se puede repetir)")
+    ap.add_argument("--aplicar", action="store_true", help="corregir (sin esto solo reporta)")
+    args = ap.parse_args()
+
+    db = SessionLocal()
+    try:
+        r = recalcular_conteos(db, args.sector, aplicar=args.aplicar)
+    finally:
+        db.close()
+    for d in r["detalle"]:
+        print(f"sector {d['sector_id']:>6}  {d['estado']:<15} guardado={d['guardado']:,}  real={d['real']:,}")
+    print(f"{r['diferencias']:,} diferencias en {r['sectores']:,} sectores" + (" (corregidas)" if r["aplicado"] else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+# crud_productividad.py
+import os
+from datetime import date
+
+from sqlalchemy import select, delete, func, cast, Date, Float, literal_column
+from sqlalchemy.orm import Session
+
+from models import (
+    Revision, RevisionUnitaria, Sector, Trabajador,
+    revision_trabajador, productividad_diaria, productividad_pendiente,
+)
+from particiones import rango_revisiones
+
+rt = revision_trabajador
+pd = productividad_diaria
+pend = productividad_pendiente
+
+GRANULARIDADES = ("dia", "semana", "mes")
+_DATE_TRUNC = {"dia": "day", "semana": "week", "mes": "month"}
+
+# Días recalculados por transacción (el primer llenado puede abarcar años)
+PRODUCTIVIDAD_LOTE_DIAS = int(os.getenv("PRODUCTIVIDAD_LOTE_DIAS", "90"))
+
+
+# ----------------------------
+# RECÁLCULO DE DÍAS PENDIENTES
+# ----------------------------
+def _agregados_por_dia(dias):
+    # Unidades por revisión primero: así cada (revisión, trabajador) cuenta sus árboles una sola vez
+    unidades = (
+        select(
+            RevisionUnitaria.revision_id,
+            func.count().label("arboles"),
+            func.sum(RevisionUnitaria.calificacion).label("calificacion_suma"),
+            func.count(RevisionUnitaria.calificacion).label("calificacion_n"),
+        )
+        .join(Revision, Revision.id == RevisionUnitaria.revision_id)
+        .where(
+            Revision.fecha_revision.in_(dias),
+            # revision_unitaria está particionada por revision_id (migraciones/013)
+            rango_revisiones(RevisionUnitaria.revision_id, select(Revision.id).where(Revision.fecha_revision.in_(dias))),
+        )
+        .group_by(RevisionUnitaria.revision_id)
+        .subquery()
+    )
+    return (
+        select(
+            Revision.fecha_revision,
+            rt.c.trabajador_id,
+            Revision.sector_id,
+            func.count(),
+            func.coalesce(func.sum(unidades.c.arboles), 0),
+            func.sum(unidades.c.calificacion_suma),
+            func.coalesce(func.sum(unidades.c.calificacion_n), 0),
+        )
+        .join(rt, rt.c.revision_id == Revision.id)
+        .outerjoin(unidades, unidades.c.revision_id == Revision.id)
+        .where(Revision.fecha_revision.in_(dias))
+        .group_by(Revision.fecha_revision, rt.c.trabajador_id, Revision.sector_id)
+    )
+
+
+def refrescar_productividad(db: Session, desde: date | None = None, hasta: date | None = None) -> int:
+    """
+    Recalcula los días marcados por los triggers (migraciones/006) dentro del
+    rango. La llama el worker en segundo plano (limpieza.py), no las consultas.
+    Cada lote toma sus días con FOR UPDATE: si dos procesos corren a la vez,
+    el segundo espera y ya no los encuentra pendientes.
+    """
+    recalculados = 0
+    while True:
+        cola = select(pend.c.dia)
+        if desde is not None:
+            cola = cola.where(pend.c.dia >= desde)
+        if hasta is not None:
+            cola = cola.where(pend.c.dia <= hasta)
+        cola = cola.order_by(pend.c.dia).limit(PRODUCTIVIDAD_LOTE_DIAS).with_for_update()
+
+        dias = db.scalars(
+            delete(pend).where(pend.c.dia.in_(cola.scalar_subquery())).returning(pend.c.dia)
+        ).all()
+        if not dias:
+            db.commit()
+            return recalculados
+
+        db.execute(delete(pd).where(pd.c.dia.in_(dias)))
+        db.execute(
+            pd.insert().from_select(
+                ["dia", "trabajador_id", "sector_id", "revisiones", "arboles", "calificacion_suma", "calificacion_n"],
+                _agregados_por_dia(dias),
+            )
+        )
+        db.commit()
+        recalculados += len(dias)
+
+
+# ----------------------------
+# CONSULTA
+# ----------------------------
+def productividad_trabajadores(
+    db: Session,
+    granularidad: str = "semana",
+    desde: date | None = None,
+    hasta: date | None = None,
+    finca_id: int | None = None,
+    sector_id: int | None = None,
+    trabajador_id: int | None = None,
+):
+    if granularidad not in GRANULARIDADES:
+        return None, f"granularidad inválida. Debe ser una de: {list(GRANULARIDADES)}"
+    if desde and hasta and desde > hasta:
+        return None, "desde no puede ser posterior a hasta"
+
+    periodo = cast(func.date_trunc(literal_column(f"'{_DATE_TRUNC[granularidad]}'"), pd.c.dia), Date)
+    n = func.sum(pd.c.calificacion_n)
+    stmt = (
+        select(
+            periodo.label("periodo"),
+            pd.c.trabajador_id,
+            Trabajador.nombre,
+            Trabajador.apellido,
+            func.sum(pd.c.revisiones).label("revisiones"),
+            func.sum(pd.c.arboles).label("arboles"),
+            cast(func.sum(pd.c.calificacion_suma) / func.nullif(n, 0), Float).label("calificacion_promedio"),
+            n.label("calificaciones"),
+        )
+        .join(Trabajador, Trabajador.id == pd.c.trabajador_id)
+    )
+    if desde is not None:
+        stmt = stmt.where(pd.c.dia >= desde)
+    if hasta is not None:
+        stmt = stmt.where(pd.c.dia <= hasta)
+    if sector_id is not None:
+        stmt = stmt.where(pd.c.sector_id == sector_id)
+    if finca_id is not None:
+        stmt = stmt.join(Sector, Sector.id == pd.c.sector_id).where(Sector.finca_id == finca_id)
+    if trabajador_id is not None:
+        stmt = stmt.where(pd.c.trabajador_id == trabajador_id)
+
+    stmt = (
+        stmt.group_by(periodo, pd.c.trabajador_id, Trabajador.nombre, Trabajador.apellido)
+        .order_by(periodo, Trabajador.apellido, Trabajador.nombre, pd.c.trabajador_id)
+    )
+    return [dict(r._mapping) for r in db.execute(stmt).all()], None
@@ -1,8 +1,13 @@
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.exc import IntegrityError, OperationalError
 
 from models import Revision, Sector, TipoRevision
 from schemas import RevisionCreate
+from respuestas import columnas
+from limpieza import despertar_limpieza
+
+PARTICION_FALTANTE = "Falta la partición para la revisión; reintentar en unos segundos"
 
 
 def crear_revision(db: Session, data: RevisionCreate):
@@ -30,13 +35,21 @@ def crear_revision(db: Session, data: RevisionCreate):
     except IntegrityError:
         db.rollback()
         return None, "Error creando revisión"
+    except OperationalError as e:
+        db.rollback()
+        if getattr(e.orig, "pgcode", None) != "55000":  # el trigger de migraciones/016
+            raise
+        despertar_limpieza()  # el worker crea las particiones que falten
+        return None, PARTICION_FALTANTE
 
     db.refresh(rev)
     return rev, None
 
 
-def listar_revisiones(db: Session, sector_id: int | None = None, skip: int = 0, limit: int = 50):
-    q = db.query(Revision)
+def listar_revisiones(
+    db: Session, sector_id: int | None = None, skip: int = 0, limit: int = 50, campos: list[str] | None = None
+):
+    q = db.query(*columnas(Revision, campos)) if campos else db.query(Revision)
     if sector_id is not None:
         q = q.filter(Revision.sector_id == sector_id)
     return q.order_by(Revision.id.desc()).offset(skip).limit(limit).all()
@@ -47,11 +60,13 @@ def obtener_revision(db: Session, revision_id: int):
 
 
 def eliminar_revision(db: Session, revision_id: int) -> bool:
-    rev = obtener_revision(db, revision_id)
-    if not rev:
-        return False
-    db.delete(rev)
+    # Un solo DELETE (ON DELETE CASCADE); archivos y blobs los limpia el worker (limpieza.py)
+    borradas = db.execute(
+        delete(Revision).where(Revision.id == revision_id).execution_options(synchronize_session=False)
+    ).rowcount
     db.commit()
-    return True
+    if borradas:
+        despertar_limpieza()
+    return borradas > 0
 
 
@@ -1,8 +1,11 @@
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
 from models import Sector, Finca
 from schemas import SectorCreate, SectorUpdate
+from respuestas import columnas
+from limpieza import despertar_limpieza
 
 
 def crear_sector(db: Session, data: SectorCreate):
@@ -15,7 +18,6 @@ def crear_sector(db: Session, data: SectorCreate):
         nombre=data.nombre.strip(),
         descripcion=(data.descripcion.strip() if data.descripcion else None),
         area_hectareas=data.area_hectareas,
-        plantas_cantidad=data.plantas_cantidad,
     )
 
     db.add(sector)
@@ -29,8 +31,10 @@ def crear_sector(db: Session, data: SectorCreate):
     return sector, None
 
 
-def listar_sectores(db: Session, finca_id: int | None = None, skip: int = 0, limit: int = 50):
-    q = db.query(Sector)
+def listar_sectores(
+    db: Session, finca_id: int | None = None, skip: int = 0, limit: int = 50, campos: list[str] | None = None
+):
+    q = db.query(*columnas(Sector, campos)) if campos else db.query(Sector)
     if finca_id is not None:
         q = q.filter(Sector.finca_id == finca_id)
     return q.order_by(Sector.id.asc()).offset(skip).limit(limit).all()
@@ -51,8 +55,6 @@ def actualizar_sector(db: Session, sector_id: int, data: SectorUpdate):
         sector.descripcion = data.descripcion.strip() if data.descripcion else None
     if data.area_hectareas is not None:
         sector.area_hectareas = data.area_hectareas
-    if data.plantas_cantidad is not None:
-        sector.plantas_cantidad = data.plantas_cantidad
 
     try:
         db.commit()
@@ -65,9 +67,11 @@ def actualizar_sector(db: Session, sector_id: int, data: SectorUpdate):
 
 
 def eliminar_sector(db: Session, sector_id: int) -> bool:
-    sector = obtener_sector(db, sector_id)
-    if not sector:
-        return False
-    db.delete(sector)
+    # Un solo DELETE (ON DELETE CASCADE); archivos y blobs los limpia el worker (limpieza.py)
+    borrados = db.execute(
+        delete(Sector).where(Sector.id == sector_id).execution_options(synchronize_session=False)
+    ).rowcount
     db.commit()
-    return True
+    if borrados:
+        despertar_limpieza()
+    return borrados > 0
@@ -0,0 +1,219 @@
+# crud_sync.py
+import os
+import base64
+import binascii
+
+import orjson
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from models import Finca, Sector, Planta, Trabajador, Revision
+from schemas import FincaResponse, SectorResponse, TrabajadorResponse, RevisionResponse
+from respuestas import parsear_campos, columnas
+
+# Entidades que sincroniza la app de campo (los triggers de migraciones/009
+# cubren estas tablas). Las columnas son las de la respuesta de cada listado.
+SYNC_ENTIDADES = {
+    "fincas": (Finca, FincaResponse),
+    "sectores": (Sector, SectorResponse),
+    "plantas": (Planta, None),  # sin schema de respuesta: todas las columnas
+    "trabajadores": (Trabajador, TrabajadorResponse),
+    "revisiones": (Revision, RevisionResponse),
+}
+_POR_TABLA = {modelo.__tablename__: nombre for nombre, (modelo, _) in SYNC_ENTIDADES.items()}
+_ORDEN = list(SYNC_ENTIDADES)
+
+SYNC_LIMITE = int(os.getenv("SYNC_LIMITE", "1000"))
+SYNC_RETENCION_DIAS = int(os.getenv("SYNC_RETENCION_DIAS", "90"))  # tombstones
+
+
+def _columnas(nombre: str) -> list:
+    modelo, schema = SYNC_ENTIDADES[nombre]
+    if schema is None:
+        return list(modelo.__table__.columns)
+    return columnas(modelo, parsear_campos(None, schema))
+
+
+# ----------------------------
+# TOKEN (opaco para el cliente)
+# ----------------------------
+# {"x": xmin base}                         sincronización completa hasta x
+# {"x": xmin, "d": desde|None, "p": [...]} página intermedia (d None = carga inicial)
+def _codificar(estado: dict) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps(estado)).decode().rstrip("=")
+
+
+def _es_txid(valor) -> bool:
+    # Entero que entra en xid8 (bool también es int en Python)
+    return type(valor) is int and 0 <= valor < 2 ** 63
+
+
+def _cursor_valido(desde, cursor) -> bool:
+    if not isinstance(cursor, list):
+        return False
+    if desde is None:
+        # Carga completa: [índice de tabla, último id]
+        return (
+            len(cursor) == 2
+            and type(cursor[0]) is int and 0 <= cursor[0] < len(_ORDEN)
+            and _es_txid(cursor[1])
+        )
+    # Delta: [txid, tabla, fila_id]
+    return (
+        _es_txid(desde)
+        and len(cursor) == 3
+        and _es_txid(cursor[0])
+        and isinstance(cursor[1], str)
+        and _es_txid(cursor[2])
+    )
+
+
+def _decodificar(token: str) -> dict | None:
+    """El estado del token, o None si está mal formado (manipulado o corrupto)."""
+    try:
+        estado = orjson.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(estado, dict) or not _es_txid(estado.get("x")):
+        return None
+    if "p" in estado and not _cursor_valido(estado.get("d"), estado["p"]):
+        return None
+    return estado
+
+
+# ----------------------------
+# PÁGINAS
+# ----------------------------
+def _vacio() -> dict:
+    return {"cambios": {n: [] for n in _ORDEN}, "borrados": {n: [] for n in _ORDEN}}
+
+
+def _pagina_completa(db: Session, cursor: list | None, limite: int):
+    """Carga inicial: todas las filas, tabla por tabla y por id."""
+    res = _vacio()
+    idx, ultimo = cursor or [0, 0]
+    restante = limite
+    while idx < len(_ORDEN) and restante > 0:
+        nombre = _ORDEN[idx]
+        modelo, _ = SYNC_ENTIDADES[nombre]
+        filas = db.execute(
+            select(*_columnas(nombre)).where(modelo.id > ultimo).order_by(modelo.id).limit(restante)
+        ).all()
+        res["cambios"][nombre] = [dict(f._mapping) for f in filas]
+        restante -= len(filas)
+        if restante > 0:
+            idx, ultimo = idx + 1, 0  # tabla terminada
+        else:
+            ultimo = filas[-1].id
+    return res, ([idx, ultimo] if idx < len(_ORDEN) else None)
+
+
+def _pagina_delta(db: Session, desde: int, cursor: list | None, limite: int):
+    """Filas con cambios (o bajas) en transacciones >= desde, por (txid, tabla, id)."""
+    condicion = "txid >= (:desde)::text::xid8"
+    params = {"desde": desde, "limite": limite}
+    if cursor:
+        condicion += " AND (txid, tabla, fila_id) > ((:c_txid)::text::xid8, :c_tabla, :c_id)"
+        params.update(c_txid=cursor[0], c_tabla=cursor[1], c_id=cursor[2])
+
+    marcas = db.execute(text(f"""
+        SELECT txid::text::bigint AS txid, tabla, fila_id, borrado
+        FROM sync_cambio
+        WHERE {condicion}
+        ORDER BY txid, tabla, fila_id
+        LIMIT :limite
+    """), params).all()
+
+    res = _vacio()
+    vigentes: dict[str, list[int]] = {}
+    for m in marcas:
+        nombre = _POR_TABLA.get(m.tabla)
+        if nombre is None:
+            continue
+        if m.borrado:
+            res["borrados"][nombre].append(m.fila_id)
+        else:
+            vigentes.setdefault(nombre, []).append(m.fila_id)
+
+    # Una consulta por tabla para los datos actuales
+    for nombre, ids in vigentes.items():
+        modelo, _ = SYNC_ENTIDADES[nombre]
+        filas = db.execute(select(*_columnas(nombre)).where(modelo.id.in_(ids)).order_by(modelo.id)).all()
+        res["cambios"][nombre] = [dict(f._mapping) for f in filas]
+
+    siguiente = None
+    if len(marcas) == limite:
+        ultima = marcas[-1]
+        siguiente = [ultima.txid, ultima.tabla, ultima.fila_id]
+    return res, siguiente
+
+
+def sincronizar(db: Session, token: str | None = None, limite: int = SYNC_LIMITE):
+    """
+    Devuelve (respuesta, err). Sin token: carga completa (reset=True). Con el
+    token de la respuesta anterior: solo lo que cambió desde entonces. Si
+    mas=True hay que volver a llamar con el token nuevo.
+
+    Todo se lee en un único snapshot (REPEATABLE READ): las filas devueltas y
+    el xmin que va en el token son coherentes entre sí.
+    """
+    estado = None
+    if token:
+        estado = _decodificar(token)
+        if estado is None:
+            return None, "Token de sincronización inválido"
+
+    db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    xmin = db.execute(text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")).scalar()
+    horizonte = db.execute(text("SELECT txid::text::bigint FROM sync_horizonte")).scalar() or 0
+
+    if estado is None:
+        base, desde, cursor = xmin, None, None
+    elif "p" in estado:
+        base, desde, cursor = estado["x"], estado.get("d"), estado["p"]  # página siguiente
+    else:
+        base, desde, cursor = xmin, estado["x"], None
+
+    reset = desde is None and cursor is None
+    if desde is not None and desde <= horizonte:
+        # Token anterior a la última poda de tombstones: no se puede saber qué se borró
+        base, desde, cursor, reset = xmin, None, None, True
+
+    if desde is None:
+        res, siguiente = _pagina_completa(db, cursor, limite)
+    else:
+        res, siguiente = _pagina_delta(db, desde, cursor, limite)
+    db.rollback()
+
+    proximo = {"x": base} if siguiente is None else {"x": base, "d": desde, "p": siguiente}
+    return {"token": _codificar(proximo), "mas": siguiente is not None, "reset": reset, **res}, None
+
+
+# ----------------------------
+# PODA DE TOMBSTONES
+# ----------------------------
+def podar_tombstones(db: Session, dias: int = SYNC_RETENCION_DIAS, lote: int = 10000) -> int:
+    """
+    Borra las bajas más viejas que `dias` y sube el horizonte: un cliente con
+    un token anterior recibe la carga completa en vez de un delta incompleto.
+    """
+    fila = db.execute(text("""
+        WITH podadas AS (
+            DELETE FROM sync_cambio
+            WHERE (tabla, fila_id) IN (
+                SELECT tabla, fila_id FROM sync_cambio
+                WHERE borrado AND modificado_en < now() - make_interval(days => :dias)
+                LIMIT :lote
+            )
+            RETURNING txid
+        )
+        SELECT count(*), max(txid::text::bigint) FROM podadas
+    """), {"dias": dias, "lote": lote}).one()
+
+    if fila[0]:
+        db.execute(
+            text("UPDATE sync_horizonte SET txid = greatest(txid, (:m)::text::xid8)"),
+            {"m": fila[1]},
+        )
+    db.commit()
+    return fila[0]
@@ -3,6 +3,7 @@ from sqlalchemy.exc import IntegrityError
 
 from models import Trabajador
 from schemas import TrabajadorCreate, TrabajadorUpdate
+from respuestas import columnas
 
 
 def crear_trabajador(db: Session, data: TrabajadorCreate):
@@ -28,8 +29,10 @@ def crear_trabajador(db: Session, data: TrabajadorCreate):
     return obj, None
 
 
-def listar_trabajadores(db: Session, activo: bool | None = None, skip: int = 0, limit: int = 50):
-    q = db.query(Trabajador)
+def listar_trabajadores(
+    db: Session, activo: bool | None = None, skip: int = 0, limit: int = 50, campos: list[str] | None = None
+):
+    q = db.query(*columnas(Trabajador, campos)) if campos else db.query(Trabajador)
     if activo is not None:
         q = q.filter(Trabajador.activo == activo)
     return q.order_by(Trabajador.id.asc()).offset(skip).limit(limit).all()
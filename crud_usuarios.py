@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional
 
 from sqlalchemy.orm import Session
@@ -9,12 +10,16 @@ from passlib.context import CryptContext
 
 from models import Usuario
 from schemas import UsuarioCreate, UsuarioUpdate, UsuarioPasswordUpdate
+from respuestas import columnas
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+@lru_cache(maxsize=1)
+def pwd_context() -> CryptContext:
+    # Se construye en el primer uso (o en el warm-up), no al importar el módulo
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def _hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
 
 
 def crear_usuario(db: Session, data: UsuarioCreate) -> tuple[Optional[Usuario], Optional[str]]:
@@ -40,9 +45,9 @@ def crear_usuario(db: Session, data: UsuarioCreate) -> tuple[Optional[Usuario],
     return nuevo, None
 
 
-def listar_usuarios(db: Session, skip: int = 0, limit: int = 50):
+def listar_usuarios(db: Session, skip: int = 0, limit: int = 50, campos: list[str] | None = None):
     return (
-        db.query(Usuario)
+        (db.query(*columnas(Usuario, campos)) if campos else db.query(Usuario))
         .order_by(Usuario.id.asc())
         .offset(skip)
         .limit(limit)
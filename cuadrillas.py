@@ -0,0 +1,53 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from schemas import CuadrillaUpdate, CuadrillaCambio
+from crud_cuadrillas import asignar_cuadrilla, agregar_trabajadores, quitar_trabajadores, listar_cuadrillas
+
+router = APIRouter(prefix="/cuadrillas", tags=["Cuadrillas"])
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@router.get("", response_model=list[dict])
+def get_cuadrillas(
+    revision_ids: List[int] | None = Query(default=None),
+    sector_id: int | None = Query(default=None),
+    skip: int = 0,
+    limit: int = 50,
+    db: Session = Depends(get_db),
+):
+    return listar_cuadrillas(db, revision_ids=revision_ids, sector_id=sector_id, skip=skip, limit=limit)
+
+
+@router.put("", response_model=dict)
+def put_cuadrillas(body: CuadrillaUpdate, db: Session = Depends(get_db)):
+    res, err = asignar_cuadrilla(db, body.revision_ids, body.trabajador_ids)
+    if err:
+        raise HTTPException(status_code=400, detail=err)
+    return res
+
+
+@router.post("/agregar", response_model=dict)
+def post_agregar(body: CuadrillaCambio, db: Session = Depends(get_db)):
+    res, err = agregar_trabajadores(db, body.revision_ids, body.trabajador_ids)
+    if err:
+        raise HTTPException(status_code=400, detail=err)
+    return res
+
+
+@router.post("/quitar", response_model=dict)
+def post_quitar(body: CuadrillaCambio, db: Session = Depends(get_db)):
+    res, err = quitar_trabajadores(db, body.revision_ids, body.trabajador_ids)
+    if err:
+        raise HTTPException(status_code=400, detail=err)
+    return res
@@ -1,7 +1,14 @@
 import os
-from sqlalchemy import create_engine
+import re
+import time
+import logging
+from contextvars import ContextVar
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 
+from metricas import Contador, Histograma
+
 DATABASE_URL = os.getenv("DATABASE_URL")
 
 if not DATABASE_URL:
@@ -19,3 +26,126 @@ SessionLocal = sessionmaker(
 )
 
 Base = declarative_base()
+
+
+# ==========================================================
+# INSTRUMENTACIÓN SQL (consultas / tiempo por request, N+1)
+# ==========================================================
+SQL_SLOW_MS = float(os.getenv("SQL_SLOW_MS", "200"))
+SQL_N1_UMBRAL = int(os.getenv("SQL_N1_UMBRAL", "5"))
+SQL_DEBUG = os.getenv("SQL_DEBUG", "0") == "1"  # agrega X-DB-* a las respuestas
+
+logger = logging.getLogger("colibri.sql")
+
+DB_CONSULTAS_REQUEST = Histograma(
+    "colibri_db_consultas_por_request",
+    "Cantidad de sentencias SQL ejecutadas por request.",
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100, 250, 1000),
+)
+DB_TIEMPO_REQUEST = Histograma(
+    "colibri_db_tiempo_por_request_segundos",
+    "Tiempo total en base de datos por request.",
+)
+DB_SOSPECHAS_N1 = Contador(
+    "colibri_db_sospechas_n1_total",
+    "Requests donde una misma forma de sentencia se repitió >= SQL_N1_UMBRAL veces.",
+)
+
+# Listas IN expandidas ("IN (%(id_1_1)s, %(id_1_2)s, ...)") cuentan como una sola forma
+_IN_LISTA_RE = re.compile(r"\bIN\s*\((?:[^()]|\([^()]*\))*\)", re.IGNORECASE)
+
+
+def _forma_sentencia(statement: str) -> str:
+    return _IN_LISTA_RE.sub("IN (...)", " ".join(statement.split()))
+
+
+class EstadisticasSQL:
+    __slots__ = ("consultas", "tiempo", "formas")
+
+    def __init__(self):
+        self.consultas = 0
+        self.tiempo = 0.0
+        self.formas: dict[str, int] = {}
+
+    def registrar(self, statement: str, duracion: float) -> None:
+        self.consultas += 1
+        self.tiempo += duracion
+        forma = _forma_sentencia(statement)
+        self.formas[forma] = self.formas.get(forma, 0) + 1
+
+    def sospechas_n1(self) -> dict[str, int]:
+        return {f: n for f, n in self.formas.items() if n >= SQL_N1_UMBRAL}
+
+
+# El objeto es mutable: los handlers sync que corren en el threadpool
+# heredan una copia del contexto, pero apuntan a la misma instancia.
+_estadisticas_request: ContextVar[EstadisticasSQL | None] = ContextVar("estadisticas_sql", default=None)
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("inicio_consulta", []).append(time.perf_counter())
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    duracion = time.perf_counter() - conn.info["inicio_consulta"].pop()
+
+    stats = _estadisticas_request.get()
+    if stats is not None:
+        stats.registrar(statement, duracion)
+
+    if duracion * 1000 >= SQL_SLOW_MS:
+        logger.warning("SQL lenta (%.1f ms): %s | params=%r", duracion * 1000, statement, parameters)
+
+
+@event.listens_for(engine, "handle_error")
+def _error_al_ejecutar(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("inicio_consulta"):
+        conn.info["inicio_consulta"].pop()
+
+
+class EstadisticasSQLMiddleware:
+    """
+    Abre un contador de consultas por request. Registra sospechas de N+1 en el log
+    y, con SQL_DEBUG=1, devuelve X-DB-Queries / X-DB-Time-Ms / X-DB-N1 en la respuesta.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = EstadisticasSQL()
+        token = _estadisticas_request.set(stats)
+
+        async def send_con_headers(message):
+            if SQL_DEBUG and message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(stats.consultas).encode()))
+                headers.append((b"x-db-time-ms", f"{stats.tiempo * 1000:.1f}".encode()))
+                headers.append((b"x-db-n1", str(len(stats.sospechas_n1())).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_con_headers)
+        finally:
+            _estadisticas_request.reset(token)
+
+            if stats.consultas:
+                DB_CONSULTAS_REQUEST.observe(stats.consultas)
+                DB_TIEMPO_REQUEST.observe(stats.tiempo)
+
+            sospechas = stats.sospechas_n1()
+            if sospechas:
+                DB_SOSPECHAS_N1.inc()
+                for forma, n in sospechas.items():
+                    logger.warning(
+                        "Posible N+1 en %s %s: %d ejecuciones de: %s",
+                        scope["method"], scope["path"], n, forma,
+                    )
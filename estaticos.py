@@ -0,0 +1,109 @@
+# estaticos.py
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from urllib.parse import parse_qs
+
+from anyio import to_thread
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles, NotModifiedResponse
+
+from services.almacenamiento import almacen_revisiones
+
+# ----------------------------
+# CONFIGURACIÓN
+# ----------------------------
+CACHE_INMUTABLE = "public, max-age=31536000, immutable"
+CACHE_REVALIDAR = "public, max-age=0, must-revalidate"
+LARGO_VERSION = 16  # caracteres del sha256 usados en ?v=
+MAX_ETAGS_EN_MEMORIA = int(os.getenv("STATIC_MAX_ETAGS", "20000"))
+
+
+def url_imagen(ruta: str, sha256: str | None) -> str:
+    """URL pública de una imagen; con hash queda versionada (?v=) y cacheable para siempre."""
+    url = almacen_revisiones().url(ruta)
+    return f"{url}?v={sha256[:LARGO_VERSION]}" if sha256 else url
+
+
+# ----------------------------
+# ETAG FUERTE POR CONTENIDO (sha256, cacheado por path + mtime + tamaño)
+# ----------------------------
+_etags: OrderedDict[tuple, str] = OrderedDict()
+_etags_lock = threading.Lock()
+
+
+def sha256_archivo(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def sha256_cacheado(path: str, stat_result: os.stat_result) -> str:
+    clave = (path, stat_result.st_mtime_ns, stat_result.st_size)
+    with _etags_lock:
+        digest = _etags.get(clave)
+        if digest is not None:
+            _etags.move_to_end(clave)
+            return digest
+
+    digest = sha256_archivo(path)
+    with _etags_lock:
+        _etags[clave] = digest
+        while len(_etags) > MAX_ETAGS_EN_MEMORIA:
+            _etags.popitem(last=False)
+    return digest
+
+
+class _RespuestaArchivo(FileResponse):
+    # Menos syscalls por imagen que los 64KB por defecto.
+    # Si el servidor soporta "http.response.pathsend", Starlette delega el envío completo.
+    chunk_size = 256 * 1024
+
+
+class _RespuestaCacheable(Response):
+    """
+    Calcula el ETag fuera del event loop y recién ahí decide 304 / 200 / 206.
+    Rangos (Range / If-Range) los resuelve FileResponse.
+    """
+
+    def __init__(self, static: StaticFiles, full_path: str, stat_result: os.stat_result, status_code: int):
+        self.static = static
+        self.full_path = full_path
+        self.stat_result = stat_result
+        self.status_code = status_code
+
+    async def __call__(self, scope, receive, send):
+        digest = await to_thread.run_sync(sha256_cacheado, str(self.full_path), self.stat_result)
+
+        version = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("v", [""])[0]
+        if version and digest.startswith(version) and self.status_code == 200:
+            cache_control = CACHE_INMUTABLE
+        elif version:
+            # URL vieja apuntando a un archivo que cambió: no fijarla como inmutable
+            cache_control = "no-cache"
+        else:
+            cache_control = CACHE_REVALIDAR
+
+        response = _RespuestaArchivo(
+            self.full_path,
+            status_code=self.status_code,
+            stat_result=self.stat_result,
+            headers={"etag": f'"sha256-{digest[:32]}"', "cache-control": cache_control},
+        )
+        if self.static.is_not_modified(response.headers, Headers(scope=scope)):
+            response = NotModifiedResponse(response.headers)
+        await response(scope, receive, send)
+
+
+class EstaticosCacheables(StaticFiles):
+    """
+    StaticFiles con ETag fuerte por contenido y Cache-Control inmutable para URLs
+    versionadas (?v=<sha256>). Una galería repetida cuesta 0 bytes de imagen.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code=200) -> Response:
+        return _RespuestaCacheable(self, full_path, stat_result, status_code)
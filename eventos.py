@@ -0,0 +1,260 @@
+# eventos.py
+"""
+Feed de cambios en tiempo real: altas / modificaciones / bajas de revisiones y
+unidades, y el avance de la ingesta de imágenes (migraciones/010).
+
+Los triggers hacen pg_notify('colibri_eventos', json) y Postgres lo entrega al
+confirmar a todos los procesos que escuchan: cada worker tiene un hilo con su
+propia conexión en LISTEN que reparte a los clientes conectados (SSE o
+WebSocket), filtrando por finca / sector. Sin clientes no se abre la conexión.
+"""
+import os
+import asyncio
+import logging
+import select
+import threading
+
+import orjson
+from fastapi import APIRouter, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from database import engine
+from metricas import EVENTOS_SUSCRIPTORES, EVENTOS_DESCARTADOS
+
+# ----------------------------
+# CONFIGURACIÓN
+# ----------------------------
+CANAL = "colibri_eventos"
+EVENTOS_COLA = int(os.getenv("EVENTOS_COLA", "1000"))  # eventos pendientes por cliente
+EVENTOS_PING = float(os.getenv("EVENTOS_PING", "15"))  # segundos entre keep-alives
+
+logger = logging.getLogger("colibri.eventos")
+
+
+# ----------------------------
+# SUSCRIPCIONES
+# ----------------------------
+class Suscripcion:
+    def __init__(self, finca_id: int | None = None, sector_id: int | None = None, canal: str = "ws"):
+        self.finca_id = finca_id
+        self.sector_id = sector_id
+        self.canal = canal
+        self.loop = asyncio.get_running_loop()
+        self.cola: asyncio.Queue = asyncio.Queue(maxsize=EVENTOS_COLA)
+        self.desbordada = False
+
+    def acepta(self, evento: dict) -> bool:
+        if evento.get("entidad") == "sistema":
+            return True
+        if self.sector_id is not None and evento.get("sector_id") != self.sector_id:
+            return False
+        if self.finca_id is not None and evento.get("finca_id") != self.finca_id:
+            return False
+        return True
+
+    def _entregar(self, evento: dict) -> None:
+        # Corre en el event loop del cliente
+        try:
+            self.cola.put_nowait(evento)
+        except asyncio.QueueFull:
+            # Cliente lento: se descarta y se le avisa que recargue
+            self.desbordada = True
+            EVENTOS_DESCARTADOS.inc()
+
+    async def siguiente(self, timeout: float) -> dict | None:
+        if self.desbordada:
+            self.desbordada = False
+            return {"entidad": "sistema", "accion": "desbordado"}
+        try:
+            return await asyncio.wait_for(self.cola.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+_suscripciones: set[Suscripcion] = set()
+_lock = threading.Lock()
+
+
+def publicar(evento: dict) -> None:
+    with _lock:
+        destinos = [s for s in _suscripciones if s.acepta(evento)]
+    for s in destinos:
+        try:
+            s.loop.call_soon_threadsafe(s._entregar, evento)
+        except RuntimeError:
+            # Su event loop ya cerró (worker apagándose): se descarta solo a ese cliente
+            desuscribir(s)
+
+
+# ----------------------------
+# ESCUCHA (LISTEN en una conexión propia, fuera del pool)
+# ----------------------------
+class Escucha(threading.Thread):
+    def __init__(self):
+        super().__init__(name="eventos", daemon=True)
+        self._detener = threading.Event()
+
+    def _conectar(self):
+        cargs, cparams = engine.dialect.create_connect_args(engine.url)
+        conn = engine.dialect.dbapi.connect(*cargs, **cparams)
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {CANAL}")
+        return conn
+
+    def run(self):
+        espera = 1.0
+        while not self._detener.is_set():
+            conn = None
+            try:
+                conn = self._conectar()
+                espera = 1.0
+                # Lo que pasó mientras no había conexión se perdió: que los clientes recarguen
+                publicar({"entidad": "sistema", "accion": "conectado"})
+                while not self._detener.is_set():
+                    if select.select([conn], [], [], 1.0)[0]:
+                        conn.poll()
+                        while conn.notifies:
+                            n = conn.notifies.pop(0)
+                            try:
+                                publicar(orjson.loads(n.payload))
+                            except orjson.JSONDecodeError:
+                                logger.warning("Evento inválido en %s: %r", CANAL, n.payload[:200])
+            except Exception as e:
+                logger.warning("LISTEN %s falló (reintento en %.0fs): %s", CANAL, espera, e)
+                self._detener.wait(espera)
+                espera = min(espera * 2, 30.0)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    def detener(self):
+        self._detener.set()
+        self.join(timeout=3)
+
+
+_escucha: Escucha | None = None
+
+
+def suscribir(finca_id: int | None, sector_id: int | None, canal: str) -> Suscripcion:
+    global _escucha
+    s = Suscripcion(finca_id, sector_id, canal)
+    with _lock:
+        _suscripciones.add(s)
+        if _escucha is None or not _escucha.is_alive():
+            _escucha = Escucha()
+            _escucha.start()
+    EVENTOS_SUSCRIPTORES.inc(canal=canal)
+    return s
+
+
+def desuscribir(s: Suscripcion) -> None:
+    with _lock:
+        if s not in _suscripciones:
+            return  # ya la quitó publicar()
+        _suscripciones.discard(s)
+    EVENTOS_SUSCRIPTORES.dec(canal=s.canal)
+
+
+def detener_eventos() -> None:
+    global _escucha
+    if _escucha is not None:
+        _escucha.detener()
+        _escucha = None
+
+
+# ----------------------------
+# ENDPOINTS
+# ----------------------------
+router = APIRouter(prefix="/eventos", tags=["Eventos"])
+
+
+@router.get("")
+async def eventos_sse(
+    request: Request,
+    finca_id: int | None = Query(default=None),
+    sector_id: int | None = Query(default=None),
+):
+    """
+    Server-Sent Events: `event: <entidad>` + `data: <json>` por cada cambio.
+    Con EventSource el API key va en ?api_key= (el navegador no manda headers).
+    Un evento `sistema` (conectado / desbordado) indica que conviene recargar.
+    """
+    async def generar():
+        s = suscribir(finca_id, sector_id, "sse")
+        try:
+            yield b"retry: 3000\n\n"
+            while not await request.is_disconnected():
+                evento = await s.siguiente(EVENTOS_PING)
+                if evento is None:
+                    yield b": ping\n\n"
+                    continue
+                yield b"event: " + evento.get("entidad", "mensaje").encode() + b"\ndata: " + orjson.dumps(evento) + b"\n\n"
+        finally:
+            desuscribir(s)
+
+    return StreamingResponse(
+        generar(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _id_filtro(valor) -> int | None:
+    # Los eventos traen ids enteros: un "3" no coincidiría con ninguno
+    if valor is None:
+        return None
+    if isinstance(valor, bool):
+        raise ValueError
+    if isinstance(valor, int):
+        return valor
+    if isinstance(valor, str) and valor.strip().isdigit():
+        return int(valor)
+    raise ValueError
+
+
+@router.websocket("/ws")
+async def eventos_ws(
+    websocket: WebSocket,
+    finca_id: int | None = Query(default=None),
+    sector_id: int | None = Query(default=None),
+):
+    """
+    Mismos eventos por WebSocket (JSON por mensaje). El cliente puede cambiar el
+    filtro mandando {"finca_id": ..., "sector_id": ...}.
+    """
+    await websocket.accept()
+    s = suscribir(finca_id, sector_id, "ws")
+
+    async def recibir():
+        while True:
+            msg = await websocket.receive_json()
+            try:
+                if not isinstance(msg, dict):
+                    raise ValueError
+                finca, sector = _id_filtro(msg.get("finca_id")), _id_filtro(msg.get("sector_id"))
+            except ValueError:
+                # Se conserva el filtro anterior; el aviso sale por la misma cola que los eventos
+                s._entregar({"entidad": "sistema", "accion": "error", "detalle": "Filtro inválido: finca_id / sector_id deben ser enteros"})
+                continue
+            s.finca_id, s.sector_id = finca, sector
+
+    lector = asyncio.create_task(recibir())
+    try:
+        while not lector.done():
+            evento = await s.siguiente(EVENTOS_PING)
+            await websocket.send_json(evento if evento is not None else {"entidad": "sistema", "accion": "ping"})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        lector.cancel()
+        desuscribir(s)
+        try:
+            await lector  # si terminó con error, se lee acá (no queda "never retrieved")
+        except (asyncio.CancelledError, WebSocketDisconnect):
+            pass
+        except Exception as e:
+            logger.info("WebSocket de eventos cerrado: %s", e)
@@ -0,0 +1,128 @@
+import csv
+import io
+from datetime import date
+from decimal import Decimal
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from database import SessionLocal
+from crud_exportar import COLUMNAS_EXPORT, consulta_exportacion, iterar_lotes, resolver_tipo_revision
+
+router = APIRouter(prefix="/exportar", tags=["Exportar"])
+
+FORMATOS = {
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+# ----------------------------
+# GENERADORES (abren su propia sesión: viven lo que dura la descarga)
+# ----------------------------
+def _filas(stmt):
+    db = SessionLocal()
+    try:
+        yield from iterar_lotes(db, stmt)
+    finally:
+        db.close()
+
+
+def _generar_csv(stmt):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([nombre for nombre, _, _ in COLUMNAS_EXPORT])
+    # El encabezado sale ya, antes de que la consulta devuelva la primera fila
+    yield buffer.getvalue().encode("utf-8")
+
+    for filas in _filas(stmt):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(filas)
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _SalidaParquet(io.RawIOBase):
+    """Sumidero para ParquetWriter: acumula lo escrito hasta que se vacía en la respuesta."""
+
+    def __init__(self):
+        self._partes: list[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._partes.append(bytes(b))
+        self._pos += len(b)
+        return len(b)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def vaciar(self) -> bytes:
+        datos = b"".join(self._partes)
+        self._partes.clear()
+        return datos
+
+
+def _generar_parquet(stmt, pa, pq):
+    schema = pa.schema([(nombre, getattr(pa, tipo)()) for nombre, _, tipo in COLUMNAS_EXPORT])
+    salida = _SalidaParquet()
+    writer = pq.ParquetWriter(salida, schema, compression="zstd")
+    try:
+        # Un row group por lote del cursor
+        for filas in _filas(stmt):
+            arrays = []
+            for campo, col in zip(schema, zip(*filas)):
+                if campo.type == pa.float64():
+                    col = [float(v) if isinstance(v, Decimal) else v for v in col]
+                arrays.append(pa.array(col, type=campo.type))
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield salida.vaciar()
+    finally:
+        writer.close()
+    yield salida.vaciar()
+
+
+# ----------------------------
+# ENDPOINT
+# ----------------------------
+@router.get("/revisiones")
+def exportar_revisiones(
+    formato: str = Query(default="csv"),
+    finca_id: int | None = Query(default=None),
+    sector_id: int | None = Query(default=None),
+    desde: date | None = Query(default=None),
+    hasta: date | None = Query(default=None),
+    tipo: str | None = Query(default=None),
+):
+    """
+    Exporta revision x revision_unitaria x planta en streaming (CSV o Parquet),
+    con memoria constante sin importar la cantidad de filas.
+    """
+    if formato not in FORMATOS:
+        raise HTTPException(status_code=400, detail=f"formato inválido. Debe ser uno de: {sorted(FORMATOS)}")
+
+    tipo_valor, err = resolver_tipo_revision(tipo)
+    if err:
+        raise HTTPException(status_code=400, detail=err)
+
+    stmt = consulta_exportacion(finca_id=finca_id, sector_id=sector_id, desde=desde, hasta=hasta, tipo=tipo_valor)
+
+    if formato == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise HTTPException(status_code=501, detail="Exportación Parquet no disponible (falta pyarrow)")
+        contenido = _generar_parquet(stmt, pa, pq)
+    else:
+        contenido = _generar_csv(stmt)
+
+    nombre = f"revisiones_{date.today():%Y%m%d}.{formato}"
+    return StreamingResponse(
+        contenido,
+        media_type=FORMATOS[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nombre}"'},
+    )
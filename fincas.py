@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 
 from database import SessionLocal
 from schemas import FincaCreate, FincaUpdate, FincaResponse
 from crud_fincas import crear_finca, listar_fincas, obtener_finca, actualizar_finca, eliminar_finca
+from respuestas import parsear_campos, respuesta_filas
 
 router = APIRouter(prefix="/fincas", tags=["Fincas"])
 
@@ -21,9 +22,19 @@ def create_finca(body: FincaCreate, db: Session = Depends(get_db)):
     return crear_finca(db, body)
 
 
-@router.get("", response_model=list[FincaResponse])
-def get_fincas(skip: int = 0, limit: int = 50, db: Session = Depends(get_db)):
-    return listar_fincas(db, skip=skip, limit=limit)
+@router.get(
+    "",
+    response_model=None,  # respuesta_filas no pasa por el modelo
+    responses={200: {"model": list[FincaResponse], "description": "Con `fields`, cada objeto trae solo esas columnas"}},
+)
+def get_fincas(
+    skip: int = 0,
+    limit: int = 50,
+    fields: str | None = Query(default=None, description="Columnas a devolver, ej. id,nombre (el resto no viene en la respuesta)"),
+    db: Session = Depends(get_db),
+):
+    campos = parsear_campos(fields, FincaResponse)
+    return respuesta_filas(listar_fincas(db, skip=skip, limit=limit, campos=campos))
 
 
 @router.get("/{finca_id}", response_model=FincaResponse)
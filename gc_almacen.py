@@ -0,0 +1,399 @@
+# gc_almacen.py
+"""
+Recolector de basura del almacenamiento: recorre los archivos / objetos por
+lotes, consulta en bloque cuáles siguen referenciados en la BD y borra el resto
+(solo si son más viejos que GC_GRACIA_HORAS, para no pisar subidas en curso).
+
+Objetivos (prefijos conocidos; lo que no encaja en ninguno no se toca):
+  blobs       blobs/...                 en ALMACEN_REVISIONES  (imagen_blob / revision_imagen)
+  temporales  .tmp/...                  en storage local       (nunca referenciados)
+  revisiones  revisiones/<id>/...       en ALMACEN_REVISIONES  (legado: renamed/ y original/)
+  originales  originales/...            en ALMACEN_ORIGINALES  (revision_imagen.ruta_original)
+  qr          revisiones/revisiones_imgs/revision_<id>/...  en ALMACEN_QR
+
+Incremental: cada pasada examina a lo sumo `max_objetos` y devuelve
+`ultima_clave`, que se pasa como `desde` para seguir. Los borrados se
+espacian (GC_BORRADOS_POR_SEG) y hay una pausa entre lotes (GC_PAUSA), así
+que POST /admin/almacen/gc corre en segundo plano y devuelve un id para
+consultar el reporte (GET /admin/almacen/gc/{id}).
+
+Uso:
+    python gc_almacen.py                       # reporte (dry-run) de todos los objetivos
+    python gc_almacen.py --objetivo blobs --aplicar
+"""
+import os
+import time
+import uuid
+import logging
+import argparse
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import PurePosixPath
+from typing import Callable
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from auth_simple import require_admin_key
+from database import SessionLocal
+from models import ImagenBlob, Imagen, Revision, RevisionImagen
+from crud_imagenes import liberar_blobs_sin_referencias
+from services.almacenamiento import obtener_almacen, ALMACEN_REVISIONES, ALMACEN_QR
+from services.normalizacion import ALMACEN_ORIGINALES
+from services import blob_store
+
+# ----------------------------
+# CONFIGURACIÓN
+# ----------------------------
+GC_GRACIA_HORAS = float(os.getenv("GC_GRACIA_HORAS", "24"))
+GC_LOTE = int(os.getenv("GC_LOTE", "500"))
+GC_MAX_OBJETOS = int(os.getenv("GC_MAX_OBJETOS", "10000"))  # por pasada / request
+GC_PAUSA = float(os.getenv("GC_PAUSA", "0.2"))  # segundos entre lotes
+GC_BORRADOS_POR_SEG = float(os.getenv("GC_BORRADOS_POR_SEG", "50"))
+
+MUESTRA_HUERFANOS = 20
+QR_PREFIJO = "revisiones/revisiones_imgs/"
+EJECUCIONES_GUARDADAS = 20  # reportes de POST /gc que se conservan en memoria
+
+logger = logging.getLogger("colibri.gc_almacen")
+
+
+# ----------------------------
+# REFERENCIAS (una consulta por lote)
+# ----------------------------
+def _sha_de_clave(clave: str) -> str:
+    return PurePosixPath(clave).name.split(".", 1)[0]
+
+
+def _id_revision(parte: str) -> int | None:
+    parte = parte.removeprefix("revision_")
+    return int(parte) if parte.isdigit() else None
+
+
+def _referencias_blobs(db: Session, claves: list[str]) -> set[str]:
+    shas = {_sha_de_clave(c) for c in claves}
+    usadas = set(db.scalars(select(ImagenBlob.ruta).where(ImagenBlob.sha256.in_(shas))))
+    usadas.update(db.scalars(select(RevisionImagen.ruta).where(RevisionImagen.sha256.in_(shas))))
+    return usadas
+
+
+def _referencias_originales(db: Session, claves: list[str]) -> set[str]:
+    return set(db.scalars(select(RevisionImagen.ruta_original).where(RevisionImagen.ruta_original.in_(claves))))
+
+
+def _referencias_revisiones(db: Session, claves: list[str]) -> set[str]:
+    """
+    Legado (revisiones/<id>/renamed|original/...): se conserva lo que apunta una
+    fila de revision_imagen y los original/ de revisiones que siguen existiendo
+    (es la única copia del ZIP original). Las carpetas QR (mismo backend) se
+    conservan mientras exista la revisión.
+    """
+    ids = {}
+    for c in claves:
+        partes = c.split("/")
+        if c.startswith(QR_PREFIJO):
+            ids[c] = _id_revision(partes[2]) if len(partes) > 3 else None
+        else:
+            ids[c] = _id_revision(partes[1]) if len(partes) > 2 else None
+
+    conocidos = {i for i in ids.values() if i is not None}
+    existentes = set(db.scalars(select(Revision.id).where(Revision.id.in_(conocidos))))
+    rutas = set(db.scalars(
+        select(RevisionImagen.ruta).where(RevisionImagen.revision_id.in_(existentes), RevisionImagen.ruta.in_(claves))
+    ))
+
+    conservar = set()
+    for c, rid in ids.items():
+        if rid is None or c in rutas:
+            conservar.add(c)  # estructura desconocida: no se toca
+        elif rid in existentes and (c.startswith(QR_PREFIJO) or c.split("/")[2:3] == ["original"]):
+            conservar.add(c)
+    return conservar
+
+
+def _referencias_qr(db: Session, claves: list[str]) -> set[str]:
+    ids = {c: _id_revision(c.split("/")[2]) if c.count("/") > 2 else None for c in claves}
+    existentes = set(db.scalars(select(Revision.id).where(Revision.id.in_({i for i in ids.values() if i}))))
+    usadas = set(db.scalars(select(Imagen.url).where(Imagen.url.in_(claves))))
+    return {c for c, rid in ids.items() if rid is None or rid in existentes or c in usadas}
+
+
+def _sin_referencias(db: Session, claves: list[str]) -> set[str]:
+    return set()
+
+
+# ----------------------------
+# BORRADO
+# ----------------------------
+def _borrar_blobs(db: Session, backend, huerfanos: list[tuple[str, int]]) -> None:
+    """
+    Los blobs huérfanos no se borran acá: se dan de alta en imagen_blob con
+    ref_count 0 y los borra liberar_blobs_sin_referencias(), con la fila
+    bloqueada (una subida concurrente del mismo contenido la espera y reescribe
+    el archivo).
+    """
+    por_sha = {_sha_de_clave(c): (c, t) for c, t in huerfanos}
+    nuevas = [
+        {"sha256": sha, "ruta": c, "tamano_bytes": t, "ref_count": 0}
+        for sha, (c, t) in sorted(por_sha.items())
+    ]
+    db.execute(pg_insert(ImagenBlob).values(nuevas).on_conflict_do_nothing())
+    db.commit()
+    liberar_blobs_sin_referencias(db, limite=len(nuevas))
+    time.sleep(len(huerfanos) / GC_BORRADOS_POR_SEG)
+
+
+def _borrar_directo(db: Session, backend, huerfanos: list[tuple[str, int]]) -> None:
+    for clave, _ in huerfanos:
+        backend.borrar(clave)
+        time.sleep(1 / GC_BORRADOS_POR_SEG)
+
+
+@dataclass(frozen=True)
+class Objetivo:
+    almacen: str | None  # backend de services/almacenamiento.py (None: no configurado)
+    prefijo: str
+    referencias: Callable[[Session, list[str]], set[str]]
+    borrar: Callable = _borrar_directo
+
+
+def objetivos() -> dict[str, Objetivo]:
+    return {
+        "blobs": Objetivo(ALMACEN_REVISIONES, f"{blob_store.BLOBS_DIR}/", _referencias_blobs, _borrar_blobs),
+        "temporales": Objetivo("local", f"{blob_store.TMP_DIR}/", _sin_referencias),
+        "revisiones": Objetivo(ALMACEN_REVISIONES, "revisiones/", _referencias_revisiones),
+        "originales": Objetivo(ALMACEN_ORIGINALES, "originales/", _referencias_originales),
+        # Si comparte backend con las revisiones ya lo cubre "revisiones"
+        "qr": Objetivo(ALMACEN_QR if ALMACEN_QR != ALMACEN_REVISIONES else None, QR_PREFIJO, _referencias_qr),
+    }
+
+
+# ----------------------------
+# PASADA
+# ----------------------------
+def _por_lotes(backend, prefijo: str, desde: str | None):
+    lote = []
+    for clave, tamano, mtime in backend.listar(prefijo):
+        if desde and clave <= desde:
+            continue
+        lote.append((clave, tamano, mtime))
+        if len(lote) >= GC_LOTE:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def recolectar(
+    db: Session,
+    nombre: str,
+    aplicar: bool = False,
+    desde: str | None = None,
+    max_objetos: int = GC_MAX_OBJETOS,
+    gracia_horas: float = GC_GRACIA_HORAS,
+) -> dict:
+    objetivo = objetivos()[nombre]
+    reporte = {
+        "objetivo": nombre,
+        "almacen": objetivo.almacen,
+        "aplicar": aplicar,
+        "examinados": 0,
+        "recientes": 0,
+        "huerfanos": 0,
+        "bytes_recuperables": 0,
+        "borrados": 0,
+        "bytes_borrados": 0,
+        "errores": 0,
+        "muestra": [],
+        "ultima_clave": desde,
+        "completo": True,
+    }
+    if not objetivo.almacen:
+        reporte["omitido"] = "Objetivo sin backend configurado"
+        return reporte
+
+    backend = obtener_almacen(objetivo.almacen)
+    if not (backend.puede_listar and backend.puede_borrar):
+        reporte["omitido"] = f"El backend {backend.nombre} no admite listar / borrar"
+        return reporte
+
+    limite_mtime = time.time() - gracia_horas * 3600
+    for lote in _por_lotes(backend, objetivo.prefijo, desde):
+        restantes = max_objetos - reporte["examinados"]
+        if restantes <= 0:
+            reporte["completo"] = False
+            break
+        if len(lote) > restantes:
+            lote = lote[:restantes]
+            reporte["completo"] = False
+        reporte["examinados"] += len(lote)
+        reporte["ultima_clave"] = lote[-1][0]
+
+        viejos = [(c, t) for c, t, m in lote if m < limite_mtime]
+        reporte["recientes"] += len(lote) - len(viejos)
+        if not viejos:
+            continue
+
+        conservar = objetivo.referencias(db, [c for c, _ in viejos])
+        db.rollback()  # no retener el snapshot entre lotes
+        huerfanos = [(c, t) for c, t in viejos if c not in conservar]
+        reporte["huerfanos"] += len(huerfanos)
+        reporte["bytes_recuperables"] += sum(t for _, t in huerfanos)
+        reporte["muestra"].extend(c for c, _ in huerfanos[: MUESTRA_HUERFANOS - len(reporte["muestra"])])
+
+        if aplicar and huerfanos:
+            try:
+                objetivo.borrar(db, backend, huerfanos)
+                reporte["borrados"] += len(huerfanos)
+                reporte["bytes_borrados"] += sum(t for _, t in huerfanos)
+            except Exception as e:
+                db.rollback()
+                reporte["errores"] += 1
+                logger.warning("GC %s: error borrando lote hasta %s: %s", nombre, lote[-1][0], e)
+
+        if not reporte["completo"]:
+            break
+        time.sleep(GC_PAUSA)  # no competir con el tráfico
+    else:
+        reporte["ultima_clave"] = None  # recorrido completo: la próxima pasada empieza de cero
+
+    return reporte
+
+
+# ----------------------------
+# ENDPOINTS ADMIN
+# ----------------------------
+router = APIRouter(
+    prefix="/admin/almacen",
+    tags=["Admin"],
+    dependencies=[Depends(require_admin_key)],
+)
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _validar(objetivo: str | None, desde: str | None) -> list[str]:
+    nombres = list(objetivos())
+    if objetivo is not None and objetivo not in nombres:
+        raise HTTPException(status_code=400, detail=f"objetivo inválido. Debe ser uno de: {nombres}")
+    if objetivo is None and desde:
+        raise HTTPException(status_code=400, detail="desde requiere un objetivo")
+    return [objetivo] if objetivo else nombres
+
+
+def _pasada(db: Session, nombres: list[str], aplicar: bool, desde: str | None, max_objetos: int) -> dict:
+    inicio = datetime.now()
+    reportes = [recolectar(db, n, aplicar=aplicar, desde=desde, max_objetos=max_objetos) for n in nombres]
+    return {
+        "inicio": inicio.isoformat(),
+        "segundos": round((datetime.now() - inicio).total_seconds(), 3),
+        "gracia_horas": GC_GRACIA_HORAS,
+        "reportes": reportes,
+    }
+
+
+# Pasadas con borrado lanzadas por POST /gc (por proceso, las últimas EJECUCIONES_GUARDADAS)
+_ejecuciones: OrderedDict[str, dict] = OrderedDict()
+_ejecuciones_lock = threading.Lock()
+
+
+def _ejecutar_en_segundo_plano(ejecucion: dict, nombres: list[str], desde: str | None, max_objetos: int) -> None:
+    db = SessionLocal()
+    try:
+        resultado = {"estado": "terminado", **_pasada(db, nombres, True, desde, max_objetos)}
+    except Exception as e:
+        logger.warning("GC %s falló: %s", ejecucion["id"], e)
+        resultado = {"estado": "error", "error": str(e)}
+    finally:
+        db.close()
+    with _ejecuciones_lock:
+        ejecucion.update(resultado)
+
+
+@router.get("/gc")
+def reporte_gc(
+    objetivo: str | None = Query(default=None),
+    desde: str | None = Query(default=None),
+    max_objetos: int = Query(default=GC_MAX_OBJETOS, ge=1, le=1_000_000),
+    db: Session = Depends(get_db),
+):
+    """Dry-run: qué se borraría y cuántos bytes se recuperarían."""
+    return _pasada(db, _validar(objetivo, desde), False, desde, max_objetos)
+
+
+@router.post("/gc", status_code=202)
+def ejecutar_gc(
+    objetivo: str | None = Query(default=None),
+    desde: str | None = Query(default=None),
+    max_objetos: int = Query(default=GC_MAX_OBJETOS, ge=1, le=1_000_000),
+):
+    """
+    Lanza la pasada con borrado en segundo plano (con los borrados espaciados
+    dura más que cualquier timeout de proxy). El reporte queda en
+    GET /admin/almacen/gc/{id}.
+    """
+    nombres = _validar(objetivo, desde)
+    with _ejecuciones_lock:
+        if any(e["estado"] == "en_curso" for e in _ejecuciones.values()):
+            raise HTTPException(status_code=409, detail="Ya hay una pasada del GC en curso")
+        ejecucion = {"id": uuid.uuid4().hex[:12], "estado": "en_curso", "objetivos": nombres}
+        _ejecuciones[ejecucion["id"]] = ejecucion
+        while len(_ejecuciones) > EJECUCIONES_GUARDADAS:
+            _ejecuciones.popitem(last=False)
+
+    threading.Thread(
+        target=_ejecutar_en_segundo_plano,
+        args=(ejecucion, nombres, desde, max_objetos),
+        name=f"gc-{ejecucion['id']}",
+        daemon=True,
+    ).start()
+    return {"id": ejecucion["id"], "estado": "en_curso", "reporte": f"{router.prefix}/gc/{ejecucion['id']}"}
+
+
+@router.get("/gc/{ejecucion_id}")
+def ver_ejecucion_gc(ejecucion_id: str):
+    with _ejecuciones_lock:
+        ejecucion = _ejecuciones.get(ejecucion_id)
+        if ejecucion is None:
+            raise HTTPException(status_code=404, detail="Ejecución del GC no encontrada")
+        return dict(ejecucion)
+
+
+# ----------------------------
+# CLI (cron)
+# ----------------------------
+def main():
+    ap = argparse.ArgumentParser(description="Recolector de basura del almacenamiento")
+    ap.add_argument("--objetivo", choices=list(objetivos()), help="por defecto, todos")
+    ap.add_argument("--aplicar", action="store_true", help="borrar (sin esto solo reporta)")
+    ap.add_argument("--max-objetos", type=int, default=GC_MAX_OBJETOS, help="por pasada")
+    args = ap.parse_args()
+
+    db = SessionLocal()
+    try:
+        for nombre in [args.objetivo] if args.objetivo else list(objetivos()):
+            desde, total = None, {}
+            while True:
+                r = recolectar(db, nombre, aplicar=args.aplicar, desde=desde, max_objetos=args.max_objetos)
+                for k in ("examinados", "recientes", "huerfanos", "bytes_recuperables", "borrados", "bytes_borrados", "errores"):
+                    total[k] = total.get(k, 0) + r[k]
+                if r["completo"] or r.get("omitido"):
+                    break
+                desde = r["ultima_clave"]
+            print(f"{nombre:<11}", r.get("omitido") or ", ".join(f"{k}={v:,}" for k, v in total.items()))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,17 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Form
-import io, zipfile
-import requests
-import numpy as np
-import cv2
-import zxingcpp
+import io, time, zipfile
+from pathlib import Path
 from typing import List, Optional
 
+from metricas import IMAGENES_DECODIFICADAS, SUBIDAS_WORKER, BYTES_PROCESADOS, IMAGENES_PROCESADAS, ARRANQUE_SEGUNDOS
+
+from services.almacenamiento import almacen_qr, tipo_contenido
+from services.normalizacion import normalizar_en_orden
+
+# cv2 / numpy / zxingcpp se importan en cargar_stack_imagen()
+# (primer uso o warm-up) para no pagarlos en cada arranque en frío
+np = cv2 = zxingcpp = None
+
 router = APIRouter(prefix="/imagenes", tags=["Imagenes"])
 
 # ----------------------------
@@ -19,36 +25,60 @@ MAX_SINGLE_FILE_UNCOMPRESSED = 25_000_000
 MAX_ZIP_SIZE = 2_000_000_000
 BATCH_SIZE = 400  # Procesar en lotes de 400
 
-# URL del Worker
-WORKER_UPLOAD_URL = "https://floral-dawn-a37d.omarhgd34.workers.dev"
-
 # ----------------------------
 # FUNCIONES AUXILIARES
 # ----------------------------
+def cargar_stack_imagen() -> None:
+    global np, cv2, zxingcpp
+    if cv2 is not None:
+        return
+
+    t0 = time.perf_counter()
+    import numpy as _np
+    import zxingcpp as _zxingcpp
+    import cv2 as _cv2
+
+    np, zxingcpp = _np, _zxingcpp
+    cv2 = _cv2  # último: marca el stack como cargado
+    ARRANQUE_SEGUNDOS.set(time.perf_counter() - t0, fase="stack_imagen")
+
+def inicializar_decodificadores() -> None:
+    """Warm-up: primera llamada a imdecode / read_barcodes sin tocar métricas de dominio."""
+    cargar_stack_imagen()
+    ok, buf = cv2.imencode(".jpg", np.full((64, 64, 3), 255, np.uint8))
+    if ok:
+        img = cv2.imdecode(buf, cv2.IMREAD_COLOR)
+        zxingcpp.read_barcodes(cv2.cvtColor(img, cv2.COLOR_BGR2RGB))
+
 def _is_allowed(name: str) -> bool:
     return any(name.lower().endswith(ext) for ext in ALLOWED_EXTS)
 
 def _decode_qr_from_bytes(img_bytes: bytes) -> List[str]:
+    cargar_stack_imagen()
     np_img = np.frombuffer(img_bytes, np.uint8)
     img = cv2.imdecode(np_img, cv2.IMREAD_COLOR)
     if img is None:
+        IMAGENES_DECODIFICADAS.inc(resultado="ilegible")
         return []
     img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
     results = zxingcpp.read_barcodes(img_rgb)
-    return [r.text for r in results if r.text]
+    textos = [r.text for r in results if r.text]
+    IMAGENES_DECODIFICADAS.inc(resultado="con_qr" if textos else "sin_qr")
+    return textos
 
 def upload_to_worker(filename: str, img_bytes: bytes, folder: Optional[str] = None) -> str:
     """
-    Envía la imagen al Worker y obtiene el 'key' (ruta con carpeta) donde se guardó en R2.
+    Sube la imagen al backend ALMACEN_QR (por defecto el Worker R2) y devuelve
+    la 'key' (ruta con carpeta) donde quedó guardada.
     """
-    files = {"file": (filename, img_bytes, "image/jpeg")}
-    data = {"carpeta": folder} if folder else {}
+    clave = f"{folder}/{filename}" if folder else filename
 
     try:
-        resp = requests.post(WORKER_UPLOAD_URL, files=files, data=data, timeout=60)
-        resp.raise_for_status()
-        return resp.json().get("key", "")
+        key = almacen_qr().escribir(clave, io.BytesIO(img_bytes), tipo_contenido(filename))
+        SUBIDAS_WORKER.inc(resultado="ok")
+        return key
     except Exception as e:
+        SUBIDAS_WORKER.inc(resultado="error")
         print(f"Error subiendo {filename} al worker:", e)
         return ""
 
@@ -76,6 +106,16 @@ async def leer_qr_zip(
     except Exception:
         raise HTTPException(status_code=400, detail="ZIP inválido")
 
+    return procesar_qr_zip(zf, revision_id)
+
+
+def procesar_qr_zip(zf: zipfile.ZipFile, revision_id: int) -> dict:
+    """
+    Lee los QR de cada imagen del ZIP y las sube a ALMACEN_QR. Recibe el ZipFile
+    ya abierto: en memoria (leer_qr_zip) o desde disco (subidas reanudables).
+    Las imágenes se normalizan antes (services/normalizacion.py), en paralelo:
+    se sube y se decodifica la versión reducida.
+    """
     infos = [i for i in zf.infolist() if not i.is_dir()]
     if not infos:
         raise HTTPException(status_code=400, detail="ZIP vacío")
@@ -95,6 +135,7 @@ async def leer_qr_zip(
     # ----------------------------
     for i in range(0, len(infos), BATCH_SIZE):
         lote = infos[i:i+BATCH_SIZE]
+        validas = []  # (posición en resultados, info)
 
         for info in lote:
             name = info.filename
@@ -113,33 +154,54 @@ async def leer_qr_zip(
                 })
                 continue
 
+            resultados.append(None)  # se completa abajo, mantiene el orden del ZIP
+            validas.append((len(resultados) - 1, info))
+
+        ilegibles = set()
+
+        def _leer():
+            for pos, info in validas:
+                try:
+                    img_bytes = zf.read(info)
+                    IMAGENES_PROCESADAS.inc(flujo="qr_zip")
+                    BYTES_PROCESADOS.inc(len(img_bytes), flujo="qr_zip")
+                except Exception:
+                    ilegibles.add(pos)
+                    img_bytes = b""
+                yield img_bytes, Path(info.filename).suffix.lower()
+
+        for (pos, info), img in zip(validas, normalizar_en_orden(_leer())):
+            name = info.filename
             try:
-                img_bytes = zf.read(info)
+                if pos in ilegibles:
+                    raise ValueError("No se pudo leer la imagen del ZIP")
 
                 url_key = ""
                 if DEBUG_SAVE:
-                    safe_name = name.replace("/", "_")
+                    safe_name = str(Path(name.replace("/", "_")).with_suffix(img.ext))
                     # Guardar en R2 dentro de la carpeta dinámica de la revisión
-                    url_key = upload_to_worker(safe_name, img_bytes, folder=carpeta_revision)
+                    url_key = upload_to_worker(safe_name, img.datos, folder=carpeta_revision)
 
-                qrs = _decode_qr_from_bytes(img_bytes)
+                qrs = _decode_qr_from_bytes(img.datos)
 
-                resultados.append({
+                resultados[pos] = {
                     "archivo": name,
                     "ok": bool(qrs),
                     "qr": qrs,
                     "key_de_r2": url_key
-                })
+                }
+                if img.ruta_original:
+                    resultados[pos]["ruta_original"] = img.ruta_original
                 leidas += 1
 
             except Exception:
                 errores += 1
-                resultados.append({
+                resultados[pos] = {
                     "archivo": name,
                     "ok": False,
                     "qr": [],
                     "error": "Error procesando"
-                })
+                }
 
     return {
         "revision_id": revision_id,
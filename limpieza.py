@@ -0,0 +1,218 @@
+# limpieza.py
+"""
+Tareas periódicas en segundo plano: vaciar la cola de limpieza del
+almacenamiento, podar bajas de /sync, refrescar productividad y crear
+particiones. Corren en el hilo LimpiezaWorker del servidor o, con
+LIMPIEZA_WORKER=0, desde cron.
+
+Uso:
+    python limpieza.py      # una pasada de todas las tareas
+"""
+import os
+import shutil
+import argparse
+import logging
+import threading
+from datetime import timedelta
+
+from sqlalchemy import select, delete, update, func
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import limpieza_almacen
+from crud_imagenes import liberar_blobs_sin_referencias
+from crud_sync import podar_tombstones
+from crud_productividad import refrescar_productividad
+from particiones import asegurar_particiones
+from services.almacenamiento import almacen_revisiones, almacen_qr
+
+# ----------------------------
+# CONFIGURACIÓN
+# ----------------------------
+# LIMPIEZA_WORKER=0: no se arranca el hilo; las tareas quedan a cargo de `python limpieza.py` (cron)
+LIMPIEZA_WORKER = os.getenv("LIMPIEZA_WORKER", "1") == "1"
+LIMPIEZA_INTERVALO = float(os.getenv("LIMPIEZA_INTERVALO", "30"))  # segundos entre pasadas
+LIMPIEZA_LOTE = int(os.getenv("LIMPIEZA_LOTE", "100"))
+LIMPIEZA_MAX_INTENTOS = int(os.getenv("LIMPIEZA_MAX_INTENTOS", "10"))
+
+logger = logging.getLogger("colibri.limpieza")
+
+_ALMACENES = {"revisiones": almacen_revisiones, "qr": almacen_qr}
+
+
+# ----------------------------
+# PROCESAR LA COLA
+# ----------------------------
+def _vaciar_prefijo(almacen: str, prefijo: str) -> int:
+    backend = _ALMACENES[almacen]()
+    if not (backend.puede_listar and backend.puede_borrar):
+        return 0  # el Worker R2 solo admite subidas: no hay forma de borrar desde acá
+    claves = [clave for clave, _, _ in backend.listar(prefijo)]
+    for clave in claves:
+        backend.borrar(clave)
+    if backend.nombre == "local":
+        # La carpeta es de una sola revisión (no la comparte nadie): se quita entera
+        shutil.rmtree(backend.ruta_local(prefijo), ignore_errors=True)
+    return len(claves)
+
+
+def procesar_limpieza(db: Session, lote: int = LIMPIEZA_LOTE) -> dict:
+    """
+    Vacía las carpetas encoladas por el trigger de migraciones/007 y después
+    libera los blobs que quedaron sin referencias. Las filas se toman con
+    SKIP LOCKED: varios procesos pueden correr el worker a la vez.
+    """
+    lim = limpieza_almacen
+    filas = db.execute(
+        select(lim.c.id, lim.c.almacen, lim.c.prefijo, lim.c.intentos)
+        .where(lim.c.proximo_intento <= func.now())
+        .order_by(lim.c.id)
+        .limit(lote)
+        .with_for_update(skip_locked=True)
+    ).all()
+
+    hechas, archivos, fallidas = [], 0, 0
+    for id_, almacen, prefijo, intentos in filas:
+        try:
+            archivos += _vaciar_prefijo(almacen, prefijo)
+            hechas.append(id_)
+        except Exception as e:
+            fallidas += 1
+            if intentos + 1 >= LIMPIEZA_MAX_INTENTOS:
+                logger.warning("Limpieza de %s:%s descartada tras %s intentos: %s", almacen, prefijo, intentos + 1, e)
+                hechas.append(id_)
+                continue
+            db.execute(
+                update(lim)
+                .where(lim.c.id == id_)
+                .values(
+                    intentos=intentos + 1,
+                    proximo_intento=func.now() + timedelta(minutes=2 ** intentos),
+                    ultimo_error=str(e)[:1000],
+                )
+            )
+
+    if hechas:
+        db.execute(delete(lim).where(lim.c.id.in_(hechas)))
+    db.commit()
+
+    blobs = liberar_blobs_sin_referencias(db)
+    return {"carpetas": len(hechas), "archivos": archivos, "fallidas": fallidas, "blobs": blobs}
+
+
+# ----------------------------
+# PASADA
+# ----------------------------
+_TAREAS = [
+    ("limpieza", procesar_limpieza),
+    ("tombstones", podar_tombstones),  # bajas viejas de GET /sync (migraciones/009)
+    ("productividad", refrescar_productividad),  # días marcados por migraciones/006
+    ("particiones", asegurar_particiones),  # tramos por delante (migraciones/013)
+]
+
+
+def pasada(db: Session) -> dict:
+    """
+    Corre cada tarea una vez. Son independientes: si una falla (por ej. falta
+    su migración) se registra y las demás siguen. Devuelve el resultado de
+    cada una (None si falló).
+    """
+    resultados = {}
+    for nombre, tarea in _TAREAS:
+        try:
+            resultados[nombre] = tarea(db)
+        except Exception as e:
+            db.rollback()
+            logger.warning("Tarea %s en segundo plano falló: %s", nombre, e)
+            resultados[nombre] = None
+    return resultados
+
+
+def _lote_completo(resultados: dict) -> bool:
+    res = resultados["limpieza"]
+    return res is not None and res["carpetas"] + res["fallidas"] >= LIMPIEZA_LOTE
+
+
+# ----------------------------
+# WORKER EN SEGUNDO PLANO
+# ----------------------------
+class LimpiezaWorker(threading.Thread):
+    """
+    Corre una pasada cada LIMPIEZA_INTERVALO segundos, o enseguida cuando un
+    borrado llama a despertar_limpieza(). Mientras haya lotes completos en la
+    cola sigue sin esperar. Como crea las particiones que falten, el alta de
+    una revisión no tiene que hacerlo.
+    """
+
+    def __init__(self, intervalo: float = LIMPIEZA_INTERVALO):
+        super().__init__(name="limpieza", daemon=True)
+        self.intervalo = intervalo
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+
+    def run(self):
+        while not self._detener.is_set():
+            self._despertar.clear()
+            try:
+                db = SessionLocal()
+                try:
+                    resultados = pasada(db)
+                finally:
+                    db.close()
+                if _lote_completo(resultados):
+                    continue
+            except Exception as e:
+                logger.warning("Limpieza en segundo plano falló: %s", e)
+            self._despertar.wait(self.intervalo)
+
+    def despertar(self):
+        self._despertar.set()
+
+    def detener(self):
+        self._detener.set()
+        self._despertar.set()
+        self.join(timeout=5)
+
+
+_worker: LimpiezaWorker | None = None
+
+
+def iniciar_limpieza() -> None:
+    global _worker
+    if LIMPIEZA_WORKER and _worker is None:
+        _worker = LimpiezaWorker()
+        _worker.start()
+
+
+def detener_limpieza() -> None:
+    global _worker
+    if _worker is not None:
+        _worker.detener()
+        _worker = None
+
+
+def despertar_limpieza() -> None:
+    """Llamar después del commit de un borrado: la respuesta no espera la limpieza."""
+    if _worker is not None:
+        _worker.despertar()
+
+
+# ----------------------------
+# CLI (cron)
+# ----------------------------
+def main():
+    argparse.ArgumentParser(description="Una pasada de las tareas en segundo plano").parse_args()
+    db = SessionLocal()
+    try:
+        while True:
+            resultados = pasada(db)
+            for nombre, res in resultados.items():
+                print(f"{nombre:<14}", "falló (ver log)" if res is None else res)
+            if not _lote_completo(resultados):
+                break
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
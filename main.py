@@ -1,6 +1,9 @@
+import time
+
+_T_IMPORTS = time.perf_counter()
+
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 
 from fincas import router as fincas_router
@@ -10,26 +13,50 @@ from revisiones import router as revisiones_router
 from usuarios import router as usuarios_router
 from catalogos import router as catalogos_router
 from imagenes import router as imagenes_router
+from perfilado import router as perfiles_router
+from subidas import router as subidas_router
+from exportar import router as exportar_router
+from busqueda import router as busqueda_router
+from cuadrillas import router as cuadrillas_router
+from analitica import router as analitica_router
+from gc_almacen import router as gc_almacen_router
+from sync import router as sync_router
+from eventos import router as eventos_router
+from plantas import router as plantas_router
+from crud_plantas_count import router as conteos_router
+from particiones import router as particiones_router
 
 from auth_simple import require_api_key
+from estaticos import EstaticosCacheables
+from respuestas import RespuestaJSON
+from metricas import MetricasMiddleware, endpoint_metricas
+from database import EstadisticasSQLMiddleware
+from perfilado import PerfiladoMiddleware, perfilado_habilitado
+from arranque import lifespan, registrar_fase
+from services.almacenamiento import STORAGE_ROOT
+
+registrar_fase("imports", time.perf_counter() - _T_IMPORTS)
 
 # ------------------------
-# Crear carpeta storage para StaticFiles
+# Crear carpeta storage (STORAGE_ROOT) para StaticFiles
 # ------------------------
-Path("storage").mkdir(parents=True, exist_ok=True)
+Path(STORAGE_ROOT).mkdir(parents=True, exist_ok=True)
 
 # ------------------------
 # APP (API_KEY GLOBAL)
 # ------------------------
 app = FastAPI(
     title="El Colibri API",
-    dependencies=[Depends(require_api_key)]
+    dependencies=[Depends(require_api_key)],
+    lifespan=lifespan,  # warm-up opcional (WARMUP=1) + reporte de tiempos de arranque
+    default_response_class=RespuestaJSON,  # orjson (respuestas.py)
 )
 
 # ------------------------
 # Montar estáticos DESPUÉS de crear app
 # ------------------------
-app.mount("/static", StaticFiles(directory="storage"), name="static")
+# ETag fuerte por contenido + Cache-Control inmutable para URLs ?v=<sha256>
+app.mount("/static", EstaticosCacheables(directory=STORAGE_ROOT), name="static")
 
 # ------------------------
 # CORS
@@ -45,8 +72,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],    # Permite GET, POST, PUT, DELETE, OPTIONS, etc.
     allow_headers=["*"],    # Permite todos los headers (incluyendo x-api-key)
+    # Subidas reanudables: el navegador necesita leer el offset y la ubicación
+    expose_headers=["Location", "Upload-Offset", "Upload-Length", "Tus-Resumable"],
 )
 
+# ------------------------
+# MÉTRICAS (latencia / requests por ruta)
+# ------------------------
+app.add_middleware(MetricasMiddleware, router=app.router)
+
+# Consultas SQL por request (N+1, headers X-DB-* con SQL_DEBUG=1)
+app.add_middleware(EstadisticasSQLMiddleware)
+
+# Perfilado bajo demanda (X-Profile + X-Admin-Key, o PROFILE_SAMPLE_RATE)
+if perfilado_habilitado():
+    app.add_middleware(PerfiladoMiddleware)
+
+# /metrics se registra como ruta Starlette: queda fuera de require_api_key
+# (usa METRICS_TOKEN propio si está definido)
+app.add_route("/metrics", endpoint_metricas, methods=["GET"], include_in_schema=False)
+
 # ------------------------
 # REGISTRAR ROUTERS
 # ------------------------
@@ -57,6 +102,18 @@ app.include_router(revisiones_router)
 app.include_router(usuarios_router)
 app.include_router(catalogos_router)
 app.include_router(imagenes_router)
+app.include_router(perfiles_router)
+app.include_router(subidas_router)
+app.include_router(exportar_router)
+app.include_router(busqueda_router)
+app.include_router(cuadrillas_router)
+app.include_router(analitica_router)
+app.include_router(gc_almacen_router)
+app.include_router(sync_router)
+app.include_router(eventos_router)
+app.include_router(plantas_router)
+app.include_router(conteos_router)
+app.include_router(particiones_router)
 
 # ------------------------
 # RUTA RAÍZ
@@ -0,0 +1,264 @@
+# metricas.py
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+from starlette.routing import Match, Mount
+
+# ----------------------------
+# CONFIGURACIÓN
+# ----------------------------
+# Si está definida, /metrics exige "Authorization: Bearer <token>" o "X-Metrics-Key".
+# /metrics NO pasa por require_api_key (así Prometheus no necesita la API_KEY de la app).
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+
+LATENCIA_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_registro: list["_Metrica"] = []
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatear_labels(nombres: tuple[str, ...], valores: tuple, extra: str = "") -> str:
+    partes = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        partes.append(extra)
+    return "{" + ",".join(partes) + "}" if partes else ""
+
+
+def _formatear_numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    if float(valor).is_integer():
+        return str(int(valor))
+    return repr(float(valor))
+
+
+# ----------------------------
+# TIPOS DE MÉTRICA (en memoria, por proceso)
+# ----------------------------
+class _Metrica:
+    tipo = ""
+
+    def __init__(self, nombre: str, ayuda: str, labels: tuple[str, ...] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._valores: dict[tuple, object] = {}
+        _registro.append(self)
+
+    def _clave(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labels)
+
+    def exportar(self) -> list[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        with self._lock:
+            items = sorted(self._valores.items())
+        for clave, valor in items:
+            lineas.append(f"{self.nombre}{_formatear_labels(self.labels, clave)} {_formatear_numero(valor)}")
+        return lineas
+
+
+class Contador(_Metrica):
+    tipo = "counter"
+
+    def inc(self, valor: float = 1, **labels) -> None:
+        clave = self._clave(labels)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+
+
+class Medidor(_Metrica):
+    tipo = "gauge"
+
+    def inc(self, valor: float = 1, **labels) -> None:
+        clave = self._clave(labels)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + valor
+
+    def dec(self, valor: float = 1, **labels) -> None:
+        self.inc(-valor, **labels)
+
+    def set(self, valor: float, **labels) -> None:
+        clave = self._clave(labels)
+        with self._lock:
+            self._valores[clave] = valor
+
+
+class Histograma(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, labels: tuple[str, ...] = (), buckets=LATENCIA_BUCKETS):
+        super().__init__(nombre, ayuda, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, valor: float, **labels) -> None:
+        clave = self._clave(labels)
+        idx = bisect_left(self.buckets, valor)
+        with self._lock:
+            estado = self._valores.get(clave)
+            if estado is None:
+                # [conteos por bucket (+Inf al final), suma, total]
+                estado = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._valores[clave] = estado
+            estado[0][idx] += 1
+            estado[1] += valor
+            estado[2] += 1
+
+    def exportar(self) -> list[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1], v[2])) for k, v in self._valores.items())
+        for clave, (conteos, suma, total) in items:
+            acumulado = 0
+            for limite, n in zip(self.buckets + (float("inf"),), conteos):
+                acumulado += n
+                le = f'le="{_formatear_numero(limite)}"'
+                lineas.append(f"{self.nombre}_bucket{_formatear_labels(self.labels, clave, le)} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{_formatear_labels(self.labels, clave)} {_formatear_numero(suma)}")
+            lineas.append(f"{self.nombre}_count{_formatear_labels(self.labels, clave)} {total}")
+        return lineas
+
+
+def exportar_todo() -> str:
+    lineas: list[str] = []
+    for m in _registro:
+        lineas.extend(m.exportar())
+    return "\n".join(lineas) + "\n"
+
+
+# ----------------------------
+# MÉTRICAS HTTP
+# ----------------------------
+HTTP_REQUESTS = Contador(
+    "colibri_http_requests_total",
+    "Requests HTTP atendidos por ruta (plantilla) y código de respuesta.",
+    ("metodo", "ruta", "codigo"),
+)
+HTTP_LATENCIA = Histograma(
+    "colibri_http_request_duracion_segundos",
+    "Latencia de requests HTTP por ruta (plantilla).",
+    ("metodo", "ruta"),
+)
+HTTP_EN_CURSO = Medidor(
+    "colibri_http_requests_en_curso",
+    "Requests HTTP en curso por ruta (plantilla).",
+    ("metodo", "ruta"),
+)
+
+# ----------------------------
+# MÉTRICAS DE DOMINIO (pipeline de imágenes)
+# ----------------------------
+IMAGENES_DECODIFICADAS = Contador(
+    "colibri_imagenes_decodificadas_total",
+    "Imágenes pasadas por el lector QR, por resultado (con_qr / sin_qr / ilegible).",
+    ("resultado",),
+)
+SUBIDAS_WORKER = Contador(
+    "colibri_subidas_worker_total",
+    "Subidas de imágenes del flujo QR al almacenamiento (ALMACEN_QR), por resultado (ok / error).",
+    ("resultado",),
+)
+BYTES_PROCESADOS = Contador(
+    "colibri_imagenes_bytes_procesados_total",
+    "Bytes de imagen procesados, por flujo (qr_zip / revision_zip / revision_imagenes).",
+    ("flujo",),
+)
+ARRANQUE_SEGUNDOS = Medidor(
+    "colibri_arranque_segundos",
+    "Duración de cada fase del arranque (imports, warm-up, stack de imágenes...).",
+    ("fase",),
+)
+IMAGENES_PROCESADAS = Contador(
+    "colibri_imagenes_procesadas_total",
+    "Imágenes procesadas, por flujo (qr_zip / revision_zip / revision_imagenes).",
+    ("flujo",),
+)
+IMAGENES_NORMALIZADAS = Contador(
+    "colibri_imagenes_normalizadas_total",
+    "Imágenes pasadas por la normalización al ingresar, por resultado (ok / error).",
+    ("resultado",),
+)
+BYTES_NORMALIZACION = Contador(
+    "colibri_normalizacion_bytes_total",
+    "Bytes de las imágenes normalizadas, antes (entrada) y después (salida).",
+    ("etapa",),
+)
+EVENTOS_SUSCRIPTORES = Medidor(
+    "colibri_eventos_suscriptores",
+    "Clientes conectados al feed de eventos, por canal (sse / ws).",
+    ("canal",),
+)
+EVENTOS_DESCARTADOS = Contador(
+    "colibri_eventos_descartados_total",
+    "Eventos no entregados porque la cola del cliente estaba llena.",
+)
+
+
+# ----------------------------
+# MIDDLEWARE (ASGI puro, no bufferiza respuestas en streaming)
+# ----------------------------
+def _plantilla_ruta(router, scope) -> str:
+    """
+    Resuelve la plantilla de la ruta (ej. "/fincas/{finca_id}") para no
+    generar una serie por cada id concreto.
+    """
+    parcial = None
+    for route in router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            if isinstance(route, Mount):
+                return route.path + "/{path}"
+            return route.path
+        if match == Match.PARTIAL and parcial is None:
+            parcial = route.path
+    return parcial or "<sin_ruta>"
+
+
+class MetricasMiddleware:
+    def __init__(self, app, router):
+        self.app = app
+        self.router = router
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metodo = scope["method"]
+        ruta = _plantilla_ruta(self.router, scope)
+        codigo = 500
+
+        async def send_con_codigo(message):
+            nonlocal codigo
+            if message["type"] == "http.response.start":
+                codigo = message["status"]
+            await send(message)
+
+        HTTP_EN_CURSO.inc(metodo=metodo, ruta=ruta)
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_con_codigo)
+        finally:
+            HTTP_LATENCIA.observe(time.perf_counter() - inicio, metodo=metodo, ruta=ruta)
+            HTTP_REQUESTS.inc(metodo=metodo, ruta=ruta, codigo=codigo)
+            HTTP_EN_CURSO.dec(metodo=metodo, ruta=ruta)
+
+
+# ----------------------------
+# ENDPOINT /metrics (formato texto de Prometheus)
+# ----------------------------
+async def endpoint_metricas(request: Request):
+    if METRICS_TOKEN:
+        auth = request.headers.get("authorization", "")
+        token = auth[7:] if auth.lower().startswith("bearer ") else request.headers.get("x-metrics-key")
+        if token != METRICS_TOKEN:
+            return PlainTextResponse("Token de métricas inválido o faltante", status_code=401)
+
+    return PlainTextResponse(exportar_todo(), media_type="text/plain; version=0.0.4; charset=utf-8")
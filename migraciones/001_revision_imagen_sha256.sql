@@ -0,0 +1,2 @@
+-- 001: hash de contenido por imagen de revisión (URLs versionadas / ETag)
+ALTER TABLE revision_imagen ADD COLUMN IF NOT EXISTS sha256 VARCHAR(64);
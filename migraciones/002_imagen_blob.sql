@@ -0,0 +1,34 @@
+-- 002: almacén de imágenes por contenido (services/blob_store.py)
+-- imagen_blob.ref_count = filas de revision_imagen que apuntan al blob.
+-- Lo mantiene el trigger, así también cuenta los ON DELETE CASCADE
+-- (borrar finca / sector / revisión) que SQLAlchemy no ve.
+
+CREATE TABLE IF NOT EXISTS imagen_blob (
+    sha256       VARCHAR(64) PRIMARY KEY,
+    ruta         VARCHAR(512) NOT NULL,
+    tamano_bytes BIGINT NOT NULL DEFAULT 0,
+    ref_count    INTEGER NOT NULL DEFAULT 0,
+    created_at   TIMESTAMPTZ DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS ix_imagen_blob_sin_referencias
+    ON imagen_blob (sha256) WHERE ref_count <= 0;
+
+CREATE INDEX IF NOT EXISTS ix_revision_imagen_sha256 ON revision_imagen (sha256);
+
+CREATE OR REPLACE FUNCTION revision_imagen_ref_count() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.sha256 IS NOT NULL THEN
+        UPDATE imagen_blob SET ref_count = ref_count + 1 WHERE sha256 = NEW.sha256;
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') AND OLD.sha256 IS NOT NULL THEN
+        UPDATE imagen_blob SET ref_count = ref_count - 1 WHERE sha256 = OLD.sha256;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_revision_imagen_ref_count ON revision_imagen;
+CREATE TRIGGER trg_revision_imagen_ref_count
+    AFTER INSERT OR DELETE OR UPDATE OF sha256 ON revision_imagen
+    FOR EACH ROW EXECUTE FUNCTION revision_imagen_ref_count();
@@ -0,0 +1,2 @@
+-- 003: original sin normalizar guardado en ALMACEN_ORIGINALES (services/normalizacion.py)
+ALTER TABLE revision_imagen ADD COLUMN IF NOT EXISTS ruta_original VARCHAR(512);
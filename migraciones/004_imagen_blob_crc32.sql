@@ -0,0 +1,4 @@
+-- 004: CRC-32 de cada blob, necesario para armar el ZIP de descarga sin leer
+-- los archivos antes de empezar a enviar (services/zip_streaming.py).
+-- Los blobs anteriores se completan al pedir su primer ZIP.
+ALTER TABLE imagen_blob ADD COLUMN IF NOT EXISTS crc32 BIGINT;
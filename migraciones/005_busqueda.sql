@@ -0,0 +1,30 @@
+-- 005: índices para búsqueda (crud_busqueda.py)
+-- Trigramas (pg_trgm) para nombres / DNI / patrón / yema: tolera errores de
+-- tipeo y coincidencias parciales. Texto completo en español para observaciones.
+-- Las expresiones tienen que ser idénticas a las de crud_busqueda.py para que
+-- el planificador use los índices.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- minúsculas, sin tildes, partes unidas con espacio (NULL = vacío).
+-- Solo usa funciones IMMUTABLE para que Postgres la pueda expandir en línea
+-- (concat_ws / array_to_string son STABLE y la vuelven 10x más lenta)
+CREATE OR REPLACE FUNCTION colibri_texto_busqueda(a text, b text DEFAULT NULL, c text DEFAULT NULL) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT translate(
+        lower(coalesce(a, '') || ' ' || coalesce(b, '') || ' ' || coalesce(c, '')),
+        'áéíóúüñàèìòù', 'aeiouunaeiou'
+    )
+$$;
+
+CREATE INDEX IF NOT EXISTS ix_trabajador_busqueda_trgm
+    ON trabajador USING gin (colibri_texto_busqueda(nombre, apellido, dni) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS ix_planta_busqueda_trgm
+    ON planta USING gin (colibri_texto_busqueda(patron, yema) gin_trgm_ops);
+
+CREATE INDEX IF NOT EXISTS ix_planta_observaciones_fts
+    ON planta USING gin (to_tsvector('spanish', coalesce(observaciones, '')));
+
+CREATE INDEX IF NOT EXISTS ix_revision_observaciones_fts
+    ON revision USING gin (to_tsvector('spanish', coalesce(observaciones, '')));
@@ -0,0 +1,106 @@
+-- 006: analítica de productividad por trabajador (crud_productividad.py)
+-- productividad_diaria guarda los agregados por día / trabajador / sector.
+-- Los triggers marcan en productividad_pendiente los días tocados por
+-- INSERT / UPDATE / DELETE en revision, revision_unitaria y revision_trabajador
+-- (también los ON DELETE CASCADE); la consulta recalcula solo esos días.
+
+CREATE TABLE IF NOT EXISTS productividad_diaria (
+    dia               DATE NOT NULL,
+    trabajador_id     INTEGER NOT NULL,
+    sector_id         INTEGER NOT NULL,
+    revisiones        INTEGER NOT NULL DEFAULT 0,
+    arboles           INTEGER NOT NULL DEFAULT 0,
+    calificacion_suma NUMERIC(14, 2),
+    calificacion_n    INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (dia, trabajador_id, sector_id)
+);
+
+CREATE TABLE IF NOT EXISTS productividad_pendiente (
+    dia DATE PRIMARY KEY
+);
+
+-- Para recalcular un día sin recorrer todas las tablas
+CREATE INDEX IF NOT EXISTS ix_revision_fecha_revision ON revision (fecha_revision);
+CREATE INDEX IF NOT EXISTS ix_revision_unitaria_revision_id ON revision_unitaria (revision_id);
+CREATE INDEX IF NOT EXISTS ix_revision_trabajador_trabajador_id ON revision_trabajador (trabajador_id);
+
+-- Triggers por sentencia con tablas de transición: un INSERT masivo de
+-- unidades marca cada día una sola vez
+CREATE OR REPLACE FUNCTION productividad_marcar_revision() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO productividad_pendiente (dia)
+        SELECT DISTINCT fecha_revision FROM nuevas
+        ON CONFLICT DO NOTHING;
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        INSERT INTO productividad_pendiente (dia)
+        SELECT DISTINCT fecha_revision FROM viejas
+        ON CONFLICT DO NOTHING;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- revision_unitaria y revision_trabajador: el día sale de la revisión
+CREATE OR REPLACE FUNCTION productividad_marcar_hijas() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO productividad_pendiente (dia)
+        SELECT DISTINCT r.fecha_revision FROM revision r
+        WHERE r.id IN (SELECT revision_id FROM nuevas)
+        ON CONFLICT DO NOTHING;
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        INSERT INTO productividad_pendiente (dia)
+        SELECT DISTINCT r.fecha_revision FROM revision r
+        WHERE r.id IN (SELECT revision_id FROM viejas)
+        ON CONFLICT DO NOTHING;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_productividad_revision_ins ON revision;
+DROP TRIGGER IF EXISTS trg_productividad_revision_upd ON revision;
+DROP TRIGGER IF EXISTS trg_productividad_revision_del ON revision;
+CREATE TRIGGER trg_productividad_revision_ins AFTER INSERT ON revision
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION productividad_marcar_revision();
+CREATE TRIGGER trg_productividad_revision_upd AFTER UPDATE ON revision
+    REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION productividad_marcar_revision();
+CREATE TRIGGER trg_productividad_revision_del AFTER DELETE ON revision
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION productividad_marcar_revision();
+
+DROP TRIGGER IF EXISTS trg_productividad_unitaria_ins ON revision_unitaria;
+DROP TRIGGER IF EXISTS trg_productividad_unitaria_upd ON revision_unitaria;
+DROP TRIGGER IF EXISTS trg_productividad_unitaria_del ON revision_unitaria;
+CREATE TRIGGER trg_productividad_unitaria_ins AFTER INSERT ON revision_unitaria
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION productividad_marcar_hijas();
+CREATE TRIGGER trg_productividad_unitaria_upd AFTER UPDATE ON revision_unitaria
+    REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION productividad_marcar_hijas();
+CREATE TRIGGER trg_productividad_unitaria_del AFTER DELETE ON revision_unitaria
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION productividad_marcar_hijas();
+
+DROP TRIGGER IF EXISTS trg_productividad_cuadrilla_ins ON revision_trabajador;
+DROP TRIGGER IF EXISTS trg_productividad_cuadrilla_upd ON revision_trabajador;
+DROP TRIGGER IF EXISTS trg_productividad_cuadrilla_del ON revision_trabajador;
+CREATE TRIGGER trg_productividad_cuadrilla_ins AFTER INSERT ON revision_trabajador
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION productividad_marcar_hijas();
+CREATE TRIGGER trg_productividad_cuadrilla_upd AFTER UPDATE ON revision_trabajador
+    REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION productividad_marcar_hijas();
+CREATE TRIGGER trg_productividad_cuadrilla_del AFTER DELETE ON revision_trabajador
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION productividad_marcar_hijas();
+
+-- Datos existentes: todos los días quedan pendientes y se calculan en la primera consulta
+INSERT INTO productividad_pendiente (dia)
+SELECT DISTINCT fecha_revision FROM revision
+ON CONFLICT DO NOTHING;
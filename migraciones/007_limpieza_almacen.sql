@@ -0,0 +1,38 @@
+-- 007: borrados en cascada rápidos + limpieza del almacenamiento en segundo plano (limpieza.py)
+-- Borrar una finca / sector / revisión es un solo DELETE; ON DELETE CASCADE
+-- hace el resto. El trigger encola las carpetas de cada revisión borrada
+-- (también las que caen por cascada) y el worker las vacía después.
+
+CREATE TABLE IF NOT EXISTS limpieza_almacen (
+    id              BIGSERIAL PRIMARY KEY,
+    almacen         VARCHAR(20) NOT NULL,   -- revisiones (ALMACEN_REVISIONES) / qr (ALMACEN_QR)
+    prefijo         VARCHAR(512) NOT NULL,
+    intentos        INTEGER NOT NULL DEFAULT 0,
+    proximo_intento TIMESTAMPTZ NOT NULL DEFAULT now(),
+    ultimo_error    TEXT,
+    created_at      TIMESTAMPTZ DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS ix_limpieza_almacen_proximo_intento ON limpieza_almacen (proximo_intento);
+
+-- Claves foráneas sin índice: sin ellos cada cascada recorre la tabla hija entera
+CREATE INDEX IF NOT EXISTS ix_sector_finca_id ON sector (finca_id);
+CREATE INDEX IF NOT EXISTS ix_planta_sector_id ON planta (sector_id);
+CREATE INDEX IF NOT EXISTS ix_revision_sector_id ON revision (sector_id);
+CREATE INDEX IF NOT EXISTS ix_revision_unitaria_planta_id ON revision_unitaria (planta_id);
+CREATE INDEX IF NOT EXISTS ix_imagen_revision_unitaria_id ON imagen (revision_unitaria_id);
+
+CREATE OR REPLACE FUNCTION revision_encolar_limpieza() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO limpieza_almacen (almacen, prefijo)
+    SELECT 'revisiones', 'revisiones/' || id || '/' FROM viejas
+    UNION ALL
+    SELECT 'qr', 'revisiones/revisiones_imgs/revision_' || id || '/' FROM viejas;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_revision_encolar_limpieza ON revision;
+CREATE TRIGGER trg_revision_encolar_limpieza AFTER DELETE ON revision
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION revision_encolar_limpieza();
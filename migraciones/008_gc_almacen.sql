@@ -0,0 +1,5 @@
+-- 008: recolector de basura del almacenamiento (gc_almacen.py)
+-- Para saber en una consulta si un original (originales/...) sigue referenciado.
+
+CREATE INDEX IF NOT EXISTS ix_revision_imagen_ruta_original
+    ON revision_imagen (ruta_original) WHERE ruta_original IS NOT NULL;
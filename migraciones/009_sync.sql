@@ -0,0 +1,64 @@
+-- 009: sincronización incremental para la app de campo (crud_sync.py, GET /sync)
+-- sync_cambio guarda el último cambio de cada fila (alta / modificación o
+-- baja = tombstone) con el id de la transacción que lo hizo. El token que
+-- recibe el cliente es el xmin del snapshot de su última sincronización:
+-- todo lo que tenga txid >= token puede no haberlo visto (incluye
+-- transacciones que estaban en curso y confirmaron después).
+
+CREATE TABLE IF NOT EXISTS sync_cambio (
+    tabla         VARCHAR(40) NOT NULL,
+    fila_id       BIGINT NOT NULL,
+    txid          XID8 NOT NULL DEFAULT pg_current_xact_id(),
+    borrado       BOOLEAN NOT NULL DEFAULT false,
+    modificado_en TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (tabla, fila_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_sync_cambio_txid ON sync_cambio (txid, tabla, fila_id);
+CREATE INDEX IF NOT EXISTS ix_sync_cambio_tombstones ON sync_cambio (modificado_en) WHERE borrado;
+
+-- Tokens <= horizonte pueden haber perdido tombstones ya podados: sincronizan de cero
+CREATE TABLE IF NOT EXISTS sync_horizonte (
+    id   BOOLEAN PRIMARY KEY DEFAULT true CHECK (id),
+    txid XID8 NOT NULL
+);
+INSERT INTO sync_horizonte (txid) VALUES (pg_current_xact_id()) ON CONFLICT DO NOTHING;
+
+CREATE OR REPLACE FUNCTION sync_registrar_cambio() RETURNS trigger AS $$
+BEGIN
+    -- ORDER BY: dos sentencias sobre las mismas filas bloquean en el mismo orden
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO sync_cambio (tabla, fila_id, borrado)
+        SELECT TG_TABLE_NAME, id, true FROM viejas ORDER BY id
+        ON CONFLICT (tabla, fila_id) DO UPDATE
+            SET txid = pg_current_xact_id(), borrado = true, modificado_en = now();
+    ELSE
+        INSERT INTO sync_cambio (tabla, fila_id, borrado)
+        SELECT TG_TABLE_NAME, id, false FROM nuevas ORDER BY id
+        ON CONFLICT (tabla, fila_id) DO UPDATE
+            SET txid = pg_current_xact_id(), borrado = false, modificado_en = now();
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    t TEXT;
+BEGIN
+    FOREACH t IN ARRAY ARRAY['finca', 'sector', 'planta', 'trabajador', 'revision'] LOOP
+        EXECUTE 'DROP TRIGGER IF EXISTS trg_sync_' || t || '_ins ON ' || quote_ident(t);
+        EXECUTE 'DROP TRIGGER IF EXISTS trg_sync_' || t || '_upd ON ' || quote_ident(t);
+        EXECUTE 'DROP TRIGGER IF EXISTS trg_sync_' || t || '_del ON ' || quote_ident(t);
+        EXECUTE 'CREATE TRIGGER trg_sync_' || t || '_ins AFTER INSERT ON ' || quote_ident(t)
+            || ' REFERENCING NEW TABLE AS nuevas'
+            || ' FOR EACH STATEMENT EXECUTE FUNCTION sync_registrar_cambio()';
+        EXECUTE 'CREATE TRIGGER trg_sync_' || t || '_upd AFTER UPDATE ON ' || quote_ident(t)
+            || ' REFERENCING NEW TABLE AS nuevas'
+            || ' FOR EACH STATEMENT EXECUTE FUNCTION sync_registrar_cambio()';
+        EXECUTE 'CREATE TRIGGER trg_sync_' || t || '_del AFTER DELETE ON ' || quote_ident(t)
+            || ' REFERENCING OLD TABLE AS viejas'
+            || ' FOR EACH STATEMENT EXECUTE FUNCTION sync_registrar_cambio()';
+    END LOOP;
+END;
+$$;
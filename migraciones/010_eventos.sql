@@ -0,0 +1,151 @@
+-- 010: eventos en tiempo real (eventos.py, GET /eventos y WebSocket /eventos/ws)
+-- Los triggers publican con pg_notify en el canal colibri_eventos; NOTIFY se
+-- entrega al confirmar la transacción y llega a todos los procesos que
+-- escuchan, así funciona con varios workers. Una notificación por revisión
+-- tocada en cada sentencia (las unidades e imágenes van agrupadas).
+
+CREATE OR REPLACE FUNCTION eventos_revision() RETURNS trigger AS $$
+DECLARE
+    ev RECORD;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        FOR ev IN
+            SELECT r.id, r.sector_id, s.finca_id, r.fecha_revision
+            FROM viejas r LEFT JOIN sector s ON s.id = r.sector_id
+        LOOP
+            PERFORM pg_notify('colibri_eventos', json_build_object(
+                'entidad', 'revision', 'accion', 'delete', 'revision_id', ev.id,
+                'sector_id', ev.sector_id, 'finca_id', ev.finca_id, 'fecha_revision', ev.fecha_revision
+            )::text);
+        END LOOP;
+    ELSE
+        FOR ev IN
+            SELECT r.id, r.sector_id, s.finca_id, r.fecha_revision
+            FROM nuevas r LEFT JOIN sector s ON s.id = r.sector_id
+        LOOP
+            PERFORM pg_notify('colibri_eventos', json_build_object(
+                'entidad', 'revision', 'accion', lower(TG_OP), 'revision_id', ev.id,
+                'sector_id', ev.sector_id, 'finca_id', ev.finca_id, 'fecha_revision', ev.fecha_revision
+            )::text);
+        END LOOP;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Unidades: una notificación por revisión con la cantidad y hasta 100 ids
+CREATE OR REPLACE FUNCTION eventos_revision_unitaria() RETURNS trigger AS $$
+DECLARE
+    ev RECORD;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        FOR ev IN
+            SELECT u.revision_id, r.sector_id, s.finca_id, count(*) AS cantidad,
+                   (array_agg(u.id ORDER BY u.id))[1:100] AS ids
+            FROM viejas u
+            LEFT JOIN revision r ON r.id = u.revision_id
+            LEFT JOIN sector s ON s.id = r.sector_id
+            GROUP BY u.revision_id, r.sector_id, s.finca_id
+        LOOP
+            PERFORM pg_notify('colibri_eventos', json_build_object(
+                'entidad', 'revision_unitaria', 'accion', 'delete', 'revision_id', ev.revision_id,
+                'sector_id', ev.sector_id, 'finca_id', ev.finca_id, 'cantidad', ev.cantidad, 'ids', ev.ids
+            )::text);
+        END LOOP;
+    ELSE
+        FOR ev IN
+            SELECT u.revision_id, r.sector_id, s.finca_id, count(*) AS cantidad,
+                   (array_agg(u.id ORDER BY u.id))[1:100] AS ids
+            FROM nuevas u
+            LEFT JOIN revision r ON r.id = u.revision_id
+            LEFT JOIN sector s ON s.id = r.sector_id
+            GROUP BY u.revision_id, r.sector_id, s.finca_id
+        LOOP
+            PERFORM pg_notify('colibri_eventos', json_build_object(
+                'entidad', 'revision_unitaria', 'accion', lower(TG_OP), 'revision_id', ev.revision_id,
+                'sector_id', ev.sector_id, 'finca_id', ev.finca_id, 'cantidad', ev.cantidad, 'ids', ev.ids
+            )::text);
+        END LOOP;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Ingesta de imágenes: cuántas se agregaron / quitaron y cuántas tiene la revisión ahora
+CREATE OR REPLACE FUNCTION eventos_revision_imagen() RETURNS trigger AS $$
+DECLARE
+    ev RECORD;
+BEGIN
+    FOR ev IN
+        SELECT c.revision_id, c.cantidad, r.sector_id, s.finca_id,
+               (SELECT count(*) FROM revision_imagen ri WHERE ri.revision_id = c.revision_id) AS total
+        FROM (
+            SELECT revision_id, count(*) AS cantidad FROM nuevas GROUP BY revision_id
+        ) c
+        LEFT JOIN revision r ON r.id = c.revision_id
+        LEFT JOIN sector s ON s.id = r.sector_id
+    LOOP
+        PERFORM pg_notify('colibri_eventos', json_build_object(
+            'entidad', 'imagenes', 'accion', 'insert', 'revision_id', ev.revision_id,
+            'sector_id', ev.sector_id, 'finca_id', ev.finca_id, 'cantidad', ev.cantidad, 'total', ev.total
+        )::text);
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION eventos_revision_imagen_borrado() RETURNS trigger AS $$
+DECLARE
+    ev RECORD;
+BEGIN
+    -- Si la revisión se borró (cascada) alcanza con su propio evento
+    FOR ev IN
+        SELECT c.revision_id, c.cantidad, r.sector_id, s.finca_id,
+               (SELECT count(*) FROM revision_imagen ri WHERE ri.revision_id = c.revision_id) AS total
+        FROM (SELECT revision_id, count(*) AS cantidad FROM viejas GROUP BY revision_id) c
+        JOIN revision r ON r.id = c.revision_id
+        LEFT JOIN sector s ON s.id = r.sector_id
+    LOOP
+        PERFORM pg_notify('colibri_eventos', json_build_object(
+            'entidad', 'imagenes', 'accion', 'delete', 'revision_id', ev.revision_id,
+            'sector_id', ev.sector_id, 'finca_id', ev.finca_id, 'cantidad', ev.cantidad, 'total', ev.total
+        )::text);
+    END LOOP;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_eventos_revision_ins ON revision;
+DROP TRIGGER IF EXISTS trg_eventos_revision_upd ON revision;
+DROP TRIGGER IF EXISTS trg_eventos_revision_del ON revision;
+CREATE TRIGGER trg_eventos_revision_ins AFTER INSERT ON revision
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION eventos_revision();
+CREATE TRIGGER trg_eventos_revision_upd AFTER UPDATE ON revision
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION eventos_revision();
+CREATE TRIGGER trg_eventos_revision_del AFTER DELETE ON revision
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION eventos_revision();
+
+DROP TRIGGER IF EXISTS trg_eventos_unitaria_ins ON revision_unitaria;
+DROP TRIGGER IF EXISTS trg_eventos_unitaria_upd ON revision_unitaria;
+DROP TRIGGER IF EXISTS trg_eventos_unitaria_del ON revision_unitaria;
+CREATE TRIGGER trg_eventos_unitaria_ins AFTER INSERT ON revision_unitaria
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION eventos_revision_unitaria();
+CREATE TRIGGER trg_eventos_unitaria_upd AFTER UPDATE ON revision_unitaria
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION eventos_revision_unitaria();
+CREATE TRIGGER trg_eventos_unitaria_del AFTER DELETE ON revision_unitaria
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION eventos_revision_unitaria();
+
+DROP TRIGGER IF EXISTS trg_eventos_imagen_ins ON revision_imagen;
+DROP TRIGGER IF EXISTS trg_eventos_imagen_del ON revision_imagen;
+CREATE TRIGGER trg_eventos_imagen_ins AFTER INSERT ON revision_imagen
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION eventos_revision_imagen();
+CREATE TRIGGER trg_eventos_imagen_del AFTER DELETE ON revision_imagen
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION eventos_revision_imagen_borrado();
@@ -0,0 +1,18 @@
+-- 011: posición de las plantas (crud_plantas.py, GET /plantas/visibles y /plantas/cercanas)
+-- Dos formas, ambas opcionales: fila / columna dentro del sector (plano de
+-- plantación) y coordenadas GPS. El índice espacial vive en memoria por
+-- sector y se actualiza con los cambios que ya registra sync_cambio (009).
+
+ALTER TABLE planta ADD COLUMN IF NOT EXISTS fila INTEGER;
+ALTER TABLE planta ADD COLUMN IF NOT EXISTS columna INTEGER;
+ALTER TABLE planta ADD COLUMN IF NOT EXISTS lat DOUBLE PRECISION;
+ALTER TABLE planta ADD COLUMN IF NOT EXISTS lon DOUBLE PRECISION;
+
+ALTER TABLE planta DROP CONSTRAINT IF EXISTS ck_planta_coordenadas;
+ALTER TABLE planta ADD CONSTRAINT ck_planta_coordenadas CHECK (
+    (lat IS NULL) = (lon IS NULL)
+    AND (lat IS NULL OR (lat BETWEEN -90 AND 90 AND lon BETWEEN -180 AND 180))
+);
+
+ALTER TABLE planta DROP CONSTRAINT IF EXISTS ck_planta_fila_columna;
+ALTER TABLE planta ADD CONSTRAINT ck_planta_fila_columna CHECK ((fila IS NULL) = (columna IS NULL));
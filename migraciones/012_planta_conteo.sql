@@ -0,0 +1,73 @@
+-- 012: conteo de plantas por sector y estado (crud_plantas_count.py)
+-- Lo mantienen triggers por sentencia sobre planta: una carga masiva suma
+-- una vez por (sector, estado) en vez de una vez por fila. Las respuestas de
+-- sectores y fincas leen de acá (models.Sector / Finca .plantas_cantidad).
+-- Reemplaza a sector.plantas_cantidad, que se cargaba a mano.
+
+CREATE TABLE IF NOT EXISTS planta_conteo (
+    sector_id INTEGER NOT NULL REFERENCES sector(id) ON DELETE CASCADE,
+    estado    estado_planta NOT NULL,
+    cantidad  INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (sector_id, estado)
+);
+
+CREATE OR REPLACE FUNCTION planta_conteo_actualizar() RETURNS trigger AS $$
+BEGIN
+    -- ORDER BY: dos sentencias sobre los mismos sectores bloquean en el mismo orden
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO planta_conteo (sector_id, estado, cantidad)
+        SELECT sector_id, estado, count(*) FROM nuevas
+        GROUP BY sector_id, estado ORDER BY sector_id, estado
+        ON CONFLICT (sector_id, estado) DO UPDATE
+            SET cantidad = planta_conteo.cantidad + EXCLUDED.cantidad;
+    ELSIF TG_OP = 'DELETE' THEN
+        -- Solo UPDATE: si el sector se está borrando (cascada) sus filas ya no están
+        UPDATE planta_conteo c SET cantidad = c.cantidad - v.n
+        FROM (SELECT sector_id, estado, count(*) AS n FROM viejas GROUP BY sector_id, estado) v
+        WHERE c.sector_id = v.sector_id AND c.estado = v.estado;
+    ELSE
+        -- Solo cuentan los cambios de sector o de estado
+        INSERT INTO planta_conteo (sector_id, estado, cantidad)
+        SELECT sector_id, estado, sum(d) FROM (
+            SELECT sector_id, estado, 1 AS d FROM nuevas
+            UNION ALL
+            SELECT sector_id, estado, -1 AS d FROM viejas
+        ) x
+        GROUP BY sector_id, estado HAVING sum(d) <> 0 ORDER BY sector_id, estado
+        ON CONFLICT (sector_id, estado) DO UPDATE
+            SET cantidad = planta_conteo.cantidad + EXCLUDED.cantidad;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Sin escrituras en planta mientras se llena: el conteo inicial queda exacto.
+-- El LOCK solo vale dentro de una transacción (psql aplica el archivo sentencia
+-- por sentencia): lock, triggers y llenado van en el mismo bloque
+BEGIN;
+
+LOCK TABLE planta IN SHARE MODE;
+
+DROP TRIGGER IF EXISTS trg_planta_conteo_ins ON planta;
+CREATE TRIGGER trg_planta_conteo_ins AFTER INSERT ON planta
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION planta_conteo_actualizar();
+
+-- (con tablas de transición no se puede usar UPDATE OF sector_id, estado)
+DROP TRIGGER IF EXISTS trg_planta_conteo_upd ON planta;
+CREATE TRIGGER trg_planta_conteo_upd AFTER UPDATE ON planta
+    REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION planta_conteo_actualizar();
+
+DROP TRIGGER IF EXISTS trg_planta_conteo_del ON planta;
+CREATE TRIGGER trg_planta_conteo_del AFTER DELETE ON planta
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION planta_conteo_actualizar();
+
+INSERT INTO planta_conteo (sector_id, estado, cantidad)
+SELECT sector_id, estado, count(*) FROM planta GROUP BY sector_id, estado
+ON CONFLICT (sector_id, estado) DO UPDATE SET cantidad = EXCLUDED.cantidad;
+
+COMMIT;
+
+ALTER TABLE sector DROP COLUMN IF EXISTS plantas_cantidad;
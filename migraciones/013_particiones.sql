@@ -0,0 +1,228 @@
+-- 013: particionado de revision_unitaria, imagen y revision_imagen (particiones.py)
+-- Particiones por rango de revision_id: los ids de revisión crecen con el
+-- tiempo, así que cada partición es un tramo de historia, y las tres tablas ya
+-- llevan revision_id (imagen lo recibe acá) sin depender de una fecha copiada
+-- que habría que mantener si se corrige revision.fecha_revision.
+-- La clave de partición tiene que estar en la PK: pasan a (id, revision_id), e
+-- imagen referencia a su unidad por (revision_unitaria_id, revision_id).
+-- En una BD que ya creó las tablas particionadas (create_all) solo asegura
+-- particiones, índices y triggers.
+
+-- Revisiones por partición. Cambiarlo solo antes de que existan particiones:
+-- los rangos nuevos no pueden pisar a los ya creados.
+CREATE TABLE IF NOT EXISTS particion_revisiones (
+    id     BOOLEAN PRIMARY KEY DEFAULT true CHECK (id),
+    tamano INTEGER NOT NULL CHECK (tamano > 0)
+);
+INSERT INTO particion_revisiones (tamano) VALUES (1000) ON CONFLICT DO NOTHING;
+
+-- Crea las particiones que falten desde la revisión más vieja hasta
+-- `por_delante` tramos después de la última. CREATE + ATTACH en vez de
+-- PARTITION OF: ATTACH bloquea la tabla padre en SHARE UPDATE EXCLUSIVE y no
+-- frena las escrituras en curso. Sin partición DEFAULT a propósito: mover filas
+-- fuera de ella dispararía los triggers y cascadas de las tablas.
+CREATE OR REPLACE FUNCTION particiones_asegurar(por_delante INTEGER DEFAULT 2) RETURNS SETOF TEXT AS $$
+DECLARE
+    tam     INTEGER;
+    primera INTEGER;
+    ultima  INTEGER;
+    t       TEXT;
+    n       INTEGER;
+    nombre  TEXT;
+BEGIN
+    -- Dos procesos asegurando a la vez (arranque, worker de limpieza, admin)
+    PERFORM pg_advisory_xact_lock(hashtext('particiones_asegurar'));
+
+    SELECT tamano INTO tam FROM particion_revisiones;
+    SELECT coalesce(min(id), 0) / tam, coalesce(max(id), 0) / tam + por_delante
+      INTO primera, ultima
+      FROM revision;
+
+    -- revision_unitaria antes que imagen (la FK de imagen apunta a sus particiones)
+    FOREACH t IN ARRAY ARRAY['revision_unitaria', 'imagen', 'revision_imagen'] LOOP
+        FOR n IN primera..ultima LOOP
+            nombre := t || '_p' || lpad(n::text, 6, '0');
+            CONTINUE WHEN to_regclass(nombre) IS NOT NULL;
+            EXECUTE 'CREATE TABLE ' || quote_ident(nombre)
+                 || ' (LIKE ' || quote_ident(t) || ' INCLUDING DEFAULTS INCLUDING CONSTRAINTS)';
+            EXECUTE 'ALTER TABLE ' || quote_ident(t) || ' ATTACH PARTITION ' || quote_ident(nombre)
+                 || ' FOR VALUES FROM (' || n * tam || ') TO (' || (n + 1) * tam || ')';
+            RETURN NEXT nombre;
+        END LOOP;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- (016 lo reemplaza por un error: no se hace DDL en el alta de una revisión)
+-- Último recurso: el arranque y el worker de limpieza (particiones.py) crean
+-- los tramos por delante. Si igual entra una revisión al último tramo creado,
+-- el siguiente se crea en la misma transacción (ATTACH bloquea otras altas
+-- hasta el commit), así las unidades / imágenes nunca se quedan sin partición
+CREATE OR REPLACE FUNCTION particiones_revision() RETURNS trigger AS $$
+DECLARE
+    siguiente INTEGER;
+BEGIN
+    SELECT (SELECT max(id) FROM nuevas) / tamano + 1 INTO siguiente FROM particion_revisiones;
+    IF siguiente IS NOT NULL
+       AND to_regclass('revision_unitaria_p' || lpad(siguiente::text, 6, '0')) IS NULL THEN
+        PERFORM particiones_asegurar();
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- ----------------------------
+-- CONVERSIÓN DE LAS TABLAS EXISTENTES
+-- ----------------------------
+-- Una sola transacción: se copian las filas a tablas nuevas particionadas y se
+-- borran las viejas. Las tablas nuevas todavía no tienen triggers, así la copia
+-- no toca ref_count, productividad ni eventos.
+DO $$
+DECLARE
+    t   TEXT;
+    ix  TEXT;
+    convertir  TEXT[] := ARRAY[]::TEXT[];
+    secuencias TEXT[] := ARRAY[]::TEXT[];
+BEGIN
+    FOREACH t IN ARRAY ARRAY['revision_unitaria', 'imagen', 'revision_imagen'] LOOP
+        IF (SELECT relkind FROM pg_class WHERE oid = to_regclass(t)) = 'r' THEN
+            convertir := convertir || t;
+            secuencias := secuencias || pg_get_serial_sequence(t, 'id');
+        END IF;
+    END LOOP;
+    IF cardinality(convertir) = 0 THEN
+        RETURN;
+    END IF;
+
+    LOCK TABLE revision_unitaria, imagen, revision_imagen IN ACCESS EXCLUSIVE MODE;
+
+    FOREACH t IN ARRAY convertir LOOP
+        EXECUTE 'ALTER TABLE ' || quote_ident(t) || ' RENAME TO ' || quote_ident(t || '_legacy');
+        -- Los nombres de índices se liberan para los de la tabla nueva
+        FOR ix IN
+            SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+             WHERE i.indrelid = to_regclass(t || '_legacy')
+        LOOP
+            EXECUTE 'ALTER INDEX ' || quote_ident(ix) || ' RENAME TO ' || quote_ident(left(ix, 50) || '_legacy');
+        END LOOP;
+
+        IF t = 'imagen' THEN
+            EXECUTE 'CREATE TABLE imagen (LIKE imagen_legacy INCLUDING DEFAULTS INCLUDING CONSTRAINTS,'
+                 || ' revision_id INTEGER NOT NULL) PARTITION BY RANGE (revision_id)';
+        ELSE
+            EXECUTE 'CREATE TABLE ' || quote_ident(t) || ' (LIKE ' || quote_ident(t || '_legacy')
+                 || ' INCLUDING DEFAULTS INCLUDING CONSTRAINTS) PARTITION BY RANGE (revision_id)';
+        END IF;
+        EXECUTE 'ALTER TABLE ' || quote_ident(t) || ' ADD PRIMARY KEY (id, revision_id)';
+    END LOOP;
+
+    PERFORM particiones_asegurar();
+
+    IF 'revision_unitaria' = ANY(convertir) THEN
+        INSERT INTO revision_unitaria SELECT * FROM revision_unitaria_legacy;
+    END IF;
+    IF 'imagen' = ANY(convertir) THEN
+        INSERT INTO imagen SELECT i.*, u.revision_id
+          FROM imagen_legacy i JOIN revision_unitaria u ON u.id = i.revision_unitaria_id;
+    END IF;
+    IF 'revision_imagen' = ANY(convertir) THEN
+        INSERT INTO revision_imagen SELECT * FROM revision_imagen_legacy;
+    END IF;
+
+    -- La secuencia del id (SERIAL, la usa el DEFAULT copiado) pasa a la tabla
+    -- nueva; si no, se borraría junto con la vieja
+    FOR i IN 1..cardinality(convertir) LOOP
+        IF secuencias[i] IS NOT NULL THEN
+            EXECUTE 'ALTER SEQUENCE ' || secuencias[i] || ' OWNED BY NONE';
+        END IF;
+    END LOOP;
+    -- imagen_legacy primero: su FK apunta a revision_unitaria_legacy
+    FOREACH t IN ARRAY ARRAY['imagen', 'revision_unitaria', 'revision_imagen'] LOOP
+        IF t = ANY(convertir) THEN
+            EXECUTE 'DROP TABLE ' || quote_ident(t || '_legacy') || ' CASCADE';
+        END IF;
+    END LOOP;
+    FOR i IN 1..cardinality(convertir) LOOP
+        IF secuencias[i] IS NOT NULL THEN
+            EXECUTE 'ALTER SEQUENCE ' || secuencias[i] || ' OWNED BY ' || quote_ident(convertir[i]) || '.id';
+        END IF;
+    END LOOP;
+
+    IF 'revision_unitaria' = ANY(convertir) THEN
+        ALTER TABLE revision_unitaria
+            ADD FOREIGN KEY (revision_id) REFERENCES revision(id) ON DELETE CASCADE,
+            ADD FOREIGN KEY (planta_id) REFERENCES planta(id) ON DELETE CASCADE;
+    END IF;
+    IF 'imagen' = ANY(convertir) THEN
+        ALTER TABLE imagen
+            ADD FOREIGN KEY (revision_unitaria_id, revision_id)
+                REFERENCES revision_unitaria(id, revision_id) ON DELETE CASCADE;
+    END IF;
+    IF 'revision_imagen' = ANY(convertir) THEN
+        ALTER TABLE revision_imagen
+            ADD FOREIGN KEY (revision_id) REFERENCES revision(id) ON DELETE CASCADE;
+    END IF;
+END;
+$$;
+
+-- Por si la BD no tiene revisiones todavía o viene de create_all
+SELECT count(*) FROM particiones_asegurar();
+
+-- ----------------------------
+-- ÍNDICES (en la tabla padre: se crean en cada partición)
+-- ----------------------------
+CREATE INDEX IF NOT EXISTS ix_revision_unitaria_revision_id ON revision_unitaria (revision_id);
+CREATE INDEX IF NOT EXISTS ix_revision_unitaria_planta_id ON revision_unitaria (planta_id);
+CREATE INDEX IF NOT EXISTS ix_imagen_revision_unitaria_id ON imagen (revision_unitaria_id);
+CREATE INDEX IF NOT EXISTS ix_revision_imagen_revision_id ON revision_imagen (revision_id);
+CREATE INDEX IF NOT EXISTS ix_revision_imagen_sha256 ON revision_imagen (sha256);
+CREATE INDEX IF NOT EXISTS ix_revision_imagen_ruta_original
+    ON revision_imagen (ruta_original) WHERE ruta_original IS NOT NULL;
+
+-- ----------------------------
+-- TRIGGERS (los de 002, 006 y 010 se fueron con las tablas viejas)
+-- ----------------------------
+DROP TRIGGER IF EXISTS trg_particiones_revision ON revision;
+CREATE TRIGGER trg_particiones_revision AFTER INSERT ON revision
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION particiones_revision();
+
+DROP TRIGGER IF EXISTS trg_revision_imagen_ref_count ON revision_imagen;
+CREATE TRIGGER trg_revision_imagen_ref_count
+    AFTER INSERT OR DELETE OR UPDATE OF sha256 ON revision_imagen
+    FOR EACH ROW EXECUTE FUNCTION revision_imagen_ref_count();
+
+DROP TRIGGER IF EXISTS trg_productividad_unitaria_ins ON revision_unitaria;
+DROP TRIGGER IF EXISTS trg_productividad_unitaria_upd ON revision_unitaria;
+DROP TRIGGER IF EXISTS trg_productividad_unitaria_del ON revision_unitaria;
+CREATE TRIGGER trg_productividad_unitaria_ins AFTER INSERT ON revision_unitaria
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION productividad_marcar_hijas();
+CREATE TRIGGER trg_productividad_unitaria_upd AFTER UPDATE ON revision_unitaria
+    REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION productividad_marcar_hijas();
+CREATE TRIGGER trg_productividad_unitaria_del AFTER DELETE ON revision_unitaria
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION productividad_marcar_hijas();
+
+DROP TRIGGER IF EXISTS trg_eventos_unitaria_ins ON revision_unitaria;
+DROP TRIGGER IF EXISTS trg_eventos_unitaria_upd ON revision_unitaria;
+DROP TRIGGER IF EXISTS trg_eventos_unitaria_del ON revision_unitaria;
+CREATE TRIGGER trg_eventos_unitaria_ins AFTER INSERT ON revision_unitaria
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION eventos_revision_unitaria();
+CREATE TRIGGER trg_eventos_unitaria_upd AFTER UPDATE ON revision_unitaria
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION eventos_revision_unitaria();
+CREATE TRIGGER trg_eventos_unitaria_del AFTER DELETE ON revision_unitaria
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION eventos_revision_unitaria();
+
+DROP TRIGGER IF EXISTS trg_eventos_imagen_ins ON revision_imagen;
+DROP TRIGGER IF EXISTS trg_eventos_imagen_del ON revision_imagen;
+CREATE TRIGGER trg_eventos_imagen_ins AFTER INSERT ON revision_imagen
+    REFERENCING NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION eventos_revision_imagen();
+CREATE TRIGGER trg_eventos_imagen_del AFTER DELETE ON revision_imagen
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION eventos_revision_imagen_borrado();
@@ -0,0 +1,4 @@
+-- 014: revision_imagen.created_at estuvo fuera del modelo por un tiempo; las BD
+-- creadas con create_all en ese período no tienen la columna
+ALTER TABLE revision_imagen
+    ADD COLUMN IF NOT EXISTS created_at TIMESTAMPTZ DEFAULT now();
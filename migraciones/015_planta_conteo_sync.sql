@@ -0,0 +1,106 @@
+-- 015: GET /sync reenvía sector y finca cuando cambia su conteo de plantas
+-- plantas_cantidad / plantas_por_estado salen de planta_conteo (012), pero el
+-- alta o baja de una planta solo dejaba en sync_cambio (009) la fila de la
+-- planta: un delta nunca volvía a mandar el sector ni la finca. Lo mismo al
+-- borrar un sector o moverlo de finca.
+
+-- Marca como modificados los sectores (que sigan existiendo) y sus fincas.
+-- La usa el trigger y crud_plantas_count.recalcular_conteos al corregir.
+CREATE OR REPLACE FUNCTION planta_conteo_marcar_sync(sectores INTEGER[]) RETURNS void AS $$
+BEGIN
+    -- Si el sector se está borrando (cascada) ya no aparece: queda su tombstone
+    INSERT INTO sync_cambio (tabla, fila_id, borrado)
+    SELECT tabla, fila_id, false FROM (
+        SELECT 'sector' AS tabla, s.id::bigint AS fila_id FROM sector s WHERE s.id = ANY(sectores)
+        UNION
+        SELECT 'finca', s.finca_id::bigint FROM sector s WHERE s.id = ANY(sectores)
+    ) x
+    ORDER BY tabla, fila_id
+    ON CONFLICT (tabla, fila_id) DO UPDATE
+        SET txid = pg_current_xact_id(), borrado = false, modificado_en = now();
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION planta_conteo_actualizar() RETURNS trigger AS $$
+DECLARE
+    sectores INTEGER[];
+BEGIN
+    -- ORDER BY: dos sentencias sobre los mismos sectores bloquean en el mismo orden
+    IF TG_OP = 'INSERT' THEN
+        WITH cambiados AS (
+            INSERT INTO planta_conteo (sector_id, estado, cantidad)
+            SELECT sector_id, estado, count(*) FROM nuevas
+            GROUP BY sector_id, estado ORDER BY sector_id, estado
+            ON CONFLICT (sector_id, estado) DO UPDATE
+                SET cantidad = planta_conteo.cantidad + EXCLUDED.cantidad
+            RETURNING sector_id
+        )
+        SELECT array_agg(DISTINCT sector_id) INTO sectores FROM cambiados;
+    ELSIF TG_OP = 'DELETE' THEN
+        -- Solo UPDATE: si el sector se está borrando (cascada) sus filas ya no están
+        WITH cambiados AS (
+            UPDATE planta_conteo c SET cantidad = c.cantidad - v.n
+            FROM (SELECT sector_id, estado, count(*) AS n FROM viejas GROUP BY sector_id, estado) v
+            WHERE c.sector_id = v.sector_id AND c.estado = v.estado
+            RETURNING c.sector_id
+        )
+        SELECT array_agg(DISTINCT sector_id) INTO sectores FROM cambiados;
+    ELSE
+        -- Solo cuentan los cambios de sector o de estado
+        WITH cambiados AS (
+            INSERT INTO planta_conteo (sector_id, estado, cantidad)
+            SELECT sector_id, estado, sum(d) FROM (
+                SELECT sector_id, estado, 1 AS d FROM nuevas
+                UNION ALL
+                SELECT sector_id, estado, -1 AS d FROM viejas
+            ) x
+            GROUP BY sector_id, estado HAVING sum(d) <> 0 ORDER BY sector_id, estado
+            ON CONFLICT (sector_id, estado) DO UPDATE
+                SET cantidad = planta_conteo.cantidad + EXCLUDED.cantidad
+            RETURNING sector_id
+        )
+        SELECT array_agg(DISTINCT sector_id) INTO sectores FROM cambiados;
+    END IF;
+
+    IF sectores IS NOT NULL THEN
+        PERFORM planta_conteo_marcar_sync(sectores);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Borrar un sector (o moverlo de finca) cambia el conteo de la finca, pero en
+-- la cascada el sector ya no está para encontrarla: se marca desde acá
+CREATE OR REPLACE FUNCTION planta_conteo_marcar_fincas() RETURNS trigger AS $$
+DECLARE
+    fincas INTEGER[];
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        SELECT array_agg(DISTINCT finca_id) INTO fincas FROM viejas;
+    ELSE
+        SELECT array_agg(DISTINCT f) INTO fincas FROM (
+            SELECT v.finca_id AS f FROM viejas v JOIN nuevas n ON n.id = v.id WHERE n.finca_id <> v.finca_id
+            UNION
+            SELECT n.finca_id FROM viejas v JOIN nuevas n ON n.id = v.id WHERE n.finca_id <> v.finca_id
+        ) x;
+    END IF;
+
+    -- Fincas que siguen existiendo (si se borra la finca queda su tombstone)
+    INSERT INTO sync_cambio (tabla, fila_id, borrado)
+    SELECT 'finca', f.id, false FROM finca f WHERE f.id = ANY(fincas)
+    ORDER BY f.id
+    ON CONFLICT (tabla, fila_id) DO UPDATE
+        SET txid = pg_current_xact_id(), borrado = false, modificado_en = now();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_planta_conteo_sector_upd ON sector;
+CREATE TRIGGER trg_planta_conteo_sector_upd AFTER UPDATE ON sector
+    REFERENCING OLD TABLE AS viejas NEW TABLE AS nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION planta_conteo_marcar_fincas();
+
+DROP TRIGGER IF EXISTS trg_planta_conteo_sector_del ON sector;
+CREATE TRIGGER trg_planta_conteo_sector_del AFTER DELETE ON sector
+    REFERENCING OLD TABLE AS viejas
+    FOR EACH STATEMENT EXECUTE FUNCTION planta_conteo_marcar_fincas();
@@ -0,0 +1,71 @@
+-- 016: el alta de una revisión ya no crea particiones (migraciones/013)
+-- particiones_revision corría particiones_asegurar() dentro de la transacción
+-- de POST /revisiones: ATTACH PARTITION clona las FKs y toma SHARE ROW
+-- EXCLUSIVE sobre revision, planta y revision_unitaria, así que las demás
+-- escrituras esperaban hasta el commit de ese request. Las particiones las
+-- crean el arranque y cada pasada del worker de limpieza (o `python
+-- limpieza.py` por cron, con LIMPIEZA_WORKER=0) con PARTICIONES_POR_DELANTE
+-- tramos de margen; si igual falta la del tramo, el alta falla enseguida.
+
+-- Crea las particiones que falten desde la revisión más vieja hasta
+-- `por_delante` tramos después del último id entregado por la secuencia (no
+-- de max(id): un alta fallida o un setval dejan huecos). ATTACH toma SHARE
+-- UPDATE EXCLUSIVE en la tabla padre, pero al clonar las FKs también SHARE ROW
+-- EXCLUSIVE en revision, planta y revision_unitaria: frena las escrituras de
+-- esas tablas mientras dura la transacción, por eso corre fuera de los requests.
+CREATE OR REPLACE FUNCTION particiones_asegurar(por_delante INTEGER DEFAULT 2) RETURNS SETOF TEXT AS $$
+DECLARE
+    tam     INTEGER;
+    primera INTEGER;
+    ultima  INTEGER;
+    t       TEXT;
+    n       INTEGER;
+    nombre  TEXT;
+BEGIN
+    -- Dos procesos asegurando a la vez (arranque, worker de limpieza, admin)
+    PERFORM pg_advisory_xact_lock(hashtext('particiones_asegurar'));
+
+    SELECT tamano INTO tam FROM particion_revisiones;
+    SELECT coalesce(min(id), 0) / tam,
+           greatest(coalesce(max(id), 0),
+                    coalesce(pg_sequence_last_value(pg_get_serial_sequence('revision', 'id')::regclass), 0))
+           / tam + por_delante
+      INTO primera, ultima
+      FROM revision;
+
+    -- revision_unitaria antes que imagen (la FK de imagen apunta a sus particiones)
+    FOREACH t IN ARRAY ARRAY['revision_unitaria', 'imagen', 'revision_imagen'] LOOP
+        FOR n IN primera..ultima LOOP
+            nombre := t || '_p' || lpad(n::text, 6, '0');
+            CONTINUE WHEN to_regclass(nombre) IS NOT NULL;
+            EXECUTE 'CREATE TABLE ' || quote_ident(nombre)
+                 || ' (LIKE ' || quote_ident(t) || ' INCLUDING DEFAULTS INCLUDING CONSTRAINTS)';
+            EXECUTE 'ALTER TABLE ' || quote_ident(t) || ' ATTACH PARTITION ' || quote_ident(nombre)
+                 || ' FOR VALUES FROM (' || n * tam || ') TO (' || (n + 1) * tam || ')';
+            RETURN NEXT nombre;
+        END LOOP;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Alta de revisiones: solo verifica que exista la partición de su tramo
+
+CREATE OR REPLACE FUNCTION particiones_revision() RETURNS trigger AS $$
+DECLARE
+    faltante TEXT;
+BEGIN
+    SELECT min(nombre) INTO faltante FROM (
+        SELECT DISTINCT 'revision_unitaria_p' || lpad((r.id / p.tamano)::text, 6, '0') AS nombre
+        FROM nuevas r, particion_revisiones p
+    ) x
+    WHERE to_regclass(nombre) IS NULL;
+
+    IF faltante IS NOT NULL THEN
+        RAISE EXCEPTION USING
+            ERRCODE = 'object_not_in_prerequisite_state',
+            MESSAGE = 'Falta la partición ' || faltante,
+            HINT = 'Las crea el worker de limpieza; a mano: python particiones.py --asegurar';
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
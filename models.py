@@ -9,12 +9,17 @@ from sqlalchemy import (
     DateTime,
     Text,
     Numeric,
+    Float,
     ForeignKey,
+    ForeignKeyConstraint,
     Enum as SAEnum,
     Table,
     func,
+    select,
+    cast,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import relationship, column_property
 from database import Base
 
 
@@ -109,7 +114,7 @@ class Sector(Base):
     nombre = Column(String(100), nullable=False)
     descripcion = Column(Text, nullable=True)
     area_hectareas = Column(Numeric(10, 2), nullable=True)
-    plantas_cantidad = Column(Numeric(10, 2), nullable=True)
+    # plantas_cantidad / plantas_por_estado: al final del archivo (planta_conteo)
 
     finca = relationship("Finca", back_populates="sectores")
 
@@ -154,6 +159,12 @@ class Planta(Base):
     certificado_patron = Column(Boolean, nullable=True, server_default="false")
     certificado_yema = Column(Boolean, nullable=True, server_default="false")
 
+    # Posición (migraciones/011): plano del sector y/o GPS
+    fila = Column(Integer, nullable=True)
+    columna = Column(Integer, nullable=True)
+    lat = Column(Float, nullable=True)
+    lon = Column(Float, nullable=True)
+
     sector = relationship("Sector", back_populates="plantas")
 
     revisiones_unitarias = relationship(
@@ -230,10 +241,13 @@ class Revision(Base):
 
 
 class RevisionUnitaria(Base):
+    # Particionada por rangos de revision_id (migraciones/013, particiones.py):
+    # la clave de partición va en la PK
     __tablename__ = "revision_unitaria"
+    __table_args__ = {"postgresql_partition_by": "RANGE (revision_id)"}
 
-    id = Column(Integer, primary_key=True, index=True)
-    revision_id = Column(Integer, ForeignKey("revision.id", ondelete="CASCADE"), nullable=False)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    revision_id = Column(Integer, ForeignKey("revision.id", ondelete="CASCADE"), primary_key=True)
 
     arbol_numero = Column(Integer, nullable=False)
 
@@ -258,16 +272,21 @@ class RevisionUnitaria(Base):
 
 
 class Imagen(Base):
+    # Misma partición que su unidad (migraciones/013): revision_id viaja en la FK
     __tablename__ = "imagen"
-
-    id = Column(BigInteger, primary_key=True, index=True)
-    revision_unitaria_id = Column(
-        BigInteger,
-        ForeignKey("revision_unitaria.id", ondelete="CASCADE"),
-        nullable=False,
-        index=True,
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ["revision_unitaria_id", "revision_id"],
+            ["revision_unitaria.id", "revision_unitaria.revision_id"],
+            ondelete="CASCADE",
+        ),
+        {"postgresql_partition_by": "RANGE (revision_id)"},
     )
 
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    revision_unitaria_id = Column(BigInteger, nullable=False, index=True)
+    revision_id = Column(Integer, primary_key=True)
+
     nombre_archivo = Column(String(255), nullable=False)
     url = Column(Text, nullable=False)
 
@@ -308,14 +327,129 @@ class Trabajador(Base):
 
 
 class RevisionImagen(Base):
+    # Particionada por rangos de revision_id (migraciones/013)
     __tablename__ = "revision_imagen"
+    __table_args__ = {"postgresql_partition_by": "RANGE (revision_id)"}
 
-    id = Column(Integer, primary_key=True, index=True)
-    revision_id = Column(Integer, ForeignKey("revision.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    revision_id = Column(Integer, ForeignKey("revision.id", ondelete="CASCADE"), primary_key=True, index=True)
 
     nombre_original = Column(String(255), nullable=False)
     nombre_archivo = Column(String(255), nullable=False)
     ruta = Column(String(512), nullable=False)
     orden = Column(Integer, nullable=False)
+    sha256 = Column(String(64), nullable=True, index=True)  # migraciones/001
+    ruta_original = Column(String(512), nullable=True)  # en ALMACEN_ORIGINALES, migraciones/003
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
 
+class ImagenBlob(Base):
+    # Contenido único de imagen (services/blob_store.py); ref_count lo mantiene
+    # un trigger sobre revision_imagen (migraciones/002)
+    __tablename__ = "imagen_blob"
+
+    sha256 = Column(String(64), primary_key=True)
+    ruta = Column(String(512), nullable=False)
+    tamano_bytes = Column(BigInteger, nullable=False, server_default="0")
+    ref_count = Column(Integer, nullable=False, server_default="0")
+    crc32 = Column(BigInteger, nullable=True)  # descarga en ZIP, migraciones/004
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+# ==========================================================
+# ANALÍTICA DE PRODUCTIVIDAD (migraciones/006, crud_productividad.py)
+# ==========================================================
+# Agregados por día / trabajador / sector; los días a recalcular los marcan
+# triggers sobre revision, revision_unitaria y revision_trabajador
+
+productividad_diaria = Table(
+    "productividad_diaria",
+    Base.metadata,
+    Column("dia", Date, primary_key=True),
+    Column("trabajador_id", Integer, primary_key=True),
+    Column("sector_id", Integer, primary_key=True),
+    Column("revisiones", Integer, nullable=False, server_default="0"),
+    Column("arboles", Integer, nullable=False, server_default="0"),
+    Column("calificacion_suma", Numeric(14, 2), nullable=True),
+    Column("calificacion_n", Integer, nullable=False, server_default="0"),
+)
+
+productividad_pendiente = Table(
+    "productividad_pendiente",
+    Base.metadata,
+    Column("dia", Date, primary_key=True),
+)
+
+
+# ==========================================================
+# LIMPIEZA DEL ALMACENAMIENTO (migraciones/007, limpieza.py)
+# ==========================================================
+# Carpetas de revisiones borradas; las encola un trigger sobre revision
+
+limpieza_almacen = Table(
+    "limpieza_almacen",
+    Base.metadata,
+    Column("id", BigInteger, primary_key=True),
+    Column("almacen", String(20), nullable=False),
+    Column("prefijo", String(512), nullable=False),
+    Column("intentos", Integer, nullable=False, server_default="0"),
+    Column("proximo_intento", DateTime(timezone=True), nullable=False, server_default=func.now()),
+    Column("ultimo_error", Text, nullable=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+# ==========================================================
+# CONTEO DE PLANTAS (migraciones/012, crud_plantas_count.py)
+# ==========================================================
+# Por sector y estado; lo mantienen triggers sobre planta. Las respuestas de
+# sectores y fincas lo leen con una subconsulta por PK, sin COUNT(*) sobre planta
+
+planta_conteo = Table(
+    "planta_conteo",
+    Base.metadata,
+    Column("sector_id", Integer, ForeignKey("sector.id", ondelete="CASCADE"), primary_key=True),
+    Column("estado", SAEnum(EstadoPlanta, name="estado_planta", native_enum=True, create_type=False), primary_key=True),
+    Column("cantidad", Integer, nullable=False, server_default="0"),
+)
+
+
+def _suma_plantas(filtro=None):
+    suma = func.sum(planta_conteo.c.cantidad)
+    return func.coalesce(suma if filtro is None else suma.filter(filtro), 0)
+
+
+# {"viva": n, "enferma": n, ...} con todos los estados (valor de la BD como clave)
+_PLANTAS_POR_ESTADO = func.jsonb_build_object(
+    *(x for e in EstadoPlanta for x in (e.value, _suma_plantas(cast(planta_conteo.c.estado, String) == e.value))),
+    type_=JSONB,
+)
+
+Sector.plantas_cantidad = column_property(
+    select(_suma_plantas())
+    .where(planta_conteo.c.sector_id == Sector.id)
+    .correlate_except(planta_conteo)
+    .scalar_subquery()
+)
+Sector.plantas_por_estado = column_property(
+    select(_PLANTAS_POR_ESTADO)
+    .where(planta_conteo.c.sector_id == Sector.id)
+    .correlate_except(planta_conteo)
+    .scalar_subquery()
+)
+
+_conteo_finca = planta_conteo.join(Sector.__table__, Sector.id == planta_conteo.c.sector_id)
+Finca.plantas_cantidad = column_property(
+    select(_suma_plantas())
+    .select_from(_conteo_finca)
+    .where(Sector.finca_id == Finca.id)
+    .correlate_except(planta_conteo, Sector)
+    .scalar_subquery()
+)
+Finca.plantas_por_estado = column_property(
+    select(_PLANTAS_POR_ESTADO)
+    .select_from(_conteo_finca)
+    .where(Sector.finca_id == Finca.id)
+    .correlate_except(planta_conteo, Sector)
+    .scalar_subquery()
+)
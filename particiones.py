@@ -0,0 +1,136 @@
+# particiones.py
+"""
+Particiones por rango de revision_id de revision_unitaria, imagen y
+revision_imagen (migraciones/013). El arranque y cada pasada del worker de
+limpieza (limpieza.py) dejan PARTICIONES_POR_DELANTE tramos listos; el
+trigger sobre revision no las crea, solo rechaza el alta si falta la de su
+tramo (migraciones/016). Acá se piden, se listan y se arman los filtros que
+dejan a Postgres descartar particiones.
+
+Uso:
+    python particiones.py              # listar particiones
+    python particiones.py --asegurar   # crear las que falten
+"""
+import os
+import argparse
+import logging
+
+from fastapi import APIRouter, Depends
+from sqlalchemy import select, text, func
+from sqlalchemy.orm import Session
+
+from auth_simple import require_admin_key
+from database import SessionLocal
+
+# ----------------------------
+# CONFIGURACIÓN
+# ----------------------------
+# Tramos (de particion_revisiones.tamano revisiones) creados por delante de la última revisión
+PARTICIONES_POR_DELANTE = int(os.getenv("PARTICIONES_POR_DELANTE", "2"))
+
+logger = logging.getLogger("colibri.particiones")
+
+
+def asegurar_particiones(db: Session, por_delante: int = PARTICIONES_POR_DELANTE) -> list[str]:
+    creadas = list(db.scalars(text("SELECT particiones_asegurar(:n)"), {"n": por_delante}))
+    db.commit()
+    if creadas:
+        logger.info("Particiones creadas: %s", ", ".join(creadas))
+    return creadas
+
+
+def crear_particiones_al_arrancar() -> None:
+    db = SessionLocal()
+    try:
+        asegurar_particiones(db)
+    finally:
+        db.close()
+
+
+_LISTADO = text("""
+    SELECT p.relname AS tabla, c.relname AS particion,
+           pg_get_expr(c.relpartbound, c.oid) AS rango,
+           greatest(c.reltuples, 0)::bigint AS filas_estimadas
+    FROM pg_inherits i
+    JOIN pg_class p ON p.oid = i.inhparent
+    JOIN pg_class c ON c.oid = i.inhrelid
+    WHERE p.relname IN ('revision_unitaria', 'imagen', 'revision_imagen')
+      AND p.relnamespace = 'public'::regnamespace
+    ORDER BY 1, 2
+""")
+
+
+def listar_particiones(db: Session) -> list[dict]:
+    return [dict(f._mapping) for f in db.execute(_LISTADO)]
+
+
+# ----------------------------
+# PODA EN CONSULTAS
+# ----------------------------
+def rango_revisiones(columna, revisiones):
+    """
+    Acota `columna` (un revision_id de las tablas particionadas) al rango de
+    ids que devuelve `revisiones` (un select de Revision.id). Un join contra
+    revision filtrada por fecha / sector no le alcanza al planificador para
+    descartar particiones; min / max como subconsultas escalares sí, en
+    tiempo de ejecución ("Subplans Removed" en EXPLAIN ANALYZE).
+    """
+    sub = revisiones.subquery()
+    return columna.between(
+        select(func.min(sub.c.id)).scalar_subquery(),
+        select(func.max(sub.c.id)).scalar_subquery(),
+    )
+
+
+# ----------------------------
+# ENDPOINTS ADMIN
+# ----------------------------
+router = APIRouter(
+    prefix="/admin/particiones",
+    tags=["Admin"],
+    dependencies=[Depends(require_admin_key)],
+)
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@router.get("")
+def ver_particiones(db: Session = Depends(get_db)):
+    return listar_particiones(db)
+
+
+@router.post("")
+def crear_particiones(por_delante: int = PARTICIONES_POR_DELANTE, db: Session = Depends(get_db)):
+    return {"creadas": asegurar_particiones(db, por_delante)}
+
+
+# ----------------------------
+# CLI (cron)
+# ----------------------------
+def main():
+    ap = argparse.ArgumentParser(description="Particiones por rango de revisión")
+    ap.add_argument("--asegurar", action="store_true", help="crear las particiones que falten")
+    ap.add_argument("--por-delante", type=int, default=PARTICIONES_POR_DELANTE)
+    args = ap.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.asegurar:
+            for nombre in asegurar_particiones(db, args.por_delante):
+                print("creada", nombre)
+        particiones = listar_particiones(db)
+    finally:
+        db.close()
+    for p in particiones:
+        print(f"{p['tabla']:<18} {p['particion']:<26} {p['rango']:<45} ~{p['filas_estimadas']:,} filas")
+    print(f"{len(particiones):,} particiones")
+
+
+if __name__ == "__main__":
+    main()
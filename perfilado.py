@@ -0,0 +1,176 @@
+# perfilado.py
+import os
+import re
+import sys
+import random
+import threading
+import uuid
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+
+from auth_simple import ADMIN_API_KEY, require_admin_key, es_admin_key_valida
+
+# ----------------------------
+# CONFIGURACIÓN
+# ----------------------------
+# Se perfila un request si trae "X-Profile: 1" + "X-Admin-Key" válida,
+# o al azar con probabilidad PROFILE_SAMPLE_RATE (0 = nunca).
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "perfiles"))
+PROFILE_MAX_ARCHIVOS = int(os.getenv("PROFILE_MAX_ARCHIVOS", "200"))
+
+NOMBRE_PERFIL_RE = re.compile(r"^[A-Za-z0-9_.-]+\.folded$")
+
+
+def perfilado_habilitado() -> bool:
+    """Sin admin key ni muestreo el middleware ni se instala (costo cero)."""
+    return bool(ADMIN_API_KEY) or PROFILE_SAMPLE_RATE > 0
+
+
+# ----------------------------
+# MUESTREADOR DE STACKS
+# ----------------------------
+class Muestreador(threading.Thread):
+    """
+    Toma muestras de sys._current_frames() cada PROFILE_INTERVAL_MS y se queda con
+    los stacks que pasan por el endpoint del request (scope["endpoint"]), tanto en
+    el event loop (handlers async) como en el threadpool (handlers sync).
+    Las llamadas nativas (cv2 / zxingcpp) se atribuyen a la línea Python que las invoca.
+
+    Ojo: si hay requests concurrentes al MISMO endpoint, sus muestras se mezclan.
+    """
+
+    def __init__(self, scope: dict):
+        super().__init__(name="perfilador", daemon=True)
+        self.scope = scope
+        self.intervalo = PROFILE_INTERVAL_MS / 1000
+        self.muestras: Counter[str] = Counter()
+        self.total_muestras = 0
+        self._detener = threading.Event()
+
+    def _codigo_endpoint(self):
+        endpoint = self.scope.get("endpoint")
+        return getattr(endpoint, "__code__", None)
+
+    def run(self):
+        propio = threading.get_ident()
+        while not self._detener.wait(self.intervalo):
+            codigo = self._codigo_endpoint()
+            if codigo is None:
+                continue  # todavía no se resolvió la ruta
+            self.total_muestras += 1
+            for tid, frame in sys._current_frames().items():
+                if tid == propio:
+                    continue
+                pila = []
+                incluye_endpoint = False
+                while frame is not None:
+                    co = frame.f_code
+                    if co is codigo:
+                        incluye_endpoint = True
+                    pila.append(f"{co.co_name} ({Path(co.co_filename).name}:{frame.f_lineno})")
+                    frame = frame.f_back
+                if incluye_endpoint:
+                    self.muestras[";".join(reversed(pila))] += 1
+
+    def detener(self):
+        self._detener.set()
+        self.join(timeout=1)
+
+
+def _nombre_perfil(scope: dict) -> str:
+    ruta = re.sub(r"[^A-Za-z0-9]+", "-", scope.get("path", "")).strip("-") or "root"
+    fecha = datetime.now().strftime("%Y%m%d-%H%M%S")
+    return f"{fecha}_{scope.get('method', 'GET')}_{ruta[:60]}_{uuid.uuid4().hex[:6]}.folded"
+
+
+def _guardar_perfil(nombre: str, muestras: Counter) -> None:
+    """Formato 'folded' (flamegraph.pl, speedscope, inferno): 'f1;f2;f3 <muestras>' por línea."""
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    lineas = [f"{pila} {n}" for pila, n in muestras.most_common()]
+    (PROFILE_DIR / nombre).write_text("\n".join(lineas) + "\n", encoding="utf-8")
+
+    archivos = sorted(PROFILE_DIR.glob("*.folded"), key=lambda p: p.stat().st_mtime)
+    for viejo in archivos[:-PROFILE_MAX_ARCHIVOS]:
+        viejo.unlink(missing_ok=True)
+
+
+# ----------------------------
+# MIDDLEWARE
+# ----------------------------
+class PerfiladoMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    def _debe_perfilar(self, scope) -> bool:
+        headers = dict(scope.get("headers") or [])
+        if headers.get(b"x-profile") == b"1":
+            admin = headers.get(b"x-admin-key")
+            if es_admin_key_valida(admin.decode("latin-1") if admin else None):
+                return True
+        return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._debe_perfilar(scope):
+            await self.app(scope, receive, send)
+            return
+
+        nombre = _nombre_perfil(scope)
+        muestreador = Muestreador(scope)
+
+        async def send_con_header(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", nombre.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        muestreador.start()
+        try:
+            await self.app(scope, receive, send_con_header)
+        finally:
+            muestreador.detener()
+            if muestreador.muestras:
+                _guardar_perfil(nombre, muestreador.muestras)
+
+
+# ----------------------------
+# ENDPOINTS ADMIN
+# ----------------------------
+router = APIRouter(
+    prefix="/admin/perfiles",
+    tags=["Admin"],
+    dependencies=[Depends(require_admin_key)],
+)
+
+
+@router.get("")
+def listar_perfiles(limit: int = 50):
+    if not PROFILE_DIR.exists():
+        return {"items": []}
+    archivos = sorted(PROFILE_DIR.glob("*.folded"), key=lambda p: p.stat().st_mtime, reverse=True)
+    return {
+        "items": [
+            {
+                "nombre": p.name,
+                "bytes": p.stat().st_size,
+                "fecha": datetime.fromtimestamp(p.stat().st_mtime).isoformat(),
+            }
+            for p in archivos[:limit]
+        ]
+    }
+
+
+@router.get("/{nombre}")
+def descargar_perfil(nombre: str):
+    if not NOMBRE_PERFIL_RE.match(nombre):
+        raise HTTPException(status_code=400, detail="Nombre de perfil inválido")
+    path = PROFILE_DIR / nombre
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Perfil no existe")
+    return FileResponse(path, media_type="text/plain; charset=utf-8", filename=nombre)
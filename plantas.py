@@ -0,0 +1,68 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from crud_plantas import plantas_visibles, plantas_cercanas, PLANTAS_VISIBLES_LIMITE, SECTOR_NO_EXISTE
+
+router = APIRouter(prefix="/plantas", tags=["Plantas"])
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@router.get("/visibles", response_model=dict)
+def get_plantas_visibles(
+    sector_id: int = Query(...),
+    min_lat: float | None = Query(default=None),
+    min_lon: float | None = Query(default=None),
+    max_lat: float | None = Query(default=None),
+    max_lon: float | None = Query(default=None),
+    fila_desde: int | None = Query(default=None),
+    fila_hasta: int | None = Query(default=None),
+    columna_desde: int | None = Query(default=None),
+    columna_hasta: int | None = Query(default=None),
+    limit: int = Query(default=PLANTAS_VISIBLES_LIMITE, ge=1, le=10000),
+    db: Session = Depends(get_db),
+):
+    """
+    Plantas del sector dentro del viewport del mapa: rectángulo GPS
+    (min/max lat/lon) o rango de filas y columnas del plano.
+    """
+    res, err = plantas_visibles(
+        db,
+        sector_id,
+        min_lat=min_lat,
+        min_lon=min_lon,
+        max_lat=max_lat,
+        max_lon=max_lon,
+        fila_desde=fila_desde,
+        fila_hasta=fila_hasta,
+        columna_desde=columna_desde,
+        columna_hasta=columna_hasta,
+        limite=limit,
+    )
+    if err:
+        raise HTTPException(status_code=404 if err == SECTOR_NO_EXISTE else 400, detail=err)
+    return res
+
+
+@router.get("/cercanas", response_model=list[dict])
+def get_plantas_cercanas(
+    sector_id: int = Query(...),
+    lat: float | None = Query(default=None),
+    lon: float | None = Query(default=None),
+    fila: int | None = Query(default=None),
+    columna: int | None = Query(default=None),
+    k: int = Query(default=5, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """Las k plantas más cercanas a un punto GPS (metros) o a una fila/columna (plantas)."""
+    filas, err = plantas_cercanas(db, sector_id, lat=lat, lon=lon, fila=fila, columna=columna, k=k)
+    if err:
+        raise HTTPException(status_code=404 if err == SECTOR_NO_EXISTE else 400, detail=err)
+    return filas
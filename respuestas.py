@@ -0,0 +1,62 @@
+# respuestas.py
+from decimal import Decimal
+
+import orjson
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+# ----------------------------
+# RESPUESTA JSON CON ORJSON
+# ----------------------------
+# OPT_UTC_Z: datetime en UTC como "...Z", igual que Pydantic (si no, "+00:00")
+_OPCIONES = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z
+
+
+def _por_defecto(obj):
+    # Mismo formato que Pydantic: Decimal como string ("12.50")
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Tipo no serializable: {type(obj).__name__}")
+
+
+class RespuestaJSON(JSONResponse):
+    """
+    JSONResponse con orjson (datetime / date / UUID / Enum / numpy nativos).
+    Es la default_response_class de la app: también acelera las respuestas
+    con response_model, que FastAPI valida antes y después pasa por acá.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, default=_por_defecto, option=_OPCIONES)
+
+
+# ----------------------------
+# LISTADOS: fields= y filas confiables
+# ----------------------------
+def parsear_campos(fields: str | None, schema) -> list[str]:
+    """
+    Columnas pedidas con ?fields=a,b (en el orden del schema de respuesta);
+    sin fields, todas. 400 si piden una que el schema no expone.
+    """
+    disponibles = list(schema.model_fields)
+    if not fields:
+        return disponibles
+
+    pedidos = {c.strip() for c in fields.split(",") if c.strip()}
+    invalidos = sorted(pedidos - set(disponibles))
+    if invalidos:
+        raise HTTPException(status_code=400, detail=f"fields inválidos: {invalidos}. Disponibles: {disponibles}")
+    return [c for c in disponibles if c in pedidos]
+
+
+def columnas(modelo, campos: list[str]) -> list:
+    return [getattr(modelo, c) for c in campos]
+
+
+def respuesta_filas(filas) -> RespuestaJSON:
+    """
+    Filas leídas de nuestra BD (Row de un select por columnas): se serializan
+    directo, sin pasar cada una por el modelo Pydantic (from_attributes).
+    Devolver un Response hace que FastAPI no aplique el response_model.
+    """
+    return RespuestaJSON([dict(f._mapping) for f in filas])
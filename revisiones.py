@@ -1,12 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from database import SessionLocal
 from schemas import RevisionCreate, RevisionResponse
-from crud_revisiones import crear_revision, listar_revisiones, obtener_revision, eliminar_revision
+from crud_revisiones import crear_revision, listar_revisiones, obtener_revision, eliminar_revision, PARTICION_FALTANTE
 
+from services.almacenamiento import STORAGE_ROOT
 from services.zip_revision_local import procesar_zip_revision_local
-from crud_imagenes import guardar_imagenes_revision
+from services.ingesta_imagenes import preparar_imagenes
+from services.zip_streaming import ZipEnStreaming, parsear_rango
+from crud_imagenes import (
+    guardar_imagenes_revision,
+    agregar_imagenes_revision,
+    listar_imagenes_revision,
+    entradas_zip_revision,
+)
+from estaticos import url_imagen
+from respuestas import parsear_campos, respuesta_filas
 
 router = APIRouter(prefix="/revisiones", tags=["Revisiones"])
 
@@ -23,18 +36,24 @@ def get_db():
 def create_revision(body: RevisionCreate, db: Session = Depends(get_db)):
     rev, err = crear_revision(db, body)
     if err:
-        raise HTTPException(status_code=400, detail=err)
+        raise HTTPException(status_code=503 if err == PARTICION_FALTANTE else 400, detail=err)
     return rev
 
 
-@router.get("", response_model=list[RevisionResponse])
+@router.get(
+    "",
+    response_model=None,  # respuesta_filas no pasa por el modelo
+    responses={200: {"model": list[RevisionResponse], "description": "Con `fields`, cada objeto trae solo esas columnas"}},
+)
 def get_revisiones(
     sector_id: int | None = Query(default=None),
     skip: int = 0,
     limit: int = 50,
+    fields: str | None = Query(default=None, description="Columnas a devolver, ej. id,nombre (el resto no viene en la respuesta)"),
     db: Session = Depends(get_db),
 ):
-    return listar_revisiones(db, sector_id=sector_id, skip=skip, limit=limit)
+    campos = parsear_campos(fields, RevisionResponse)
+    return respuesta_filas(listar_revisiones(db, sector_id=sector_id, skip=skip, limit=limit, campos=campos))
 
 
 @router.get("/{revision_id}", response_model=RevisionResponse)
@@ -67,10 +86,21 @@ def upload_zip_revision(
     items = procesar_zip_revision_local(
         revision_id=revision_id,
         zip_file=zipfile,
-        storage_root="storage",
+        storage_root=STORAGE_ROOT,
     )
+    return registrar_imagenes_revision(db, revision_id, items)
+
 
+def registrar_imagenes_revision(db: Session, revision_id: int, items: list[dict]) -> dict:
+    """Guarda las imágenes ya extraídas del ZIP y arma la respuesta (también la usan las subidas reanudables)."""
     count = guardar_imagenes_revision(db, revision_id, items)
+    return _respuesta_imagenes(revision_id, count, items)
+
+
+def _respuesta_imagenes(revision_id: int, count: int, items: list[dict]) -> dict:
+    for it in items:
+        it.pop("tmp_path", None)
+        it["url"] = url_imagen(it["rel_path"], it.get("sha256"))
 
     return {
         "revision_id": revision_id,
@@ -78,3 +108,100 @@ def upload_zip_revision(
         "items": items,
         "static_base": "/static",
     }
+
+
+@router.post("/{revision_id}/imagenes", response_model=dict)
+def upload_imagenes_revision(
+    revision_id: int,
+    files: List[UploadFile] = File(...),
+    orden_inicio: Optional[int] = Form(None, ge=1),
+    total: Optional[int] = Form(None, ge=1),
+    reiniciar: bool = Form(False),
+    db: Session = Depends(get_db),
+):
+    """
+    Alternativa al ZIP: una imagen o un lote chico por request. Cada lote queda
+    guardado y vinculado al responder, mientras el cliente sube el siguiente.
+    Para el mismo resultado que el ZIP, enviar las imágenes en orden alfabético
+    con `total` = cantidad de imágenes y `reiniciar=true` en el primer lote.
+    """
+    rev = obtener_revision(db, revision_id)
+    if not rev:
+        raise HTTPException(status_code=404, detail="Revisión no existe")
+
+    items = preparar_imagenes(files, storage_root=STORAGE_ROOT)
+    items, err = agregar_imagenes_revision(
+        db, revision_id, items, orden_inicio=orden_inicio, total=total, reiniciar=reiniciar
+    )
+    if err:
+        raise HTTPException(status_code=400, detail=err)
+
+    return _respuesta_imagenes(revision_id, len(items), items)
+
+
+@router.api_route("/{revision_id}/imagenes.zip", methods=["GET", "HEAD"])
+def download_zip_revision(revision_id: int, request: Request, db: Session = Depends(get_db)):
+    """
+    Todas las imágenes de la revisión en un ZIP generado al vuelo (entradas sin
+    comprimir, leídas directo del almacén). Soporta Range / If-Range para
+    reanudar descargas cortadas.
+    """
+    rev = obtener_revision(db, revision_id)
+    if not rev:
+        raise HTTPException(status_code=404, detail="Revisión no existe")
+
+    entradas = entradas_zip_revision(db, revision_id)
+    if not entradas:
+        raise HTTPException(status_code=404, detail="La revisión no tiene imágenes")
+
+    archivo = ZipEnStreaming(entradas, rev.fecha_revision)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": archivo.etag,
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": f'attachment; filename="revision_{revision_id}.zip"',
+    }
+    if request.headers.get("if-none-match") == archivo.etag:
+        return Response(status_code=304, headers=headers)
+
+    rango = None
+    if_range = request.headers.get("if-range")
+    if not if_range or if_range == archivo.etag:  # si el ZIP cambió, se manda completo
+        rango = parsear_rango(request.headers.get("range"), archivo.tamano)
+
+    status_code = 200
+    inicio, fin = 0, archivo.tamano - 1
+    if rango:
+        inicio, fin = rango
+        status_code = 206
+        headers["Content-Range"] = f"bytes {inicio}-{fin}/{archivo.tamano}"
+    headers["Content-Length"] = str(fin - inicio + 1)
+
+    if request.method == "HEAD":
+        return Response(status_code=status_code, headers=headers, media_type="application/zip")
+    return StreamingResponse(archivo.iterar(inicio, fin), status_code=status_code, headers=headers, media_type="application/zip")
+
+
+@router.get("/{revision_id}/imagenes", response_model=dict)
+def get_imagenes_revision(revision_id: int, db: Session = Depends(get_db)):
+    rev = obtener_revision(db, revision_id)
+    if not rev:
+        raise HTTPException(status_code=404, detail="Revisión no existe")
+
+    imgs = listar_imagenes_revision(db, revision_id)
+    return {
+        "revision_id": revision_id,
+        "count": len(imgs),
+        "items": [
+            {
+                "original_name": img.nombre_original,
+                "stored_name": img.nombre_archivo,
+                "rel_path": img.ruta,
+                "order_index": img.orden,
+                "sha256": img.sha256,
+                # URL versionada: el navegador / CDN la cachea como inmutable
+                "url": url_imagen(img.ruta, img.sha256),
+            }
+            for img in imgs
+        ],
+    }
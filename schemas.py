@@ -26,6 +26,8 @@ class FincaUpdate(BaseModel):
 class FincaResponse(FincaBase):
     id: int
     fecha_creacion: Optional[datetime] = None
+    plantas_cantidad: int = 0
+    plantas_por_estado: dict[str, int] = Field(default_factory=dict)
 
     class Config:
         from_attributes = True
@@ -39,7 +41,6 @@ class SectorBase(BaseModel):
     nombre: str
     descripcion: Optional[str] = None
     area_hectareas: Optional[Decimal] = None
-    plantas_cantidad: Optional[Decimal] = None
 
 
 class SectorCreate(SectorBase):
@@ -50,11 +51,13 @@ class SectorUpdate(BaseModel):
     nombre: Optional[str] = None
     descripcion: Optional[str] = None
     area_hectareas: Optional[Decimal] = None
-    plantas_cantidad: Optional[Decimal] = None
 
 
 class SectorResponse(SectorBase):
     id: int
+    # Mantenidos por la BD (migraciones/012), no se cargan a mano
+    plantas_cantidad: int = 0
+    plantas_por_estado: dict[str, int] = Field(default_factory=dict)
 
     class Config:
         from_attributes = True
@@ -117,6 +120,30 @@ class RevisionResponse(RevisionCreate):
         from_attributes = True
 
 
+# =========================
+# CUADRILLAS (revision_trabajador)
+# =========================
+class CuadrillaUpdate(BaseModel):
+    revision_ids: List[int] = Field(..., min_length=1, max_length=1000)
+    trabajador_ids: List[int] = Field(default_factory=list, max_length=1000)  # vacía = sin cuadrilla
+
+
+class CuadrillaCambio(BaseModel):
+    revision_ids: List[int] = Field(..., min_length=1, max_length=1000)
+    trabajador_ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+
+# =========================
+# SUBIDAS REANUDABLES
+# =========================
+class SubidaCreate(BaseModel):
+    tipo: str  # "revision_zip" (POST /revisiones/{id}/zip) o "qr_zip" (POST /imagenes/leer-qr-zip)
+    revision_id: int
+    tamano_total: int = Field(..., gt=0)
+    nombre: Optional[str] = None
+    sha256: Optional[str] = Field(None, pattern=r"^[0-9a-fA-F]{64}$")  # del archivo completo, se verifica al finalizar
+
+
 
 class TrabajadorBase(BaseModel):
     nombre: str
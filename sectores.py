@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 from database import SessionLocal
 from schemas import SectorCreate, SectorUpdate, SectorResponse
 from crud_sectores import crear_sector, listar_sectores, obtener_sector, actualizar_sector, eliminar_sector
+from respuestas import parsear_campos, respuesta_filas
 
 router = APIRouter(prefix="/sectores", tags=["Sectores"])
 
@@ -24,14 +25,20 @@ def create_sector(body: SectorCreate, db: Session = Depends(get_db)):
     return sector
 
 
-@router.get("", response_model=list[SectorResponse])
+@router.get(
+    "",
+    response_model=None,  # respuesta_filas no pasa por el modelo
+    responses={200: {"model": list[SectorResponse], "description": "Con `fields`, cada objeto trae solo esas columnas"}},
+)
 def get_sectores(
     finca_id: int | None = Query(default=None),
     skip: int = 0,
     limit: int = 50,
+    fields: str | None = Query(default=None, description="Columnas a devolver, ej. id,nombre (el resto no viene en la respuesta)"),
     db: Session = Depends(get_db),
 ):
-    return listar_sectores(db, finca_id=finca_id, skip=skip, limit=limit)
+    campos = parsear_campos(fields, SectorResponse)
+    return respuesta_filas(listar_sectores(db, finca_id=finca_id, skip=skip, limit=limit, campos=campos))
 
 
 @router.get("/{sector_id}", response_model=SectorResponse)
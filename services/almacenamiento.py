@@ -0,0 +1,296 @@
+# services/almacenamiento.py
+"""
+Backends de almacenamiento de imágenes, con una interfaz común:
+
+    escribir(clave, src, content_type)         -> clave   (stream desde un file-like)
+    guardar_archivo(path, clave, content_type) -> clave   (desde un archivo local)
+    existe(clave) / abrir(clave, desde=0) / borrar(clave) / listar(prefijo) / url(clave)
+
+- "local":  filesystem bajo STORAGE_ROOT (servido por /static)
+- "s3":     S3 compatible (R2, MinIO, moto...). Subidas multipart en streaming con
+            partes concurrentes (boto3 TransferConfig)
+- "worker": el Worker de Cloudflare que escribe en R2 (solo subidas)
+
+Cada backend declara lo que admite (puede_leer / puede_listar / puede_borrar);
+validar_almacenes() rechaza al arrancar un backend que no cubre su uso.
+
+ALMACEN_REVISIONES elige el backend del ZIP de revisión (por defecto "local") y
+ALMACEN_QR el de /imagenes/leer-qr-zip (por defecto "worker", como antes).
+"""
+import mimetypes
+import os
+import shutil
+import uuid
+from functools import lru_cache
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+ALMACEN_REVISIONES = os.getenv("ALMACEN_REVISIONES", "local")
+ALMACEN_QR = os.getenv("ALMACEN_QR", "worker")
+
+STORAGE_ROOT = os.getenv("STORAGE_ROOT", "storage")
+STATIC_URL_BASE = "/static"
+
+S3_BUCKET = os.getenv("S3_BUCKET")
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")  # R2: https://<account>.r2.cloudflarestorage.com
+S3_REGION = os.getenv("S3_REGION", "auto")
+S3_ACCESS_KEY_ID = os.getenv("S3_ACCESS_KEY_ID")
+S3_SECRET_ACCESS_KEY = os.getenv("S3_SECRET_ACCESS_KEY")
+S3_PUBLIC_URL = os.getenv("S3_PUBLIC_URL")  # dominio público del bucket (para armar URLs)
+S3_PART_SIZE = int(os.getenv("S3_PART_SIZE", str(8 * 1024 * 1024)))
+S3_CONCURRENCIA = int(os.getenv("S3_CONCURRENCIA", "8"))
+
+WORKER_UPLOAD_URL = os.getenv("WORKER_UPLOAD_URL", "https://floral-dawn-a37d.omarhgd34.workers.dev")
+WORKER_TIMEOUT = 60
+
+CHUNK = 1024 * 1024
+
+mimetypes.add_type("image/webp", ".webp")
+
+
+def tipo_contenido(nombre: str) -> str:
+    return mimetypes.guess_type(nombre)[0] or "application/octet-stream"
+
+
+# ----------------------------
+# LOCAL
+# ----------------------------
+class AlmacenLocal:
+    nombre = "local"
+    puede_leer = puede_listar = puede_borrar = True
+
+    def __init__(self, root: str = STORAGE_ROOT, url_base: str = STATIC_URL_BASE):
+        self.root = Path(root)
+        self.url_base = url_base
+
+    def ruta_local(self, clave: str) -> Path:
+        path = (self.root / clave).resolve()
+        if not path.is_relative_to(self.root.resolve()):
+            raise ValueError(f"Clave fuera del almacenamiento: {clave}")
+        return path
+
+    def escribir(self, clave: str, src: BinaryIO, content_type: str | None = None) -> str:
+        final = self.ruta_local(clave)
+        final.parent.mkdir(parents=True, exist_ok=True)
+        tmp = final.with_name(f".{final.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with tmp.open("wb") as dst:
+                shutil.copyfileobj(src, dst, CHUNK)
+            os.replace(tmp, final)  # nunca queda un archivo a medio escribir
+        finally:
+            tmp.unlink(missing_ok=True)
+        return clave
+
+    def guardar_archivo(self, path: str | Path, clave: str, content_type: str | None = None) -> str:
+        final = self.ruta_local(clave)
+        final.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.replace(path, final)  # mismo filesystem: rename atómico, sin copiar bytes
+        except OSError:
+            with open(path, "rb") as src:
+                self.escribir(clave, src, content_type)
+            Path(path).unlink(missing_ok=True)
+        return clave
+
+    def existe(self, clave: str) -> bool:
+        return self.ruta_local(clave).is_file()
+
+    def abrir(self, clave: str, desde: int = 0) -> BinaryIO:
+        f = self.ruta_local(clave).open("rb")
+        if desde:
+            f.seek(desde)
+        return f
+
+    def tamano(self, clave: str) -> int:
+        return self.ruta_local(clave).stat().st_size
+
+    def borrar(self, clave: str) -> None:
+        self.ruta_local(clave).unlink(missing_ok=True)
+
+    def listar(self, prefijo: str = "") -> Iterator[tuple[str, int, float]]:
+        """
+        (clave, bytes, mtime) de cada archivo bajo el prefijo. Recorrido ordenado
+        (como S3): con archivos solo en las hojas sale en orden de clave.
+        """
+        base = self.ruta_local(prefijo) if prefijo else self.root.resolve()
+        raiz = self.root.resolve()
+        for dirpath, dirnames, filenames in os.walk(base):
+            dirnames.sort()
+            for f in sorted(filenames):
+                p = Path(dirpath) / f
+                try:
+                    st = p.stat()
+                except FileNotFoundError:
+                    continue
+                yield p.relative_to(raiz).as_posix(), st.st_size, st.st_mtime
+
+    def url(self, clave: str) -> str:
+        return f"{self.url_base}/{clave}"
+
+
+# ----------------------------
+# S3 COMPATIBLE (R2 / MinIO / moto)
+# ----------------------------
+class AlmacenS3:
+    nombre = "s3"
+    puede_leer = puede_listar = puede_borrar = True
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint_url: str | None = None,
+        region: str = "auto",
+        access_key_id: str | None = None,
+        secret_access_key: str | None = None,
+        public_url: str | None = None,
+        part_size: int = S3_PART_SIZE,
+        concurrencia: int = S3_CONCURRENCIA,
+    ):
+        # boto3 solo se importa si se usa este backend
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        from botocore.config import Config
+
+        if not bucket:
+            raise RuntimeError("S3_BUCKET no está definida")
+
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        self.public_url = public_url.rstrip("/") if public_url else None
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key,
+            config=Config(max_pool_connections=max(10, concurrencia * 2), retries={"max_attempts": 5}),
+        )
+        # Multipart en streaming: partes de part_size, hasta `concurrencia` en paralelo
+        self.transfer = TransferConfig(
+            multipart_threshold=part_size,
+            multipart_chunksize=part_size,
+            max_concurrency=concurrencia,
+            use_threads=True,
+        )
+
+    def escribir(self, clave: str, src: BinaryIO, content_type: str | None = None) -> str:
+        self.client.upload_fileobj(
+            src, self.bucket, clave,
+            ExtraArgs={"ContentType": content_type or tipo_contenido(clave)},
+            Config=self.transfer,
+        )
+        return clave
+
+    def guardar_archivo(self, path: str | Path, clave: str, content_type: str | None = None) -> str:
+        self.client.upload_file(
+            str(path), self.bucket, clave,
+            ExtraArgs={"ContentType": content_type or tipo_contenido(clave)},
+            Config=self.transfer,
+        )
+        Path(path).unlink(missing_ok=True)
+        return clave
+
+    def existe(self, clave: str) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=clave)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def abrir(self, clave: str, desde: int = 0) -> BinaryIO:
+        # StreamingBody: read(n) va leyendo del socket, sin bajar todo a memoria
+        extra = {"Range": f"bytes={desde}-"} if desde else {}
+        return self.client.get_object(Bucket=self.bucket, Key=clave, **extra)["Body"]
+
+    def tamano(self, clave: str) -> int:
+        return self.client.head_object(Bucket=self.bucket, Key=clave)["ContentLength"]
+
+    def borrar(self, clave: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=clave)
+
+    def listar(self, prefijo: str = "") -> Iterator[tuple[str, int, float]]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for pagina in paginator.paginate(Bucket=self.bucket, Prefix=prefijo):
+            for obj in pagina.get("Contents", []):
+                yield obj["Key"], obj["Size"], obj["LastModified"].timestamp()
+
+    def url(self, clave: str) -> str:
+        if self.public_url:
+            return f"{self.public_url}/{clave}"
+        return f"{self.endpoint_url}/{self.bucket}/{clave}"
+
+
+# ----------------------------
+# WORKER R2 (legado: solo subidas)
+# ----------------------------
+class AlmacenWorker:
+    nombre = "worker"
+    puede_leer = puede_listar = puede_borrar = False
+
+    def __init__(self, upload_url: str = WORKER_UPLOAD_URL):
+        self.upload_url = upload_url
+
+    def escribir(self, clave: str, src: BinaryIO, content_type: str | None = None) -> str:
+        """El Worker recibe multipart (file + carpeta) y devuelve la key final en R2."""
+        import requests
+
+        carpeta, _, nombre = clave.rpartition("/")
+        files = {"file": (nombre, src, content_type or tipo_contenido(nombre))}
+        data = {"carpeta": carpeta} if carpeta else {}
+        resp = requests.post(self.upload_url, files=files, data=data, timeout=WORKER_TIMEOUT)
+        resp.raise_for_status()
+        return resp.json().get("key", "")
+
+    def guardar_archivo(self, path: str | Path, clave: str, content_type: str | None = None) -> str:
+        with open(path, "rb") as src:
+            key = self.escribir(clave, src, content_type)
+        Path(path).unlink(missing_ok=True)
+        return key
+
+
+# ----------------------------
+# REGISTRO
+# ----------------------------
+_BACKENDS = {"local": AlmacenLocal, "s3": AlmacenS3, "worker": AlmacenWorker}
+
+
+def validar_almacenes() -> None:
+    """
+    Las imágenes de revisión se leen (URLs, ZIP, crc32), se deduplican y se
+    borran: su backend tiene que admitir todo. ALMACEN_QR solo escribe.
+    """
+    for variable, nombre in (("ALMACEN_REVISIONES", ALMACEN_REVISIONES), ("ALMACEN_QR", ALMACEN_QR)):
+        if nombre not in _BACKENDS:
+            raise RuntimeError(f"{variable}: backend de almacenamiento desconocido: {nombre}")
+    backend = _BACKENDS[ALMACEN_REVISIONES]
+    if not (backend.puede_leer and backend.puede_listar and backend.puede_borrar):
+        raise RuntimeError(f"ALMACEN_REVISIONES={ALMACEN_REVISIONES} no sirve: el backend solo admite subidas")
+
+
+@lru_cache(maxsize=None)
+def obtener_almacen(nombre: str):
+    if nombre == "local":
+        return AlmacenLocal(STORAGE_ROOT)
+    if nombre == "s3":
+        return AlmacenS3(
+            bucket=S3_BUCKET,
+            endpoint_url=S3_ENDPOINT_URL,
+            region=S3_REGION,
+            access_key_id=S3_ACCESS_KEY_ID,
+            secret_access_key=S3_SECRET_ACCESS_KEY,
+            public_url=S3_PUBLIC_URL,
+        )
+    if nombre == "worker":
+        return AlmacenWorker(os.getenv("WORKER_UPLOAD_URL", WORKER_UPLOAD_URL))
+    raise RuntimeError(f"Backend de almacenamiento desconocido: {nombre}")
+
+
+def almacen_revisiones():
+    return obtener_almacen(ALMACEN_REVISIONES)
+
+
+def almacen_qr():
+    return obtener_almacen(ALMACEN_QR)
@@ -0,0 +1,90 @@
+# services/blob_store.py
+"""
+Almacén de imágenes direccionado por contenido:
+
+    <STORAGE_ROOT>/blobs/<aa>/<bb>/<sha256><ext>
+
+Cada contenido se guarda una sola vez, con la extensión de la primera subida:
+las siguientes usan imagen_blob.ruta aunque traigan otra extensión.
+revision_imagen referencia el blob por sha256 y imagen_blob.ref_count (mantenido por trigger, ver migraciones/002)
+indica cuántas filas lo usan.
+
+El destino final es el backend ALMACEN_REVISIONES (services/almacenamiento.py);
+los temporales siempre van al disco local, porque el hash se conoce recién al
+terminar de leer la imagen.
+"""
+import hashlib
+import uuid
+import zlib
+from pathlib import Path
+from typing import BinaryIO
+
+from services.almacenamiento import STORAGE_ROOT, almacen_revisiones, tipo_contenido
+
+BLOBS_DIR = "blobs"
+TMP_DIR = ".tmp"
+CHUNK = 1024 * 1024
+
+
+def ruta_blob(sha256: str, ext: str) -> str:
+    return f"{BLOBS_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}{ext.lower()}"
+
+
+def escribir_temporal(src: BinaryIO, storage_root: str = STORAGE_ROOT) -> tuple[str, Path, int, int]:
+    """
+    Copia `src` a un temporal dentro de storage (con el backend local queda en el
+    mismo filesystem que el destino y confirmar() es un rename) calculando el
+    sha256 y el CRC-32 (lo usa la descarga en ZIP, services/zip_streaming.py).
+    Devuelve (sha256, tmp_path, bytes, crc32).
+    """
+    tmp_dir = Path(storage_root) / TMP_DIR
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = tmp_dir / uuid.uuid4().hex
+
+    digest = hashlib.sha256()
+    crc = 0
+    total = 0
+    with tmp_path.open("wb") as dst:
+        for chunk in iter(lambda: src.read(CHUNK), b""):
+            digest.update(chunk)
+            crc = zlib.crc32(chunk, crc)
+            dst.write(chunk)
+            total += len(chunk)
+    return digest.hexdigest(), tmp_path, total, crc
+
+
+def calcular_crc32(ruta: str) -> tuple[int, int]:
+    """(crc32, bytes) de un archivo ya guardado en el backend."""
+    crc = 0
+    total = 0
+    with almacen_revisiones().abrir(ruta) as src:
+        for chunk in iter(lambda: src.read(CHUNK), b""):
+            crc = zlib.crc32(chunk, crc)
+            total += len(chunk)
+    return crc, total
+
+
+def confirmar(tmp_path: str | Path, ruta: str) -> bool:
+    """
+    Mueve el temporal a su ruta definitiva en el backend. Si el blob ya existe
+    (mismo contenido) descarta el temporal. Devuelve True si se escribió un blob nuevo.
+    """
+    almacen = almacen_revisiones()
+    if almacen.existe(ruta):
+        Path(tmp_path).unlink(missing_ok=True)
+        return False
+    almacen.guardar_archivo(tmp_path, ruta, tipo_contenido(ruta))
+    return True
+
+
+def descartar_temporales(items: list[dict]) -> None:
+    for it in items:
+        tmp = it.get("tmp_path")
+        if tmp:
+            Path(tmp).unlink(missing_ok=True)
+
+
+def borrar(ruta: str) -> None:
+    # En local los subdirectorios <aa>/<bb> se dejan: son a lo sumo 65536 y
+    # borrarlos competiría con un confirmar() concurrente
+    almacen_revisiones().borrar(ruta)
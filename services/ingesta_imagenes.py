@@ -0,0 +1,87 @@
+# services/ingesta_imagenes.py
+"""
+Ingesta de imágenes sueltas (o en lotes multipart chicos) para una revisión,
+sin empaquetar en ZIP. Cada lote se guarda en el almacén por contenido y se
+vincula a la revisión apenas llega (crud_imagenes.agregar_imagenes_revision),
+así el procesamiento se solapa con la subida de los lotes siguientes.
+
+Mismas reglas que services/zip_revision_local.py: extensiones permitidas,
+tamaño máximo por imagen y nombre original saneado.
+"""
+import io
+from pathlib import Path
+
+from fastapi import HTTPException, UploadFile
+
+from metricas import BYTES_PROCESADOS, IMAGENES_PROCESADAS
+from services import blob_store
+from services.almacenamiento import STORAGE_ROOT
+from services.normalizacion import normalizar_en_orden
+from services.zip_revision_local import (
+    MAX_SINGLE_FILE_UNCOMPRESSED,
+    _is_allowed,
+    _sanitize_filename,
+)
+
+# Cabeceras mínimas por formato: descarta archivos que no son la imagen que dicen ser
+FIRMAS = {
+    ".jpg": lambda b: b.startswith(b"\xff\xd8\xff"),
+    ".jpeg": lambda b: b.startswith(b"\xff\xd8\xff"),
+    ".png": lambda b: b.startswith(b"\x89PNG\r\n\x1a\n"),
+    ".webp": lambda b: b[:4] == b"RIFF" and b[8:12] == b"WEBP",
+}
+
+
+def preparar_imagenes(files: list[UploadFile], storage_root: str = STORAGE_ROOT) -> list[dict]:
+    """
+    Valida cada imagen, la normaliza (services/normalizacion.py) y la copia a un
+    temporal del almacén por contenido, en el orden recibido. El orden y el
+    nombre lógico (001.jpg ...) los asigna agregar_imagenes_revision() al vincularlas.
+
+    Retorna:
+      [{original_name, rel_path, sha256, bytes, crc32, tmp_path, ruta_original}]
+    """
+    nombres = []
+    for file in files:
+        orig_name = _sanitize_filename(file.filename or "")
+        ext = Path(orig_name).suffix.lower()
+        if not _is_allowed(orig_name):
+            raise HTTPException(status_code=400, detail=f"Formato no permitido: {file.filename}")
+        if file.size is not None and file.size > MAX_SINGLE_FILE_UNCOMPRESSED:
+            raise HTTPException(status_code=413, detail=f"Imagen demasiado grande: {file.filename}")
+
+        cabecera = file.file.read(12)
+        file.file.seek(0)
+        if not FIRMAS[ext](cabecera):
+            raise HTTPException(status_code=400, detail=f"El archivo no es una imagen {ext} válida: {file.filename}")
+        nombres.append(orig_name)
+
+    def _leer(file: UploadFile) -> bytes:
+        datos = file.file.read(MAX_SINGLE_FILE_UNCOMPRESSED + 1)
+        if len(datos) > MAX_SINGLE_FILE_UNCOMPRESSED:
+            raise HTTPException(status_code=413, detail=f"Imagen demasiado grande: {file.filename}")
+        return datos
+
+    results = []
+    try:
+        fuentes = ((_leer(f), Path(n).suffix.lower()) for f, n in zip(files, nombres))
+        for orig_name, img in zip(nombres, normalizar_en_orden(fuentes)):
+            sha256, tmp_path, size, crc32 = blob_store.escribir_temporal(io.BytesIO(img.datos), storage_root)
+            results.append({
+                "original_name": orig_name,
+                "rel_path": blob_store.ruta_blob(sha256, img.ext),
+                "sha256": sha256,
+                "bytes": size,
+                "crc32": crc32,
+                "tmp_path": str(tmp_path),
+                "ruta_original": img.ruta_original,
+            })
+
+            IMAGENES_PROCESADAS.inc(flujo="revision_imagenes")
+            BYTES_PROCESADOS.inc(size, flujo="revision_imagenes")
+
+        return results
+
+    except BaseException:
+        blob_store.descartar_temporales(results)
+        raise
@@ -0,0 +1,129 @@
+# services/normalizacion.py
+"""
+Normalización de imágenes al ingresar (ZIP de revisión, imágenes sueltas y
+ZIP de QR):
+
+    orientación EXIF aplicada -> lado mayor <= IMG_MAX_LADO -> JPEG/WebP con
+    IMG_CALIDAD, sin metadatos (EXIF/GPS/XMP; se conserva el perfil de color)
+
+Una foto de 12 MP (5-10 MB) queda en unos cientos de KB. Las imágenes se
+procesan en paralelo (Pillow libera el GIL al decodificar / escalar /
+codificar) mientras el request sigue leyendo las siguientes.
+
+Si ALMACEN_ORIGINALES nombra un backend (services/almacenamiento.py), el
+original se guarda ahí tal cual, bajo originales/<aa>/<bb>/<sha256><ext>.
+"""
+import hashlib
+import io
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Iterable, Iterator
+
+from metricas import IMAGENES_NORMALIZADAS, BYTES_NORMALIZACION
+from services.almacenamiento import obtener_almacen, tipo_contenido
+
+NORMALIZAR_IMAGENES = os.getenv("NORMALIZAR_IMAGENES", "1") == "1"
+IMG_MAX_LADO = int(os.getenv("IMG_MAX_LADO", "2048"))
+IMG_FORMATO = os.getenv("IMG_FORMATO", "jpeg").lower()  # jpeg | webp
+IMG_CALIDAD = int(os.getenv("IMG_CALIDAD", "82"))
+IMG_WORKERS = int(os.getenv("IMG_WORKERS", str(min(4, os.cpu_count() or 1))))
+ALMACEN_ORIGINALES = os.getenv("ALMACEN_ORIGINALES")  # vacío: el original se descarta
+
+EXT_FORMATO = {"jpeg": ".jpg", "webp": ".webp"}
+if IMG_FORMATO not in EXT_FORMATO:
+    raise RuntimeError(f"IMG_FORMATO inválido: {IMG_FORMATO} (usar jpeg o webp)")
+
+VENTANA = IMG_WORKERS * 2  # imágenes en vuelo por request (acota la memoria)
+
+
+@dataclass
+class ImagenNormalizada:
+    datos: bytes
+    ext: str
+    normalizada: bool = False
+    ruta_original: str | None = None
+
+
+@lru_cache(maxsize=1)
+def _executor() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=IMG_WORKERS, thread_name_prefix="normalizacion")
+
+
+def ruta_original(sha256: str, ext: str) -> str:
+    return f"originales/{sha256[:2]}/{sha256[2:4]}/{sha256}{ext.lower()}"
+
+
+def _guardar_original(datos: bytes, ext: str) -> str:
+    clave = ruta_original(hashlib.sha256(datos).hexdigest(), ext)
+    obtener_almacen(ALMACEN_ORIGINALES).escribir(clave, io.BytesIO(datos), tipo_contenido(clave))
+    return clave
+
+
+def _reencodar(datos: bytes) -> bytes:
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(datos)) as img:
+        # JPEG: decodifica directo a escala reducida (1/2, 1/4, 1/8), mucho más rápido
+        img.draft("RGB", (IMG_MAX_LADO, IMG_MAX_LADO))
+        icc = img.info.get("icc_profile")
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((IMG_MAX_LADO, IMG_MAX_LADO), Image.Resampling.LANCZOS)
+
+        if IMG_FORMATO == "jpeg" and img.mode != "RGB":
+            img = img.convert("RGB")
+        elif img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+
+        out = io.BytesIO()
+        opciones = {"quality": IMG_CALIDAD, "icc_profile": icc}
+        if IMG_FORMATO == "jpeg":
+            opciones.update(optimize=True, progressive=True)
+        else:
+            opciones.update(method=4)
+        img.save(out, format=IMG_FORMATO.upper(), **opciones)  # sin exif=: no se copian metadatos
+        return out.getvalue()
+
+
+def normalizar(datos: bytes, ext: str) -> ImagenNormalizada:
+    """
+    Normaliza una imagen. Si no se puede decodificar se devuelve tal cual
+    (el flujo de revisión nunca rechazó imágenes por su contenido).
+    """
+    if not NORMALIZAR_IMAGENES:
+        return ImagenNormalizada(datos, ext)
+
+    original = _guardar_original(datos, ext) if ALMACEN_ORIGINALES else None
+    try:
+        salida = _reencodar(datos)
+    except Exception as e:
+        IMAGENES_NORMALIZADAS.inc(resultado="error")
+        print(f"No se pudo normalizar imagen ({ext}):", e)
+        return ImagenNormalizada(datos, ext, ruta_original=original)
+
+    IMAGENES_NORMALIZADAS.inc(resultado="ok")
+    BYTES_NORMALIZACION.inc(len(datos), etapa="entrada")
+    BYTES_NORMALIZACION.inc(len(salida), etapa="salida")
+    return ImagenNormalizada(salida, EXT_FORMATO[IMG_FORMATO], normalizada=True, ruta_original=original)
+
+
+def normalizar_en_orden(fuentes: Iterable[tuple[bytes, str]]) -> Iterator[ImagenNormalizada]:
+    """
+    Normaliza (datos, ext) en paralelo y devuelve los resultados en el mismo
+    orden. `fuentes` se consume de a poco: mientras los workers procesan, el
+    llamador sigue leyendo (del ZIP o del request) hasta VENTANA imágenes en vuelo.
+    """
+    if not NORMALIZAR_IMAGENES:
+        for datos, ext in fuentes:
+            yield ImagenNormalizada(datos, ext)
+        return
+
+    pendientes = deque()
+    for datos, ext in fuentes:
+        pendientes.append(_executor().submit(normalizar, datos, ext))
+        if len(pendientes) >= VENTANA:
+            yield pendientes.popleft().result()
+    while pendientes:
+        yield pendientes.popleft().result()
@@ -5,6 +5,8 @@ from pathlib import Path
 import re
 from fastapi import HTTPException, UploadFile
 
+from services.almacenamiento import STORAGE_ROOT
+
 IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".webp"}
 SAFE_NAME_RE = re.compile(r"[^a-zA-Z0-9._-]")
 
@@ -19,7 +21,7 @@ def procesar_zip_revision_local(
     *,
     revision_id: int,
     zip_file: UploadFile,
-    storage_root: str = "storage",
+    storage_root: str = STORAGE_ROOT,
     expected_count: int | None = None,
 ) -> list[dict]:
     """
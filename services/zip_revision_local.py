@@ -1,10 +1,17 @@
 # services/zip_revision_local.py
+import io
 import shutil
+import uuid
 import zipfile
 from pathlib import Path
 import re
 from fastapi import HTTPException, UploadFile
 
+from metricas import BYTES_PROCESADOS, IMAGENES_PROCESADAS
+from services import blob_store
+from services.almacenamiento import STORAGE_ROOT
+from services.normalizacion import normalizar_en_orden
+
 ALLOWED_EXTS = {".jpg", ".jpeg", ".png", ".webp"}
 MAX_FILES = 1200
 MAX_TOTAL_UNCOMPRESSED = 2_000_000_000
@@ -20,40 +27,67 @@ def _sanitize_filename(name: str) -> str:
     name = name.replace("\\", "/").split("/")[-1]
     return SAFE_NAME_RE.sub("_", name)
 
+def nombre_ordenado(idx: int, ext: str, total: int) -> str:
+    # 001.jpg, 002.jpg ... con tantos dígitos como haga falta para `total`
+    pad = max(3, len(str(total)))
+    return f"{idx:0{pad}d}{ext}"
+
 def procesar_zip_revision_local(
     *,
     revision_id: int,
     zip_file: UploadFile,
-    storage_root: str = "storage",
+    storage_root: str = STORAGE_ROOT,
 ) -> list[dict]:
     """
-    Extrae y renombra imágenes a local:
-      storage/revisiones/<revision_id>/original/<...>
-      storage/revisiones/<revision_id>/renamed/001.jpg ...
-
-    Retorna:
-      [{original_name, stored_name, rel_path, order_index}]
+    Guarda el ZIP subido en un temporal y lo procesa con procesar_zip_revision_archivo().
     """
-    base_dir = Path(storage_root) / "revisiones" / str(revision_id)
-    original_dir = base_dir / "original"
-    renamed_dir = base_dir / "renamed"
-    original_dir.mkdir(parents=True, exist_ok=True)
-    renamed_dir.mkdir(parents=True, exist_ok=True)
+    tmp_dir = Path(storage_root) / blob_store.TMP_DIR
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    tmp_zip_path = tmp_dir / f"upload-{revision_id}-{uuid.uuid4().hex}.zip"
 
-    tmp_zip_path = base_dir / "upload.zip"
     try:
-        with tmp_zip_path.open("wb") as f:
-            shutil.copyfileobj(zip_file.file, f)
-    except Exception:
-        raise HTTPException(status_code=400, detail="No se pudo guardar el ZIP")
+        try:
+            with tmp_zip_path.open("wb") as f:
+                shutil.copyfileobj(zip_file.file, f)
+        except Exception:
+            raise HTTPException(status_code=400, detail="No se pudo guardar el ZIP")
+
+        return procesar_zip_revision_archivo(
+            revision_id=revision_id,
+            zip_path=tmp_zip_path,
+            storage_root=storage_root,
+        )
+    finally:
+        try:
+            tmp_zip_path.unlink(missing_ok=True)
+        except Exception:
+            pass
+
+
+def procesar_zip_revision_archivo(
+    *,
+    revision_id: int,
+    zip_path: str | Path,
+    storage_root: str = STORAGE_ROOT,
+) -> list[dict]:
+    """
+    Extrae las imágenes, las normaliza (services/normalizacion.py) y las deja en
+    temporales del almacén por contenido (services/blob_store.py);
+    guardar_imagenes_revision() las confirma junto con las filas.
+    El nombre lógico sigue siendo 001.jpg, 002.jpg ... (orden alfabético).
 
-    if tmp_zip_path.stat().st_size > MAX_ZIP_SIZE:
+    Retorna:
+      [{original_name, stored_name, rel_path, order_index, sha256, bytes, crc32, tmp_path, ruta_original}]
+    """
+    zip_path = Path(zip_path)
+    if zip_path.stat().st_size > MAX_ZIP_SIZE:
         raise HTTPException(status_code=413, detail="ZIP demasiado grande")
 
     zf = None
+    results = []
     try:
         try:
-            zf = zipfile.ZipFile(tmp_zip_path)
+            zf = zipfile.ZipFile(zip_path)
         except Exception:
             raise HTTPException(status_code=400, detail="ZIP inválido o corrupto")
 
@@ -80,41 +114,39 @@ def procesar_zip_revision_local(
 
         imgs.sort(key=lambda x: x.filename)
 
-        extracted = []
-        for info in imgs:
-            safe_name = _sanitize_filename(info.filename)
-            target = original_dir / safe_name
-            with zf.open(info) as src, target.open("wb") as dst:
-                shutil.copyfileobj(src, dst)
-            extracted.append((safe_name, target))
-
-        n = len(extracted)
-        pad = max(3, len(str(n)))
-
-        results = []
-        for idx, (orig_name, orig_path) in enumerate(extracted, start=1):
-            ext = orig_path.suffix.lower()
-            stored_name = f"{idx:0{pad}d}{ext}"
-            stored_path = renamed_dir / stored_name
-            shutil.copy2(orig_path, stored_path)
-
-            rel_path = str(Path("revisiones") / str(revision_id) / "renamed" / stored_name).replace("\\", "/")
+        n = len(imgs)
+
+        # La lectura del ZIP sigue mientras los workers normalizan las anteriores
+        fuentes = ((zf.read(info), Path(info.filename).suffix.lower()) for info in imgs)
+
+        for idx, (info, img) in enumerate(zip(imgs, normalizar_en_orden(fuentes)), start=1):
+            orig_name = _sanitize_filename(info.filename)
+            ext = img.ext
+            sha256, tmp_path, size, crc32 = blob_store.escribir_temporal(io.BytesIO(img.datos), storage_root)
+
             results.append({
                 "original_name": orig_name,
-                "stored_name": stored_name,
-                "rel_path": rel_path,
+                "stored_name": nombre_ordenado(idx, ext, n),
+                "rel_path": blob_store.ruta_blob(sha256, ext),
                 "order_index": idx,
+                "sha256": sha256,
+                "bytes": size,
+                "crc32": crc32,
+                "tmp_path": str(tmp_path),
+                "ruta_original": img.ruta_original,
             })
+            IMAGENES_PROCESADAS.inc(flujo="revision_zip")
+            BYTES_PROCESADOS.inc(size, flujo="revision_zip")
 
         return results
 
+    except BaseException:
+        blob_store.descartar_temporales(results)
+        raise
+
     finally:
         try:
             if zf:
                 zf.close()
         except Exception:
             pass
-        try:
-            tmp_zip_path.unlink(missing_ok=True)
-        except Exception:
-            pass
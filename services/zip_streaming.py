@@ -0,0 +1,153 @@
+# services/zip_streaming.py
+"""
+ZIP armado al vuelo, con entradas STORED (sin comprimir: los JPEG/WebP ya
+están comprimidos) leídas directo del almacén, sin temporales.
+
+Como el tamaño y el CRC-32 de cada imagen se conocen de antemano
+(imagen_blob), el archivo es determinístico: se sabe su largo total y qué
+bytes van en cada offset, así que se puede servir cualquier rango (Range /
+reanudar descargas) sin generar lo anterior. Usa ZIP64 solo si los offsets
+pasan de 4 GB.
+"""
+import hashlib
+import struct
+from dataclasses import dataclass
+from datetime import date
+from typing import Iterator
+
+from fastapi import HTTPException
+
+from services.almacenamiento import almacen_revisiones
+
+CHUNK = 256 * 1024
+LIMITE_ZIP32 = 0xFFFFFFFF  # offsets desde aquí van en el extra ZIP64
+
+
+@dataclass
+class EntradaZip:
+    nombre: str   # nombre dentro del ZIP
+    ruta: str     # clave en el almacén
+    tamano: int
+    crc32: int
+
+
+def _fecha_dos(fecha: date) -> tuple[int, int]:
+    anio = max(fecha.year, 1980)
+    return 0, ((anio - 1980) << 9) | (fecha.month << 5) | fecha.day
+
+
+class ZipEnStreaming:
+    def __init__(self, entradas: list[EntradaZip], fecha: date):
+        self.entradas = entradas
+        self._hora, self._fecha = _fecha_dos(fecha)
+        # Segmentos (offset, largo, bytes | EntradaZip) en orden
+        self.segmentos: list[tuple[int, int, object]] = []
+        self.tamano = 0
+        self._armar()
+
+    def _agregar(self, contenido) -> None:
+        largo = contenido.tamano if isinstance(contenido, EntradaZip) else len(contenido)
+        self.segmentos.append((self.tamano, largo, contenido))
+        self.tamano += largo
+
+    def _armar(self) -> None:
+        central = bytearray()
+        for e in self.entradas:
+            nombre = e.nombre.encode("utf-8")
+            flags = 0x0800 if not e.nombre.isascii() else 0  # nombre en UTF-8
+            offset = self.tamano
+
+            self._agregar(struct.pack(
+                "<IHHHHHIIIHH", 0x04034B50, 20, flags, 0, self._hora, self._fecha,
+                e.crc32, e.tamano, e.tamano, len(nombre), 0,
+            ) + nombre)
+            self._agregar(e)
+
+            extra = b""
+            version = 20
+            if offset >= LIMITE_ZIP32:
+                extra = struct.pack("<HHQ", 0x0001, 8, offset)
+                offset, version = 0xFFFFFFFF, 45
+            central += struct.pack(
+                "<IHHHHHHIIIHHHHHII", 0x02014B50, (3 << 8) | version, version, flags, 0,
+                self._hora, self._fecha, e.crc32, e.tamano, e.tamano,
+                len(nombre), len(extra), 0, 0, 0, 0o100644 << 16, offset,
+            ) + nombre + extra
+
+        inicio_central = self.tamano
+        n = len(self.entradas)
+        fin = bytearray()
+        if n >= 0xFFFF or inicio_central >= LIMITE_ZIP32 or len(central) >= LIMITE_ZIP32:
+            inicio_zip64 = inicio_central + len(central)
+            fin += struct.pack("<IQHHIIQQQQ", 0x06064B50, 44, 45, 45, 0, 0, n, n, len(central), inicio_central)
+            fin += struct.pack("<IIQI", 0x07064B50, 0, inicio_zip64, 1)
+            fin += struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, 0xFFFF, 0xFFFF, 0xFFFFFFFF, 0xFFFFFFFF, 0)
+        else:
+            fin += struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, n, n, len(central), inicio_central, 0)
+        self._agregar(bytes(central) + bytes(fin))
+
+    @property
+    def etag(self) -> str:
+        h = hashlib.sha256()
+        for e in self.entradas:
+            h.update(f"{e.nombre}\0{e.ruta}\0{e.tamano}\0{e.crc32}\n".encode())
+        return f'"{h.hexdigest()[:32]}"'
+
+    def iterar(self, inicio: int = 0, fin: int | None = None) -> Iterator[bytes]:
+        """Bytes [inicio, fin] (fin inclusive, como en Content-Range)."""
+        fin = self.tamano - 1 if fin is None else fin
+        almacen = almacen_revisiones()
+        buffer = bytearray()
+
+        for offset, largo, contenido in self.segmentos:
+            if offset + largo <= inicio or largo == 0:
+                continue
+            if offset > fin:
+                break
+            desde = max(inicio - offset, 0)
+            hasta = min(fin - offset + 1, largo)
+
+            if not isinstance(contenido, EntradaZip):
+                buffer += contenido[desde:hasta]
+                continue
+
+            restante = hasta - desde
+            with almacen.abrir(contenido.ruta, desde=desde) as src:
+                while restante > 0:
+                    chunk = src.read(min(CHUNK, restante))
+                    if not chunk:
+                        raise IOError(f"Archivo más corto de lo esperado: {contenido.ruta}")
+                    restante -= len(chunk)
+                    buffer += chunk
+                    if len(buffer) >= CHUNK:
+                        yield bytes(buffer)
+                        buffer.clear()
+
+        if buffer:
+            yield bytes(buffer)
+
+
+def parsear_rango(header: str | None, tamano: int) -> tuple[int, int] | None:
+    """
+    'Range: bytes=a-b' / 'bytes=a-' / 'bytes=-n' -> (inicio, fin) inclusive.
+    None si no hay rango o no se entiende (se responde el archivo completo);
+    varios rangos tampoco se soportan. Fuera del archivo -> 416.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    inicio_txt, _, fin_txt = header[6:].strip().partition("-")
+    try:
+        if inicio_txt == "":
+            sufijo = int(fin_txt)
+            if sufijo <= 0:
+                return None
+            inicio, fin = max(tamano - sufijo, 0), tamano - 1
+        else:
+            inicio = int(inicio_txt)
+            fin = int(fin_txt) if fin_txt else tamano - 1
+    except ValueError:
+        return None
+
+    if inicio >= tamano or fin < inicio:
+        raise HTTPException(status_code=416, detail="Rango fuera del archivo", headers={"Content-Range": f"bytes */{tamano}"})
+    return inicio, min(fin, tamano - 1)
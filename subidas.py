@@ -0,0 +1,127 @@
+import zipfile
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from schemas import SubidaCreate
+from crud_revisiones import obtener_revision
+
+from services.subidas_reanudables import (
+    crear_subida,
+    obtener_subida,
+    escribir_chunk,
+    verificar_completa,
+    bloquear_subida,
+    eliminar_subida,
+)
+from services.almacenamiento import STORAGE_ROOT
+from services.zip_revision_local import procesar_zip_revision_archivo
+from revisiones import registrar_imagenes_revision
+from imagenes import procesar_qr_zip
+
+router = APIRouter(prefix="/subidas", tags=["Subidas"])
+
+TUS_VERSION = "1.0.0"
+TIPOS_CONTENIDO_PATCH = {"application/offset+octet-stream", "application/octet-stream"}
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def _headers_estado(subida: dict) -> dict:
+    return {
+        "Upload-Offset": str(subida["offset"]),
+        "Upload-Length": str(subida["tamano_total"]),
+        "Tus-Resumable": TUS_VERSION,
+        "Cache-Control": "no-store",
+    }
+
+
+@router.post("", response_model=dict, status_code=201)
+def create_subida(body: SubidaCreate, response: Response, db: Session = Depends(get_db)):
+    if not obtener_revision(db, body.revision_id):
+        raise HTTPException(status_code=404, detail="Revisión no existe")
+
+    subida = crear_subida(body.tipo, body.revision_id, body.tamano_total, body.nombre, body.sha256)
+    response.headers.update(_headers_estado(subida))
+    response.headers["Location"] = f"/subidas/{subida['id']}"
+    return subida
+
+
+@router.head("/{subida_id}")
+def head_subida(subida_id: str):
+    subida = obtener_subida(subida_id)
+    return Response(status_code=200, headers=_headers_estado(subida))
+
+
+@router.get("/{subida_id}", response_model=dict)
+def get_subida(subida_id: str, response: Response):
+    subida = obtener_subida(subida_id)
+    response.headers.update(_headers_estado(subida))
+    return subida
+
+
+@router.patch("/{subida_id}", status_code=204)
+async def patch_subida(
+    subida_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset", ge=0),
+    upload_checksum: Optional[str] = Header(None, alias="Upload-Checksum"),
+):
+    """
+    Agrega un chunk en `Upload-Offset`. El cuerpo se escribe a disco a medida
+    que llega (no se bufferiza en memoria). Si se corta la conexión, el cliente
+    consulta HEAD y reanuda desde el offset devuelto.
+    """
+    content_type = (request.headers.get("content-type") or "").split(";")[0].strip().lower()
+    if content_type not in TIPOS_CONTENIDO_PATCH:
+        raise HTTPException(status_code=415, detail="Content-Type debe ser application/offset+octet-stream")
+
+    offset = await escribir_chunk(subida_id, upload_offset, request.stream(), upload_checksum)
+    return Response(status_code=204, headers={"Upload-Offset": str(offset), "Tus-Resumable": TUS_VERSION})
+
+
+@router.delete("/{subida_id}", response_model=dict)
+def delete_subida(subida_id: str):
+    if not eliminar_subida(subida_id):
+        raise HTTPException(status_code=404, detail="Subida no existe")
+    return {"ok": True}
+
+
+@router.post("/{subida_id}/finalizar", response_model=dict)
+def finalizar_subida(subida_id: str, db: Session = Depends(get_db)):
+    """
+    Procesa la subida completa igual que el endpoint de ZIP correspondiente y
+    borra los datos temporales. Solo se descarta si salió bien o si el archivo
+    no es un ZIP; ante cualquier otro error se conserva para reintentar el
+    finalizar sin volver a subirlo.
+    """
+    with bloquear_subida(subida_id):
+        subida = obtener_subida(subida_id)
+        path = verificar_completa(subida)
+        revision_id = subida["revision_id"]
+
+        if subida["tipo"] == "revision_zip" and not obtener_revision(db, revision_id):
+            raise HTTPException(status_code=404, detail="Revisión no existe")
+
+        try:
+            zf = zipfile.ZipFile(path)
+        except Exception:
+            eliminar_subida(subida_id)
+            raise HTTPException(status_code=400, detail="ZIP inválido")
+        with zf:
+            if subida["tipo"] == "revision_zip":
+                items = procesar_zip_revision_archivo(revision_id=revision_id, zip_path=path, storage_root=STORAGE_ROOT)
+                resultado = registrar_imagenes_revision(db, revision_id, items)
+            else:
+                resultado = procesar_qr_zip(zf, revision_id)
+
+        eliminar_subida(subida_id)
+        return resultado
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from crud_sync import sincronizar, SYNC_LIMITE
+from respuestas import RespuestaJSON
+
+router = APIRouter(prefix="/sync", tags=["Sync"])
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@router.get("", response_model=dict)
+def get_sync(
+    since: str | None = Query(default=None, description="Token de la sincronización anterior"),
+    limit: int = Query(default=SYNC_LIMITE, ge=1, le=10000),
+    db: Session = Depends(get_db),
+):
+    """
+    Sincronización incremental (fincas, sectores, plantas, trabajadores, revisiones).
+    Sin since: carga completa. Con since: filas nuevas / modificadas en
+    `cambios` y ids eliminados en `borrados`. Si `mas` es true, repetir con el
+    token devuelto; si `reset` es true, descartar los datos locales.
+    """
+    res, err = sincronizar(db, token=since, limite=limit)
+    if err:
+        raise HTTPException(status_code=400, detail=err)
+    return RespuestaJSON(res)
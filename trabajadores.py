@@ -7,6 +7,7 @@ from crud_trabajadores import (
     crear_trabajador, listar_trabajadores, obtener_trabajador,
     actualizar_trabajador, eliminar_trabajador
 )
+from respuestas import parsear_campos, respuesta_filas
 
 router = APIRouter(prefix="/trabajadores", tags=["Trabajadores"])
 
@@ -27,14 +28,20 @@ def create_trabajador(body: TrabajadorCreate, db: Session = Depends(get_db)):
     return obj
 
 
-@router.get("", response_model=list[TrabajadorResponse])
+@router.get(
+    "",
+    response_model=None,  # respuesta_filas no pasa por el modelo
+    responses={200: {"model": list[TrabajadorResponse], "description": "Con `fields`, cada objeto trae solo esas columnas"}},
+)
 def get_trabajadores(
     activo: bool | None = Query(default=None),
     skip: int = 0,
     limit: int = 50,
+    fields: str | None = Query(default=None, description="Columnas a devolver, ej. id,nombre (el resto no viene en la respuesta)"),
     db: Session = Depends(get_db),
 ):
-    return listar_trabajadores(db, activo=activo, skip=skip, limit=limit)
+    campos = parsear_campos(fields, TrabajadorResponse)
+    return respuesta_filas(listar_trabajadores(db, activo=activo, skip=skip, limit=limit, campos=campos))
 
 
 @router.get("/{trabajador_id}", response_model=TrabajadorResponse)
@@ -18,6 +18,7 @@ from crud_usuarios import (
     actualizar_password,
     eliminar_usuario,
 )
+from respuestas import parsear_campos, respuesta_filas
 
 router = APIRouter(
     prefix="/usuarios",
@@ -42,13 +43,19 @@ def post_usuario(body: UsuarioCreate, db: Session = Depends(get_db)):
     return u
 
 
-@router.get("", response_model=list[UsuarioResponse])
+@router.get(
+    "",
+    response_model=None,  # respuesta_filas no pasa por el modelo
+    responses={200: {"model": list[UsuarioResponse], "description": "Con `fields`, cada objeto trae solo esas columnas"}},
+)
 def get_usuarios(
     skip: int = 0,
     limit: int = Query(default=50, le=200),
+    fields: str | None = Query(default=None, description="Columnas a devolver, ej. id,nombre (el resto no viene en la respuesta)"),
     db: Session = Depends(get_db),
 ):
-    return listar_usuarios(db, skip=skip, limit=limit)
+    campos = parsear_campos(fields, UsuarioResponse)
+    return respuesta_filas(listar_usuarios(db, skip=skip, limit=limit, campos=campos))
 
 
 @router.get("/{usuario_id}", response_model=UsuarioResponse)